@@ -3,22 +3,79 @@
 """
 coletar_chat_replay.py
 Baixa o replay de chat de uma live gravada do YouTube.
+
+A gravação é em fluxo: lotes pequenos (``INTERVALO_GRAVACAO`` mensagens ou
+``INTERVALO_GRAVACAO_S`` segundos) vão direto para o disco, então a memória
+não cresce com o tamanho do chat. A cada lote gravado, ``checkpoint.json`` na
+pasta da live registra o total e o offset (``time_in_seconds``) da última
+mensagem; se o download cair, rodar de novo retoma desse ponto (as mensagens
+repetidas na emenda são descartadas pelo ID). Ao final, informa a vazão
+(mensagens/s) e o pico de memória do processo.
+
+Modo em lote: aceita vários URLs/IDs na linha de comando, um arquivo com um
+por linha (``--arquivo``) e/ou as lives de um canal (``--canal``, listadas
+pelo yt-dlp). Os IDs repetidos são descartados, vídeos com coleta já
+concluída são pulados sem consultar a rede e os demais são baixados em
+paralelo por ``--workers`` threads (padrão ``WORKERS_PADRAO``), com um
+intervalo mínimo entre o início de dois downloads (``--pausa``) para não
+provocar bloqueio por excesso de requisições.
+
+As mensagens são gravadas pelos mesmos escritores do monitor
+(``monitor_de_lives/scripts/escritor_chat.py``): ``chat.csv`` na pasta da live
+ou, com ``FORMATO_ARMAZENAMENTO = "parquet"``, ``dados/parquet/`` particionado
+por canal/data (``"sqlite"``: banco único ``dados/chat.sqlite3``). O horário
+de cada mensagem sai no formato canônico de ``timestamps.py`` (``timestamp_us``
+em µs, sem perder a fração de segundo, + ISO).
+
+Os metadados vêm do cache em disco compartilhado com o monitor
+(``cache_metadados.py``); o yt-dlp só é consultado para vídeos ausentes ou
+com cache expirado, com uma instância de ``YoutubeDL`` reaproveitada por thread.
 """
 
 import os
 import re
 import sys
+import argparse
 import csv
+import json
+import time
+import hashlib
+import threading
 import unicodedata
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
+from pathlib import Path
 from urllib.parse import urlparse, parse_qs
 
-import pandas as pd
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
 from chat_downloader import ChatDownloader
 from yt_dlp import YoutubeDL
 
-INTERVALO_GRAVACAO = 100_000  # grava num CSV se o total chega em 100.000 mensagens
+# módulos compartilhados com o monitor de lives
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "monitor_de_lives" / "scripts"))
+from cache_metadados import CacheMetadados  # noqa: E402
+from escritor_chat import criar_escritor  # noqa: E402
+from timestamps import campos_horario, epoca_para_us  # noqa: E402
+
+INTERVALO_GRAVACAO = 1_000     # grava a cada 1.000 mensagens…
+INTERVALO_GRAVACAO_S = 5       # …ou a cada 5 s, o que vier primeiro
+INTERVALO_PROGRESSO = 100_000  # mensagens entre avisos de progresso
 DIRETORIO_BASE = "dados"
+ARQ_CHECKPOINT = "checkpoint.json"
+FORMATO_ARMAZENAMENTO = "csv"  # "csv", "parquet" ou "sqlite"
+WORKERS_PADRAO = 4             # downloads simultâneos no modo em lote
+PAUSA_ENTRE_INICIOS_S = 2.0    # intervalo mínimo entre o início de dois downloads
+LIMITE_CANAL = 200             # lives mais recentes consideradas com --canal
+
+# estado da live segundo o yt-dlp → estado usado pelo cache de metadados
+ESTADO_LIVE = {"is_upcoming": "upcoming", "is_live": "live", "post_live": "live"}
+
+_cache_metadados: CacheMetadados | None = None
+_local = threading.local()  # um YoutubeDL por thread, reaproveitado no lote
 
 # utilidades
 def gerar_nome_pasta(texto: str) -> str:
@@ -52,12 +109,32 @@ def seguro_int(x) -> int:
         return 0
 
 
+def cache_metadados() -> CacheMetadados:
+    """Cache compartilhado com o monitor (``monitor_de_lives/dados/metadados``)."""
+    global _cache_metadados
+    if _cache_metadados is None:
+        _cache_metadados = CacheMetadados()
+    return _cache_metadados
+
+
+def _ydl() -> YoutubeDL:
+    if not hasattr(_local, "ydl"):
+        _local.ydl = YoutubeDL({"quiet": True, "skip_download": True})
+    return _local.ydl
+
+
 def obter_metadados_video(id_video: str, url_para_info: str) -> dict:
+    """Metadados do vídeo, do cache em disco ou (se ausente/expirado) do yt-dlp."""
+    meta = cache_metadados().obter(id_video)
+    if meta is not None:
+        return meta
+
     padrao = {
         "id_video": id_video,
         "titulo": "",
         "descricao": "",
         "canal": "",
+        "id_canal": "",
         "data_publicacao": "",
         "data_inicio_live": "",
         "espectadores_atuais": "",
@@ -72,8 +149,7 @@ def obter_metadados_video(id_video: str, url_para_info: str) -> dict:
         return datetime.fromtimestamp(seg, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
     try:
-        with YoutubeDL({"quiet": True, "skip_download": True}) as ydl:
-            info = ydl.extract_info(url_para_info, download=False)
+        info = _ydl().extract_info(url_para_info, download=False)
     except Exception as e:
         print(f"[aviso] yt-dlp não conseguiu ler metadados: {e}")
         return padrao
@@ -82,11 +158,12 @@ def obter_metadados_video(id_video: str, url_para_info: str) -> dict:
     if info.get("upload_date"):  # YYYYMMDD
         pub_iso = datetime.strptime(info["upload_date"], "%Y%m%d").strftime("%Y-%m-%dT00:00:00Z")
 
-    return {
+    meta = {
         "id_video":            id_video,
         "titulo":              info.get("title", ""),
         "descricao":           info.get("description", ""),
         "canal":               info.get("uploader") or info.get("channel", ""),
+        "id_canal":            info.get("channel_id") or "",
         "data_publicacao":     pub_iso,
         "data_inicio_live":    ts_iso(info.get("release_timestamp") or info.get("live_start_timestamp")),
         "espectadores_atuais": "",  # não vale para replay
@@ -94,48 +171,87 @@ def obter_metadados_video(id_video: str, url_para_info: str) -> dict:
         "visualizacoes":       seguro_int(info.get("view_count")),
         "comentarios":         seguro_int(info.get("comment_count")),
     }
+    cache_metadados().salvar(id_video, meta, ESTADO_LIVE.get(info.get("live_status"), "none"))
+    return meta
 
 
-def normalizar_timestamp(raw_ts: float | int) -> float:
-    """
-    Converte o timestamp do chat-downloader (µs ou ms) para segundos.
-    ≥1e14 → µs; ≥1e11 → ms; senão assume segundos.
-    """
-    if raw_ts >= 1e14:
-        return raw_ts / 1_000_000
-    if raw_ts >= 1e11:
-        return raw_ts / 1_000
-    return raw_ts
+def id_mensagem(msg: dict) -> str:
+    """ID da mensagem no chat-downloader; sem ele, um hash do conteúdo."""
+    if msg.get("message_id"):
+        return msg["message_id"]
+    bruto = f"{msg.get('timestamp')}|{msg.get('author', {}).get('name', '')}|{msg.get('message', '')}"
+    return hashlib.sha1(bruto.encode("utf-8")).hexdigest()
 
 
-def main() -> None:
-    if len(sys.argv) < 2:
-        print("Uso: python coletar_chat_replay.py <URL ou ID do vídeo>")
-        sys.exit(1)
+def localizar_pasta(id_video: str) -> str | None:
+    """Pasta de uma coleta anterior deste vídeo (para retomar), se existir."""
+    if not os.path.isdir(DIRETORIO_BASE):
+        return None
+    for nome in sorted(os.listdir(DIRETORIO_BASE)):
+        if nome.endswith(f"__{id_video}"):
+            return os.path.join(DIRETORIO_BASE, nome)
+    return None
+
+
+def ler_checkpoint(pasta: str) -> dict:
+    try:
+        with open(os.path.join(pasta, ARQ_CHECKPOINT), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
 
-    raw_arg = sys.argv[1].strip()
+def salvar_checkpoint(pasta: str, dados: dict) -> None:
+    """Grava o checkpoint de forma atômica (arquivo temporário + rename)."""
+    caminho = os.path.join(pasta, ARQ_CHECKPOINT)
+    with open(caminho + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2)
+    os.replace(caminho + ".tmp", caminho)
+
+
+def pico_memoria_mb() -> float | None:
+    """Pico de memória residente do processo (Linux/macOS)."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+def coletar_replay(raw_arg: str) -> dict:
+    """
+    Baixa (ou retoma) o replay de chat de um vídeo. Devolve um resumo com
+    pasta, total de mensagens, duração, vazão e pico de memória.
+    """
     id_video, url_info = extrair_id_yt(raw_arg)
+    t0 = time.monotonic()
+
+    pasta_dest = localizar_pasta(id_video)
+    checkpoint = ler_checkpoint(pasta_dest) if pasta_dest else {}
+    if checkpoint.get("concluido"):
+        print(f"✓ {id_video}: coleta já concluída em {pasta_dest}")
+        return {"id_video": id_video, "pasta": pasta_dest, "total": checkpoint.get("total", 0),
+                "baixadas": 0, "segundos": 0.0, "msg_por_s": 0.0,
+                "pico_rss_mb": pico_memoria_mb(), "retomado": False, "ja_concluido": True}
 
     # 1) metadados
     meta = obter_metadados_video(id_video, url_info)
 
-    canal_limpo = gerar_nome_pasta(meta["canal"])
-    if meta["data_publicacao"]:
-        data_base = meta["data_publicacao"][:10]
-        hora_base = "00-00-00"
-    else:
-        agora = datetime.utcnow().strftime("%Y-%m-%d__%H-%M-%S")
-        data_base, hora_base = agora.split("__")
-
-    pasta_dest = os.path.join(DIRETORIO_BASE, f"{canal_limpo}__{data_base}__{hora_base}__{id_video}")
+    if pasta_dest is None:
+        canal_limpo = gerar_nome_pasta(meta["canal"])
+        if meta["data_publicacao"]:
+            data_base = meta["data_publicacao"][:10]
+            hora_base = "00-00-00"
+        else:
+            agora = datetime.utcnow().strftime("%Y-%m-%d__%H-%M-%S")
+            data_base, hora_base = agora.split("__")
+        pasta_dest = os.path.join(DIRETORIO_BASE, f"{canal_limpo}__{data_base}__{hora_base}__{id_video}")
     os.makedirs(pasta_dest, exist_ok=True)
 
     arq_meta = os.path.join(pasta_dest, "metadados.csv")
-    arq_chat = os.path.join(pasta_dest, "chat.csv")
 
     # grava metadados (ordem fixa de colunas)
     campos_meta = [
-        "id_video", "titulo", "descricao", "canal",
+        "id_video", "titulo", "descricao", "canal", "id_canal",
         "data_publicacao", "data_inicio_live", "espectadores_atuais",
         "likes", "visualizacoes", "comentarios"
     ]
@@ -143,51 +259,218 @@ def main() -> None:
         w = csv.DictWriter(f, fieldnames=campos_meta)
         w.writeheader()
         w.writerow(meta)
-    print(f"Metadados gravados em {arq_meta}")
+    print(f"[{id_video}] Metadados gravados em {arq_meta}")
 
     # 2) chat
-    print("→ Iniciando download do chat (replay)…")
-
-    chat = ChatDownloader().get_chat(raw_arg)
+    inicio_s = checkpoint.get("ultimo_offset_s")
+    if inicio_s and inicio_s > 0:
+        print(f"[{id_video}] → Retomando download do chat a partir de {inicio_s:.0f}s "
+              f"({checkpoint.get('total', 0)} mensagens já gravadas)…")
+        chat = ChatDownloader().get_chat(raw_arg, start_time=inicio_s)
+    else:
+        print(f"[{id_video}] → Iniciando download do chat (replay)…")
+        chat = ChatDownloader().get_chat(raw_arg)
+    escritor = criar_escritor(FORMATO_ARMAZENAMENTO, Path(pasta_dest), meta)
 
     buffer: list[dict] = []
-    total = 0
+    baixadas = 0
+    offset_lote = inicio_s
+    ultima_gravacao = time.monotonic()
+
+    def gravar_lote() -> None:
+        nonlocal ultima_gravacao
+        escritor.gravar(buffer)
+        buffer.clear()
+        ultima_gravacao = time.monotonic()
+        # só avança o checkpoint quando tudo o que foi entregue está em disco
+        if escritor.pendentes == 0 and offset_lote is not None:
+            salvar_checkpoint(pasta_dest, {
+                "id_video": id_video,
+                "total": escritor.total,
+                "ultimo_offset_s": offset_lote,
+                "concluido": False,
+            })
+
+    try:
+        for msg in chat:
+            try:
+                buffer.append({
+                    "id_video":  id_video,
+                    **campos_horario(epoca_para_us(msg["timestamp"])),
+                    "autor":     msg.get("author", {}).get("name", ""),
+                    "mensagem":  msg.get("message", ""),
+                    "id_mensagem": id_mensagem(msg),
+                })
+                baixadas += 1
+                offset_lote = msg.get("time_in_seconds", offset_lote)
+            except KeyError:
+                continue
+
+            if (len(buffer) >= INTERVALO_GRAVACAO
+                    or time.monotonic() - ultima_gravacao >= INTERVALO_GRAVACAO_S):
+                gravar_lote()
+            if baixadas % INTERVALO_PROGRESSO == 0:
+                print(f"  [{id_video}] {escritor.total} mensagens gravadas…")
+
+        gravar_lote()
+    finally:
+        escritor.fechar()
+
+    total = escritor.total
+    salvar_checkpoint(pasta_dest, {
+        "id_video": id_video,
+        "total": total,
+        "ultimo_offset_s": offset_lote,
+        "concluido": True,
+    })
+
+    segundos = time.monotonic() - t0
+    return {
+        "id_video": id_video,
+        "pasta": pasta_dest,
+        "total": total,
+        "baixadas": baixadas,
+        "segundos": segundos,
+        "msg_por_s": baixadas / segundos if segundos else 0.0,
+        "pico_rss_mb": pico_memoria_mb(),
+        "retomado": bool(inicio_s),
+        "ja_concluido": False,
+    }
 
-    for msg in chat:
+
+def ids_do_canal(canal: str, limite: int = LIMITE_CANAL) -> list[str]:
+    """IDs das lives mais recentes de um canal (ID ``UC…``, ``@handle`` ou URL)."""
+    if canal.startswith("http"):
+        url = canal.rstrip("/")
+    elif canal.startswith("@"):
+        url = f"https://www.youtube.com/{canal}"
+    else:
+        url = f"https://www.youtube.com/channel/{canal}"
+    if not url.endswith("/streams"):
+        url += "/streams"
+
+    opcoes = {"quiet": True, "extract_flat": True, "playlistend": limite}
+    with YoutubeDL(opcoes) as ydl:
+        info = ydl.extract_info(url, download=False)
+    return [e["id"] for e in info.get("entries") or [] if e.get("id")]
+
+
+def montar_lote(args: list[str], arquivo: str | None, canais: list[str],
+                limite: int) -> list[str]:
+    """Junta as entradas, sem IDs repetidos e na ordem em que apareceram."""
+    entradas = list(args)
+    if arquivo:
+        with open(arquivo, encoding="utf-8") as f:
+            entradas += [l.strip() for l in f if l.strip() and not l.startswith("#")]
+    for canal in canais:
         try:
-            seg = normalizar_timestamp(msg["timestamp"])
-            buffer.append({
-                "id_video":  id_video,
-                "timestamp": datetime.fromtimestamp(seg, tz=timezone.utc)
-                              .strftime("%Y-%m-%dT%H:%M:%SZ"),
-                "autor":     msg.get("author", {}).get("name", ""),
-                "mensagem":  msg.get("message", "")
-            })
-            total += 1
-        except KeyError:
+            encontrados = ids_do_canal(canal, limite)
+        except Exception as e:
+            print(f"[aviso] não foi possível listar as lives de {canal}: {e}")
             continue
+        print(f"{canal}: {len(encontrados)} lives encontradas")
+        entradas += encontrados
+
+    lote: dict[str, str] = {}
+    for entrada in entradas:
+        id_video, _ = extrair_id_yt(entrada)
+        lote.setdefault(id_video, entrada)
+    return list(lote.values())
+
+
+def coletar_lote(entradas: list[str], workers: int = WORKERS_PADRAO,
+                 pausa_s: float = PAUSA_ENTRE_INICIOS_S) -> list[dict]:
+    """
+    Baixa os replays em paralelo (``workers`` threads). Os inícios são
+    espaçados em ``pausa_s`` segundos; falhas de um vídeo não param os demais.
+    """
+    trava_inicio = threading.Lock()
+    ultimo_inicio = [0.0]
+
+    def tarefa(entrada: str) -> dict:
+        with trava_inicio:
+            espera = ultimo_inicio[0] + pausa_s - time.monotonic()
+            if espera > 0:
+                time.sleep(espera)
+            ultimo_inicio[0] = time.monotonic()
+        return coletar_replay(entrada)
+
+    # vídeos já concluídos nem entram no pool (e não consomem a pausa)
+    resumos: list[dict] = []
+    pendentes = []
+    for entrada in entradas:
+        id_video, _ = extrair_id_yt(entrada)
+        pasta = localizar_pasta(id_video)
+        ck = ler_checkpoint(pasta) if pasta else {}
+        if ck.get("concluido"):
+            resumos.append({"id_video": id_video, "pasta": pasta, "total": ck.get("total", 0),
+                            "baixadas": 0, "segundos": 0.0, "msg_por_s": 0.0,
+                            "pico_rss_mb": None, "retomado": False, "ja_concluido": True})
+        else:
+            pendentes.append(entrada)
+    if resumos:
+        print(f"  {len(resumos)} vídeos já concluídos, pulados")
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="replay") as pool:
+        futuros = {pool.submit(tarefa, e): e for e in pendentes}
+        for n, fut in enumerate(as_completed(futuros), 1):
+            entrada = futuros[fut]
+            try:
+                r = fut.result()
+            except Exception as e:
+                print(f"✗ [{n}/{len(pendentes)}] {entrada}: {e}")
+                continue
+            resumos.append(r)
+            if not r["ja_concluido"]:
+                print(f"✓ [{n}/{len(pendentes)}] {r['id_video']}: {r['total']} mensagens "
+                      f"em {r['segundos']:.0f}s ({r['msg_por_s']:.0f} msg/s)")
+    return resumos
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Baixa o replay de chat de lives gravadas.")
+    ap.add_argument("videos", nargs="*", help="URLs ou IDs dos vídeos")
+    ap.add_argument("--arquivo", help="arquivo com um URL/ID por linha")
+    ap.add_argument("--canal", action="append", default=[],
+                    help="ID (UC…), @handle ou URL de um canal; pode repetir")
+    ap.add_argument("--limite", type=int, default=LIMITE_CANAL,
+                    help="lives mais recentes por canal (padrão: %(default)s)")
+    ap.add_argument("--workers", type=int, default=WORKERS_PADRAO,
+                    help="downloads simultâneos (padrão: %(default)s)")
+    ap.add_argument("--pausa", type=float, default=PAUSA_ENTRE_INICIOS_S,
+                    help="segundos mínimos entre o início de dois downloads")
+    args = ap.parse_args()
+
+    entradas = montar_lote(args.videos, args.arquivo, args.canal, args.limite)
+    if not entradas:
+        ap.print_usage()
+        sys.exit(1)
 
-        if total % INTERVALO_GRAVACAO == 0:
-            pd.DataFrame(buffer).to_csv(
-                arq_chat,
-                mode="a",
-                index=False,
-                header=not os.path.exists(arq_chat),
-                encoding="utf-8"
-            )
-            buffer.clear()
-            print(f"  {total} mensagens gravadas…")
-
-    if buffer:
-        pd.DataFrame(buffer).to_csv(
-            arq_chat,
-            mode="a",
-            index=False,
-            header=not os.path.exists(arq_chat),
-            encoding="utf-8"
-        )
-
-    print(f"✓ Coleta concluída – {total} mensagens salvas em {arq_chat}")
+    if len(entradas) == 1:
+        r = coletar_replay(entradas[0])
+        if r["ja_concluido"]:
+            return
+        pico = f"{r['pico_rss_mb']:.0f} MB" if r["pico_rss_mb"] is not None else "n/d"
+        print(f"✓ Coleta concluída – {r['total']} mensagens salvas em {r['pasta']}")
+        print(f"  {r['baixadas']} baixadas em {r['segundos']:.1f}s "
+              f"({r['msg_por_s']:.0f} msg/s) | pico de memória: {pico}")
+        return
+
+    print(f"→ {len(entradas)} vídeos no lote, {args.workers} downloads simultâneos")
+    t0 = time.monotonic()
+    resumos = coletar_lote(entradas, args.workers, args.pausa)
+    segundos = time.monotonic() - t0
+
+    feitos = [r for r in resumos if not r["ja_concluido"]]
+    baixadas = sum(r["baixadas"] for r in feitos)
+    pico = pico_memoria_mb()
+    print(f"\n✓ Lote concluído em {segundos:.0f}s")
+    print(f"  baixados: {len(feitos)} | já concluídos: {len(resumos) - len(feitos)} "
+          f"| falhas: {len(entradas) - len(resumos)}")
+    print(f"  {baixadas} mensagens ({baixadas / segundos if segundos else 0:.0f} msg/s no total)"
+          f" | pico de memória: {f'{pico:.0f} MB' if pico is not None else 'n/d'}")
+    cache = cache_metadados()
+    print(f"  metadados: {cache.acertos} do cache, {cache.falhas} consultados no yt-dlp")
 
 
 if __name__ == "__main__":
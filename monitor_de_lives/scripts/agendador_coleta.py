@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+"""
+Agendamento adaptativo das chamadas a ``liveChatMessages().list``.
+
+Regras aplicadas a cada página recebida:
+
+    - respeita sempre o ``pollingIntervalMillis`` devolvido pela API;
+    - página cheia (``maxResults`` itens) com ``nextPageToken`` → drena a
+      próxima página logo em seguida, até ``max_paginas`` por coleta;
+    - página vazia → recua exponencialmente até ``intervalo_max``;
+    - página com mensagens → volta ao ritmo normal (``intervalo_min``).
+
+Também mantém contadores para o log: mensagens/s, páginas por coleta e risco
+estimado de perda (fração de coletas que pararam de drenar com a página ainda
+cheia).
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Dict
+
+
+class AgendadorColeta:
+    """Decide quanto esperar antes da próxima requisição do chat."""
+
+    def __init__(
+        self,
+        tam_pagina: int = 200,
+        intervalo_min: float = 5,
+        intervalo_max: float = 60,
+        fator_recuo: float = 1.5,
+        max_paginas: int = 10,
+    ) -> None:
+        self.tam_pagina = tam_pagina
+        self.intervalo_min = intervalo_min
+        self.intervalo_max = intervalo_max
+        self.fator_recuo = fator_recuo
+        self.max_paginas = max_paginas
+
+        self._inicio = time.monotonic()
+        self._vazias_seguidas = 0
+        self._paginas_coleta = 0
+
+        # Contadores
+        self.mensagens = 0
+        self.paginas = 0
+        self.coletas = 0
+        self.coletas_truncadas = 0
+        self.coleta_encerrada = False
+
+    def registrar_pagina(self, resp: Dict, n_itens: int) -> float:
+        """
+        Registra uma página recebida e devolve quantos segundos esperar antes
+        da próxima requisição. Após a chamada, ``coleta_encerrada`` indica se
+        essa página fechou uma coleta (i.e. não haverá drenagem imediata).
+        """
+        self.mensagens += n_itens
+        self.paginas += 1
+        self._paginas_coleta += 1
+
+        intervalo_api = resp.get("pollingIntervalMillis", 0) / 1000
+        cheia = n_itens >= self.tam_pagina and bool(resp.get("nextPageToken"))
+
+        if cheia and self._paginas_coleta < self.max_paginas:
+            self.coleta_encerrada = False
+            return intervalo_api
+
+        self.coleta_encerrada = True
+        self.coletas += 1
+        self._paginas_coleta = 0
+        if cheia:
+            self.coletas_truncadas += 1
+
+        if n_itens == 0:
+            self._vazias_seguidas += 1
+            espera = self.intervalo_min * self.fator_recuo ** self._vazias_seguidas
+        else:
+            self._vazias_seguidas = 0
+            espera = self.intervalo_min
+
+        return max(intervalo_api, min(espera, self.intervalo_max))
+
+    # Métricas
+    @property
+    def mensagens_por_segundo(self) -> float:
+        return self.mensagens / max(time.monotonic() - self._inicio, 1e-9)
+
+    @property
+    def paginas_por_coleta(self) -> float:
+        return self.paginas / self.coletas if self.coletas else 0.0
+
+    @property
+    def risco_perda(self) -> float:
+        return self.coletas_truncadas / self.coletas if self.coletas else 0.0
+
+    def resumo(self) -> str:
+        return (
+            f"{self.mensagens_por_segundo:.2f} msg/s | "
+            f"{self.paginas_por_coleta:.2f} pág/coleta | "
+            f"risco de perda {self.risco_perda:.1%}"
+        )
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+
+"""
+Agenda de varredura por canal, aprendida com os horários de início das lives.
+
+Em vez de varrer todos os canais no mesmo ritmo (``obter_intervalo``: 10 min
+das 21h à 0h, 60 min no resto do dia), cada canal recebe, para cada hora do
+dia, o seu próprio intervalo entre varreduras:
+
+1. **Aprendizado.** Dos ``dados/metadados/metadados_<id>.json`` (monitor e
+   coletor de replays) saem os inícios de live (``data_inicio_live``) de cada
+   canal (``id_canal``). Para o canal *c* e a hora *h* (hora local), a taxa
+   esperada de inícios por dia é ``w[c][h] = λc · pc(h)``, onde ``λc`` é o
+   número de lives por dia do canal e ``pc`` a distribuição por hora,
+   suavizada com ``SUAVIZACAO`` pseudo-observações do perfil de todos os
+   canais (canais com pouco histórico herdam o perfil geral).
+
+2. **Alocação.** Uma live que começa num trecho varrido a cada ``Δ`` segundos
+   espera, em média, ``Δ/2`` para ser detectada. Minimizar o atraso esperado
+   ``Σ w·Δ/2`` com o gasto ``Σ custo·3600/Δ`` por hora fixo dá frequências
+   proporcionais a ``√w``; o fator é ajustado por bissecção até o custo diário
+   caber em ``orcamento_diario``, com intervalos limitados a
+   ``[intervalo_min, intervalo_max]`` (o teto garante que canais sem
+   histórico continuem sendo vistos).
+
+3. **Uso pelo monitor.** A cada passo, ``devidos`` diz quais canais já estão
+   na hora de varrer; depois da varredura, ``registrar_varredura`` marca a
+   próxima. Novos inícios observados entram com ``registrar_inicio``.
+
+``simulador_varredura.py`` reaplica o histórico e compara atraso × quota com
+o agendamento fixo.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+log = logging.getLogger(__name__)
+
+PASTA_METADADOS = Path(__file__).resolve().parent.parent / "dados" / "metadados"
+
+CUSTO_VARREDURA = 1          # u por canal varrido (playlistItems.list)
+ORCAMENTO_DIARIO = 2_000     # u/dia reservadas à detecção
+INTERVALO_MIN_S = 300        # não varre um canal mais que a cada 5 min
+INTERVALO_MAX_S = 4 * 3600   # e nem menos que a cada 4 h
+SUAVIZACAO = 5.0             # peso do perfil geral na distribuição de cada canal
+DIAS_MIN_HISTORICO = 7       # janela mínima para estimar lives por dia
+HORAS = 24
+
+
+def carregar_inicios(pasta: Path = PASTA_METADADOS) -> Dict[str, List[datetime]]:
+    """
+    ``{id_canal: [início local, …]}`` a partir dos JSONs de metadados.
+    Arquivos antigos, sem ``id_canal``, são atribuídos pelo nome do canal
+    quando outro arquivo do mesmo canal já traz o ID.
+    """
+    registros = []
+    for arq in Path(pasta).glob("metadados_*.json"):
+        try:
+            meta = json.loads(arq.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        if meta.get("data_inicio_live"):
+            registros.append(meta)
+
+    id_por_nome = {m["canal"]: m["id_canal"] for m in registros
+                   if m.get("id_canal") and m.get("canal")}
+    inicios: Dict[str, List[datetime]] = defaultdict(list)
+    for meta in registros:
+        id_canal = meta.get("id_canal") or id_por_nome.get(meta.get("canal", ""))
+        if not id_canal:
+            continue
+        try:
+            inicio = datetime.fromisoformat(meta["data_inicio_live"].replace("Z", "+00:00"))
+        except ValueError:
+            continue
+        inicios[id_canal].append(inicio.astimezone().replace(tzinfo=None))
+    return dict(inicios)
+
+
+class AgendadorVarredura:
+    """Intervalo de varredura por canal e hora do dia, sob um orçamento diário."""
+
+    def __init__(
+        self,
+        orcamento_diario: float = ORCAMENTO_DIARIO,
+        intervalo_min: float = INTERVALO_MIN_S,
+        intervalo_max: float = INTERVALO_MAX_S,
+        custo_varredura: float = CUSTO_VARREDURA,
+        suavizacao: float = SUAVIZACAO,
+    ) -> None:
+        self.orcamento_diario = orcamento_diario
+        self.intervalo_min = intervalo_min
+        self.intervalo_max = intervalo_max
+        self.custo_varredura = custo_varredura
+        self.suavizacao = suavizacao
+
+        self.canais: List[str] = []
+        self._inicios: Dict[str, List[datetime]] = {}
+        self._dias = float(DIAS_MIN_HISTORICO)
+        self.taxas: Dict[str, List[float]] = {}       # inícios/dia por hora
+        self.intervalos: Dict[str, List[float]] = {}  # s entre varreduras por hora
+        self._proxima: Dict[str, datetime] = {}
+        self._desatualizado = True
+
+    # Aprendizado
+    def aprender(self, inicios: Dict[str, List[datetime]], canais: Iterable[str],
+                 agora: datetime | None = None) -> None:
+        """
+        ``inicios`` por canal (mesmas chaves de ``canais``); canais sem
+        histórico entram só com o perfil geral.
+        """
+        agora = agora or datetime.now()
+        self.canais = list(dict.fromkeys(canais))
+        self._inicios = {c: sorted(inicios.get(c, [])) for c in self.canais}
+        todos = [t for ts in self._inicios.values() for t in ts]
+        primeiro = min(todos, default=agora)
+        self._dias = max(DIAS_MIN_HISTORICO, (agora - primeiro).total_seconds() / 86400)
+        self._recalcular()
+
+    def registrar_inicio(self, canal: str, inicio: datetime) -> None:
+        """Nova live observada; o agendamento é refeito na próxima consulta."""
+        self._inicios.setdefault(canal, []).append(inicio)
+        if canal not in self.canais:
+            self.canais.append(canal)
+        self._desatualizado = True
+
+    def _recalcular(self) -> None:
+        geral = [1.0] * HORAS  # pseudo-contagem uniforme: nenhuma hora com peso zero
+        for ts in self._inicios.values():
+            for t in ts:
+                geral[t.hour] += 1
+        soma_geral = sum(geral)
+        perfil_geral = [g / soma_geral for g in geral]
+
+        total_lives = sum(len(ts) for ts in self._inicios.values())
+        lambda_padrao = total_lives / self._dias / max(1, len(self.canais))
+
+        self.taxas = {}
+        for canal in self.canais:
+            ts = self._inicios.get(canal, [])
+            contagem = [0] * HORAS
+            for t in ts:
+                contagem[t.hour] += 1
+            n = len(ts)
+            lam = n / self._dias if n else lambda_padrao
+            self.taxas[canal] = [
+                lam * (contagem[h] + self.suavizacao * perfil_geral[h]) / (n + self.suavizacao)
+                for h in range(HORAS)
+            ]
+        self.intervalos = self._alocar()
+        self._desatualizado = False
+
+    def _alocar(self) -> Dict[str, List[float]]:
+        """Frequências ∝ √taxa, limitadas, com o custo diário no orçamento."""
+        f_min = 3600 / self.intervalo_max   # varreduras por hora
+        f_max = 3600 / self.intervalo_min
+        raizes = {c: [math.sqrt(w) for w in ws] for c, ws in self.taxas.items()}
+
+        def frequencias(k: float) -> Dict[str, List[float]]:
+            return {c: [min(f_max, max(f_min, k * r)) for r in rs] for c, rs in raizes.items()}
+
+        def custo(freqs: Dict[str, List[float]]) -> float:
+            return self.custo_varredura * sum(sum(fs) for fs in freqs.values())
+
+        if custo(frequencias(0)) >= self.orcamento_diario:
+            log.warning("Orçamento de %d u/dia não cobre nem o intervalo máximo.",
+                        self.orcamento_diario)
+            k = 0.0
+        else:
+            baixo, alto = 0.0, 1.0
+            while custo(frequencias(alto)) < self.orcamento_diario and alto < 1e9:
+                alto *= 2
+            for _ in range(60):
+                meio = (baixo + alto) / 2
+                if custo(frequencias(meio)) <= self.orcamento_diario:
+                    baixo = meio
+                else:
+                    alto = meio
+            k = baixo
+        return {c: [3600 / f for f in fs] for c, fs in frequencias(k).items()}
+
+    # Consulta
+    def intervalo(self, canal: str, quando: datetime) -> float:
+        if self._desatualizado:
+            self._recalcular()
+        return self.intervalos.get(canal, [self.intervalo_max] * HORAS)[quando.hour]
+
+    def devidos(self, canais: Iterable[str], agora: datetime) -> List[str]:
+        """Canais cuja próxima varredura já venceu (nunca varridos: todos)."""
+        return [c for c in canais if self._proxima.get(c, agora) <= agora]
+
+    def registrar_varredura(self, canal: str, agora: datetime, fator: float = 1.0) -> None:
+        """
+        Marca a próxima varredura do canal. ``fator`` > 1 estica o intervalo
+        (ex.: ``YouTubeAPIManager.fator_ritmo`` com a quota adiantada); < 1
+        encurta. O resultado fica em ``[intervalo_min, intervalo_max]``: nem
+        abaixo do mínimo, nem além do teto que garante a visita a todo canal.
+        """
+        segundos = min(self.intervalo_max,
+                       max(self.intervalo_min, self.intervalo(canal, agora) * fator))
+        self._proxima[canal] = agora + timedelta(seconds=segundos)
+
+    def segundos_ate_proxima(self, canais: Iterable[str], agora: datetime) -> float:
+        proximas = [self._proxima.get(c, agora) for c in canais]
+        return max(0.0, (min(proximas, default=agora) - agora).total_seconds())
+
+    # Resumo
+    def custo_diario(self) -> float:
+        if self._desatualizado:
+            self._recalcular()
+        return self.custo_varredura * sum(
+            sum(3600 / d for d in ds) for ds in self.intervalos.values()
+        )
+
+    def atraso_esperado(self) -> float:
+        """Atraso médio de detecção previsto (s), ponderado pelas taxas."""
+        if self._desatualizado:
+            self._recalcular()
+        soma_w = sum(sum(ws) for ws in self.taxas.values())
+        if not soma_w:
+            return 0.0
+        return sum(
+            w * d / 2 for c in self.taxas for w, d in zip(self.taxas[c], self.intervalos[c])
+        ) / soma_w
+
+    def resumo(self) -> str:
+        return (f"{len(self.canais)} canais | {self.custo_diario():.0f} u/dia | "
+                f"atraso esperado {self.atraso_esperado() / 60:.1f} min")
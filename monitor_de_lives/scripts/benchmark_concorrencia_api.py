@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark de requisições/s do ``YouTubeAPIManager`` com 1, 4 e 16 threads.
+
+Sobe um servidor HTTP local que imita ``videos.list`` (com latência
+artificial), aponta o gerenciador para ele por meio de um
+``youtube_api_config`` temporário (chaves fictícias, estado de quota num
+diretório temporário) e dispara o mesmo número de requisições com pools de
+threads de tamanhos diferentes.
+
+Para comparação, mede também o modelo antigo: um ``build()`` novo a cada
+requisição, numa única thread.
+
+Uso:
+    python benchmark_concorrencia_api.py [requisicoes] [latencia_ms]
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+WORKERS = (1, 4, 16)
+
+
+class ApiFalsa(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # mantém a conexão aberta (keep-alive)
+    disable_nagle_algorithm = True
+    latencia = 0.02
+
+    def do_GET(self) -> None:
+        time.sleep(self.latencia)
+        corpo = json.dumps({"kind": "youtube#videoListResponse", "items": [{"id": "x"}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def configurar(tmp: Path, porta: int) -> None:
+    """Cria um ``youtube_api_config`` temporário e o coloca no sys.path."""
+    (tmp / "youtube_api_config.py").write_text(
+        "youtube_keys = ['CHAVE_FALSA_1', 'CHAVE_FALSA_2']\n"
+        "try_again_timeout = 1\n"
+        "quota_diaria = 10**9\n"
+        f"arq_estado_quota = {str(tmp / 'quota.json')!r}\n"
+        f"api_endpoint = 'http://127.0.0.1:{porta}/'\n",
+        encoding="utf-8",
+    )
+    sys.path.insert(0, str(tmp))
+
+
+def medir(api, n: int, workers: int) -> float:
+    def uma(_):
+        api.executar_requisicao(lambda c, **kw: c.videos().list(**kw), part="id", id="x")
+
+    uma(None)  # aquece o cliente da thread principal
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(uma, range(n)))
+    return n / (time.perf_counter() - t0)
+
+
+def medir_legado(porta: int, n: int) -> float:
+    from googleapiclient.discovery import build
+
+    opcoes = {"api_endpoint": f"http://127.0.0.1:{porta}/"}
+    t0 = time.perf_counter()
+    for _ in range(n):
+        cli = build("youtube", "v3", developerKey="CHAVE_FALSA_1",
+                    cache_discovery=False, client_options=opcoes)
+        cli.videos().list(part="id", id="x").execute()
+    return n / (time.perf_counter() - t0)
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    ApiFalsa.latencia = (float(sys.argv[2]) if len(sys.argv) > 2 else 20) / 1000
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), ApiFalsa)
+    porta = servidor.server_address[1]
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configurar(Path(tmp), porta)
+        from youtube_api_singleton import YouTubeAPIManager
+
+        api = YouTubeAPIManager()
+        print(f"{n} requisições, latência simulada {ApiFalsa.latencia * 1000:.0f} ms\n")
+        print(f"{'modo':>28} | {'req/s':>8}")
+        print(f"{'build() por requisição (1)':>28} | {medir_legado(porta, max(n // 10, 10)):>8.1f}")
+        for w in WORKERS:
+            print(f"{f'gerenciador, {w} thread(s)':>28} | {medir(api, n, w):>8.1f}")
+        api.quota.sincronizar()
+
+    servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark da gravação do chat por coleta (poll).
+
+Simula coletas sucessivas de 200 mensagens e mede o tempo de cada gravação à
+medida que o ``chat.csv`` cresce, comparando:
+
+    - legado: ``read_csv`` + ``concat`` + ``drop_duplicates`` + reescrita total
+    - incremental: ``EscritorChat`` (append-only com conjunto de IDs)
+
+Uso:
+    python benchmark_escrita_chat.py [coletas] [--sem-legado]
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from escritor_chat import EscritorChat
+
+MSGS_POR_COLETA = 200
+PONTOS_MEDICAO = 10  # quantas linhas a tabela final terá
+
+
+def gerar_lote(inicio: int) -> List[Dict]:
+    return [
+        {
+            "id_video": "VIDEO_TESTE",
+            "timestamp": f"2025-01-01T21:00:00.{i:06d}+00:00",
+            "autor": f"autor_{i % 5000}",
+            "mensagem": f"mensagem de teste número {i}",
+            "id_mensagem": f"MSG{i:012d}",
+        }
+        for i in range(inicio, inicio + MSGS_POR_COLETA)
+    ]
+
+
+def medir_incremental(pasta: Path, coletas: int) -> List[tuple[int, float]]:
+    medicoes = []
+    passo = max(1, coletas // PONTOS_MEDICAO)
+    with EscritorChat(pasta / "chat.csv") as escritor:
+        for n in range(coletas):
+            lote = gerar_lote(n * MSGS_POR_COLETA)
+            t0 = time.perf_counter()
+            escritor.gravar(lote)
+            dt = time.perf_counter() - t0
+            if (n + 1) % passo == 0:
+                medicoes.append((escritor.total, dt * 1000))
+    return medicoes
+
+
+def medir_legado(pasta: Path, coletas: int) -> List[tuple[int, float]]:
+    import pandas as pd
+
+    arq = pasta / "chat.csv"
+    medicoes = []
+    passo = max(1, coletas // PONTOS_MEDICAO)
+    for n in range(coletas):
+        lote = gerar_lote(n * MSGS_POR_COLETA)
+        t0 = time.perf_counter()
+        df_novo = pd.DataFrame(lote)
+        if arq.exists():
+            df_novo = pd.concat([pd.read_csv(arq), df_novo]).drop_duplicates(
+                subset=["timestamp", "autor", "mensagem"]
+            )
+        df_novo.to_csv(arq, index=False, encoding="utf-8")
+        dt = time.perf_counter() - t0
+        if (n + 1) % passo == 0:
+            medicoes.append((len(df_novo), dt * 1000))
+    return medicoes
+
+
+def imprimir(titulo: str, medicoes: List[tuple[int, float]]) -> None:
+    print(f"\n{titulo}")
+    print(f"{'mensagens no arquivo':>22} | {'ms por coleta':>13}")
+    for total, ms in medicoes:
+        print(f"{total:>22,} | {ms:>13.2f}")
+
+
+def main() -> None:
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    coletas = int(args[0]) if args else 1000
+    print(f"{coletas} coletas de {MSGS_POR_COLETA} mensagens")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        imprimir("Incremental (EscritorChat)", medir_incremental(Path(tmp), coletas))
+
+    if "--sem-legado" not in sys.argv:
+        with tempfile.TemporaryDirectory() as tmp:
+            imprimir("Legado (pandas, reescrita total)", medir_legado(Path(tmp), coletas))
+
+
+if __name__ == "__main__":
+    main()
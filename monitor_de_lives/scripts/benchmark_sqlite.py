@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark do banco SQLite de mensagens (``escritor_sqlite``).
+
+Mede a taxa de inserção com lotes do tamanho de uma coleta ao vivo (200) e de
+uma importação (10.000), e a latência mediana de consultas típicas sobre o
+banco resultante. Para comparação, responde "mensagens do autor X em todas as
+lives" também varrendo uma árvore de ``chat.csv`` equivalente.
+
+Uso:
+    python benchmark_sqlite.py [mensagens] [lives]
+"""
+
+from __future__ import annotations
+
+import csv
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from escritor_chat import CAMPOS_CHAT
+from escritor_sqlite import EscritorSQLite, conectar
+
+LOTES = (200, 10_000)
+AUTORES = 20_000
+REPETICOES = 20
+DURACAO_S = 3 * 3600
+
+CONSULTAS = {
+    "mensagens do autor X (todas as lives)":
+        "SELECT m.id_video, m.timestamp, m.mensagem FROM mensagens m "
+        "JOIN autores a USING (id_autor) WHERE a.nome = :autor",
+    "janela de 10 min de uma live":
+        "SELECT timestamp, mensagem FROM mensagens WHERE id_video = :video "
+        "AND timestamp BETWEEN :inicio AND :fim",
+    "top 10 autores de uma live":
+        "SELECT a.nome, COUNT(*) AS n FROM mensagens m JOIN autores a USING (id_autor) "
+        "WHERE m.id_video = :video GROUP BY m.id_autor ORDER BY n DESC LIMIT 10",
+    "mensagens por live":
+        "SELECT id_video, COUNT(*) FROM mensagens GROUP BY id_video",
+}
+
+
+def gerar_live(id_video: str, n: int, base: int) -> List[Dict]:
+    """n mensagens espalhadas por 3 h de live, a partir das 21h."""
+    inicio = datetime(2025, 1, 1, 21, tzinfo=timezone.utc)
+    return [
+        {
+            "id_video": id_video,
+            "timestamp": (inicio + timedelta(seconds=i * DURACAO_S / n))
+                         .strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            "autor": f"autor_{(base + i) * 7919 % AUTORES}",
+            "mensagem": f"mensagem de teste número {i}",
+            "id_mensagem": f"{id_video}-{i:09d}",
+        }
+        for i in range(n)
+    ]
+
+
+def medir_insercao(arq: Path, lives: Dict[str, List[Dict]], lote: int) -> float:
+    t0 = time.perf_counter()
+    n = 0
+    for vid, linhas in lives.items():
+        with EscritorSQLite(arq, {"id_video": vid, "canal": f"canal_{vid[-1]}"}) as esc:
+            for i in range(0, len(linhas), lote):
+                n += esc.gravar(linhas[i:i + lote])
+    return n / (time.perf_counter() - t0)
+
+
+def mediana_ms(func: Callable[[], object], repeticoes: int = REPETICOES) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        func()
+        tempos.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(tempos)
+
+
+def varrer_csvs(raiz: Path, autor: str) -> int:
+    n = 0
+    for arq in raiz.glob("*/chat.csv"):
+        with arq.open(newline="", encoding="utf-8") as fp:
+            n += sum(1 for l in csv.DictReader(fp) if l["autor"] == autor)
+    return n
+
+
+def main() -> None:
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    n_lives = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    por_live = total // n_lives
+    lives = {f"VIDEO{v:06d}": gerar_live(f"VIDEO{v:06d}", por_live, v * por_live)
+             for v in range(n_lives)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        print(f"{por_live * n_lives} mensagens em {n_lives} lives\n")
+        print(f"{'inserção':>40} | {'msg/s':>10}")
+        for lote in LOTES:
+            taxa = medir_insercao(tmp / f"lote{lote}.sqlite3", lives, lote)
+            print(f"{f'lotes de {lote}':>40} | {taxa:>10.0f}")
+
+        con = conectar(tmp / f"lote{LOTES[-1]}.sqlite3")
+        vid = next(iter(lives))
+        params = {"autor": "autor_123", "video": vid,
+                  "inicio": "2025-01-01T21:10:00", "fim": "2025-01-01T21:20:00"}
+        print(f"\n{'consulta':>40} | {'mediana (ms)':>12}")
+        for nome, sql in CONSULTAS.items():
+            n = len(con.execute(sql, params).fetchall())
+            ms = mediana_ms(lambda: con.execute(sql, params).fetchall())
+            print(f"{nome:>40} | {ms:>12.2f}  ({n} linhas)")
+        con.close()
+
+        for vid, linhas in lives.items():
+            (tmp / "csv" / vid).mkdir(parents=True)
+            with (tmp / "csv" / vid / "chat.csv").open("w", newline="", encoding="utf-8") as fp:
+                w = csv.DictWriter(fp, fieldnames=CAMPOS_CHAT)
+                w.writeheader()
+                w.writerows(linhas)
+        ms = mediana_ms(lambda: varrer_csvs(tmp / "csv", params["autor"]), repeticoes=3)
+        print(f"{'autor X varrendo os chat.csv':>40} | {ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+"""
+Cache em disco dos metadados de vídeos, um JSON por ID.
+
+Os arquivos são os mesmos ``dados/metadados/metadados_<id>.json`` que o
+monitor já gravava; cada um ganha a chave ``_cache`` com o estado da live
+quando os metadados foram lidos e o instante da leitura. A validade depende
+do estado:
+
+- ``none`` (live encerrada / vídeo comum): ``TTL_ENCERRADA`` (30 dias);
+- ``live``: ``TTL_AO_VIVO`` (espectadores e likes mudam o tempo todo);
+- ``upcoming``: ``TTL_AGENDADA`` (o horário de início ainda pode mudar).
+
+Usado pelo monitor (``salvar_metadados``) e pelo coletor de replays
+(``coletar_chat_replay.obter_metadados_video``), que assim não refaz a
+consulta ao yt-dlp em cada nova execução sobre o mesmo acervo.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict
+
+TTL_ENCERRADA = 30 * 24 * 3600
+TTL_AO_VIVO = 10 * 60
+TTL_AGENDADA = 30 * 60
+TTL_POR_ESTADO = {"none": TTL_ENCERRADA, "live": TTL_AO_VIVO, "upcoming": TTL_AGENDADA}
+
+PASTA_PADRAO = Path(__file__).resolve().parent.parent / "dados" / "metadados"
+
+
+class CacheMetadados:
+    """Metadados por ``id_video`` com validade conforme o estado da live."""
+
+    def __init__(self, pasta: Path = PASTA_PADRAO) -> None:
+        self.pasta = Path(pasta)
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        self.acertos = 0
+        self.falhas = 0
+
+    def caminho(self, id_video: str) -> Path:
+        return self.pasta / f"metadados_{id_video}.json"
+
+    def obter(self, id_video: str) -> Dict | None:
+        """Metadados ainda válidos do vídeo, ou None (ausente/expirado)."""
+        try:
+            with self.caminho(id_video).open(encoding="utf-8") as fp:
+                dados = json.load(fp)
+        except (OSError, ValueError):
+            self.falhas += 1
+            return None
+
+        controle = dados.pop("_cache", None) or {}
+        ttl = TTL_POR_ESTADO.get(controle.get("estado"), 0)
+        if time.time() - controle.get("salvo_em", 0) > ttl:
+            self.falhas += 1
+            return None
+        self.acertos += 1
+        return dados
+
+    def salvar(self, id_video: str, meta: Dict, estado: str = "none") -> None:
+        """Grava (de forma atômica) os metadados e o estado atual da live."""
+        dados = dict(meta, _cache={"estado": estado, "salvo_em": time.time()})
+        arq = self.caminho(id_video)
+        tmp = arq.with_name(arq.name + ".tmp")
+        with tmp.open("w", encoding="utf-8") as fp:
+            json.dump(dados, fp, ensure_ascii=False, indent=2)
+        os.replace(tmp, arq)
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+
+"""
+Motor de captura de chats em processo único (asyncio).
+
+Alternativa ao modelo "um subprocesso ``capturar_chat.py`` por live": um único
+laço de eventos, rodando numa thread própria, acompanha todos os
+``liveChatId`` ativos ao mesmo tempo. Cada live é uma tarefa asyncio que
+espera o seu próprio ``AgendadorColeta``; as requisições HTTP vão para um
+pool de threads de tamanho fixo e todas usam o mesmo ``YouTubeAPIManager``
+(logo, a mesma rotação de chaves e a mesma quota), que mantém uma conexão
+HTTP reaproveitável por thread do pool. Os escritores de
+cada live (CSV ou Parquet, conforme ``capturar_chat.FORMATO_ARMAZENAMENTO``)
+ficam abertos no motor enquanto a captura durar.
+
+Como no subprocesso, cada live tem uma trava (``travas.py``, com o PID do
+monitor) cujo batimento é renovado a cada coleta e um ``estado_captura.json``
+com o último token; uma tarefa parada pode ser cancelada com ``cancelar`` e
+recriada, continuando do token salvo.
+
+Uso a partir do monitor::
+
+    motor = MotorCapturaAsync()
+    motor.iniciar()
+    motor.adicionar("ID_DO_VIDEO")
+    ...
+    motor.metricas()   # atraso e vazão por live
+    motor.cancelar("ID_DO_VIDEO")   # tarefa travada
+    motor.parar()
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, List
+
+import capturar_chat
+import metricas
+from agendador_coleta import AgendadorColeta
+from estado_captura import EstadoCaptura
+import travas
+
+log = logging.getLogger(__name__)
+
+MAX_REQUISICOES_SIMULTANEAS = 16
+
+ATRASO_COLETA = metricas.histograma(
+    "chat_atraso_coleta_segundos", "Atraso entre o horário previsto e o real de cada coleta")
+
+
+class EstadoStream:
+    """Estado e métricas de uma live acompanhada pelo motor."""
+
+    def __init__(self, id_video: str, id_chat: str, escritor,
+                 agendador: AgendadorColeta, estado: EstadoCaptura) -> None:
+        self.id_video = id_video
+        self.id_chat = id_chat
+        self.escritor = escritor
+        self.agendador = agendador
+        self.estado = estado
+
+        self.coleta_prevista = time.monotonic()
+        self.atraso_coleta = 0.0      # s entre o horário previsto e o real
+        self.atraso_mensagens = 0.0   # s entre publishedAt e a gravação
+
+    def metricas(self) -> Dict:
+        return {
+            "mensagens": self.escritor.total,
+            "msg_por_s": round(self.agendador.mensagens_por_segundo, 2),
+            "paginas_por_coleta": round(self.agendador.paginas_por_coleta, 2),
+            "risco_perda": round(self.agendador.risco_perda, 3),
+            "atraso_coleta_s": round(self.atraso_coleta, 2),
+            "atraso_mensagens_s": round(self.atraso_mensagens, 2),
+            "reinicios": self.estado.reinicios,
+        }
+
+
+class MotorCapturaAsync:
+    """Captura o chat de várias lives num único laço de eventos."""
+
+    def __init__(self, max_requisicoes: int = MAX_REQUISICOES_SIMULTANEAS) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_requisicoes, thread_name_prefix="captura-http"
+        )
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._tarefas: Dict[str, asyncio.Task] = {}
+        self._streams: Dict[str, EstadoStream] = {}
+
+    # Ciclo de vida
+    def iniciar(self) -> None:
+        """Sobe o laço de eventos numa thread daemon."""
+        if self._thread:
+            return
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="captura-async", daemon=True
+        )
+        self._thread.start()
+
+    def parar(self, timeout: float = 10) -> None:
+        """Cancela todas as capturas, fecha os arquivos e encerra o laço."""
+        if not self._loop:
+            return
+        asyncio.run_coroutine_threadsafe(self._cancelar_todas(), self._loop).result(timeout)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        self._executor.shutdown(wait=False)
+        self._loop = self._thread = None
+
+    # API pública (chamada de outras threads)
+    def adicionar(self, id_video: str) -> bool:
+        """Agenda a captura de uma live. Devolve False se ela já estiver ativa."""
+        if id_video in self._tarefas:
+            return False
+        self.iniciar()
+        asyncio.run_coroutine_threadsafe(self._registrar(id_video), self._loop).result()
+        return True
+
+    def cancelar(self, id_video: str, timeout: float = 10) -> bool:
+        """Cancela a captura de uma live (ex.: travada). False se não estava ativa."""
+        tarefa = self._tarefas.get(id_video)
+        if not tarefa or not self._loop:
+            return False
+        self._loop.call_soon_threadsafe(tarefa.cancel)
+        fim = time.monotonic() + timeout
+        while id_video in self._tarefas and time.monotonic() < fim:
+            time.sleep(0.05)
+        return True
+
+    def ativos(self) -> List[str]:
+        return list(self._tarefas)
+
+    def metricas(self) -> Dict[str, Dict]:
+        """Métricas por live (cópia, segura para ler de outra thread)."""
+        return {vid: st.metricas() for vid, st in list(self._streams.items())}
+
+    # Internos (executam no laço de eventos)
+    async def _registrar(self, id_video: str) -> None:
+        tarefa = asyncio.create_task(self._capturar(id_video), name=f"chat-{id_video}")
+        self._tarefas[id_video] = tarefa
+        tarefa.add_done_callback(lambda _t: self._tarefas.pop(id_video, None))
+
+    async def _cancelar_todas(self) -> None:
+        tarefas = list(self._tarefas.values())
+        for t in tarefas:
+            t.cancel()
+        await asyncio.gather(*tarefas, return_exceptions=True)
+
+    async def _em_thread(self, func: Callable, *args):
+        """Executa uma chamada bloqueante à API no pool de threads."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def _capturar(self, id_video: str) -> None:
+        st: EstadoStream | None = None
+        encerrada = False
+        try:
+            id_chat, meta = await self._em_thread(capturar_chat.obter_chat_e_metadados, id_video)
+            if not id_chat:
+                return
+
+            pasta_live = capturar_chat.preparar_pasta_live(id_video, meta)
+            st = EstadoStream(
+                id_video, id_chat,
+                capturar_chat.novo_escritor(pasta_live, meta),
+                capturar_chat.novo_agendador(),
+                EstadoCaptura(pasta_live, id_video, id_chat),
+            )
+            self._streams[id_video] = st
+            if st.estado.retomado:
+                log.info("[async] Retomando a captura de %s (%d mensagens).",
+                         id_video, st.estado.mensagens)
+            log.info("[async] Capturando chat de '%s' (%s)…", meta["titulo"], id_video)
+
+            while True:
+                st.atraso_coleta = max(0.0, time.monotonic() - st.coleta_prevista)
+                ATRASO_COLETA.observar(st.atraso_coleta)
+                resp = await self._em_thread(
+                    partial(capturar_chat.proxima_pagina, id_chat, st.estado)
+                )
+
+                linhas = [
+                    l for l in (capturar_chat.converter_mensagem(it, id_video)
+                                for it in resp["items"]) if l
+                ]
+                if linhas:
+                    capturar_chat.gravar_linhas(st.escritor, linhas, id_video)
+                    st.atraso_mensagens = max(
+                        0.0, time.time() - linhas[-1]["timestamp_us"] / 1e6
+                    )
+
+                capturar_chat.registrar_coleta(st.estado, resp, linhas, st.escritor)
+                if resp.get("offlineAt"):
+                    log.info("[async] Live %s encerrada.", id_video)
+                    encerrada = True
+                    break
+
+                espera = st.agendador.registrar_pagina(resp, len(resp["items"]))
+                st.coleta_prevista = time.monotonic() + espera
+                await asyncio.sleep(espera)
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            log.error("[async] Erro na captura de %s: %s", id_video, exc)
+        finally:
+            if st is not None:
+                st.escritor.fechar()
+                st.estado.confirmar()
+                self._streams.pop(id_video, None)
+            travas.liberar(id_video, encerrada=encerrada)
@@ -4,17 +4,31 @@
 Capturador de chat ao vivo do YouTube.
 
 Recebe o ID do vídeo como argumento, busca o `liveChatId`, grava metadados do
-vídeo em CSV e, a cada 30 s, anexa novas mensagens no arquivo
+vídeo em CSV e anexa novas mensagens no arquivo
 ``dados/<canal>__<data_inicio>__<hora_inicio>__<id_video>/chat.csv``.
 
+O ritmo das coletas é adaptativo (``agendador_coleta.AgendadorColeta``):
+respeita o ``pollingIntervalMillis`` da API, drena páginas cheias em sequência
+e recua quando o chat está parado.
+
+A gravação é incremental (``escritor_chat.EscritorChat``): só as mensagens
+inéditas (pelo ID da API) são anexadas, sem reler o CSV a cada coleta. Com
+``FORMATO_ARMAZENAMENTO = "parquet"`` o chat vai para ``dados/parquet/``
+(particionado por canal/data) e, com ``"sqlite"``, para o banco
+``dados/chat.sqlite3``, em vez de ``chat.csv``.
+
 Pré-requisitos:
     - google-api-python-client
-    - pandas
-    - youtube_api_singleton.py (mesmo diretório) + config.py
+    - youtube_api_singleton.py, escritor_chat.py e agendador_coleta.py
+      (mesmo diretório) + config.py
     - ser chamado pelo monitor ou manualmente:  ``python3 capturar_chat.py <ID>``
 
-O script cria um arquivo-trava em ``dados/chats/trava_<id_video>`` para impedir
-instâncias duplicadas e o remove ao terminar.
+O script assume o arquivo-trava ``dados/chats/trava_<id_video>`` (``travas.py``)
+para impedir instâncias duplicadas, renova o batimento dele a cada coleta e o
+solta ao terminar. O ``nextPageToken`` é salvo após cada coleta em
+``estado_captura.json`` (``estado_captura.py``), mas só avança quando o
+escritor não tem mensagens pendentes: reiniciada depois de uma queda, a
+captura continua do ponto em que tudo já estava em disco.
 """
 
 from __future__ import annotations
@@ -29,12 +43,29 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Tuple
 
-import pandas as pd
-
+from agendador_coleta import AgendadorColeta
+from escritor_chat import criar_escritor
+from estado_captura import EstadoCaptura
+from googleapiclient.errors import HttpError
+from timestamps import campos_horario, iso_para_us
+import metricas
+import travas
 from youtube_api_singleton import YouTubeAPIManager
 
 # CONFIGURAÇÕES
-INTERVALO_COLETA = 30 # segundos
+TAM_PAGINA = 200               # maxResults de liveChatMessages().list
+INTERVALO_COLETA_MIN = 5       # segundos (chat movimentado)
+INTERVALO_COLETA_MAX = 60      # segundos (teto do recuo em chat parado)
+MAX_PAGINAS_POR_COLETA = 10    # páginas drenadas em sequência por coleta
+FORMATO_ARMAZENAMENTO = "csv"  # "csv", "parquet" ou "sqlite"
+
+# Códigos de saída (o supervisor do monitor só reinicia nos demais)
+SAIDA_LIVE_ENCERRADA = 0
+SAIDA_ERRO = 1
+SAIDA_SEM_CHAT = 2
+SAIDA_JA_CAPTURANDO = 3
+
+INTERVALO_METRICAS_S = 15      # instantâneo das métricas para o /metrics do monitor
 
 logging.basicConfig(
     level=logging.INFO,
@@ -45,6 +76,15 @@ log = logging.getLogger(__name__)
 
 api_manager = YouTubeAPIManager.obter_instancia()
 
+MENSAGENS = metricas.contador(
+    "chat_mensagens_total", "Mensagens novas gravadas, por live", ("id_video",))
+ATRASO = metricas.medidor(
+    "chat_atraso_segundos", "Idade da mensagem mais recente ao ser gravada", ("id_video",))
+ATRASO_HIST = metricas.histograma(
+    "chat_atraso_mensagens_segundos", "Idade das mensagens mais recentes de cada coleta")
+ESCRITA = metricas.histograma(
+    "chat_escrita_segundos", "Duração da gravação de um lote", ("formato",))
+
 # FUNÇÕES AUXILIARES
 def slugify(texto: str) -> str:
     """Remove acentos e caracteres proibidos para usar em nomes de pasta."""
@@ -63,18 +103,6 @@ def split_iso_datetime(iso_str: str) -> Tuple[str, str]:
         return iso_str[:10], iso_str[11:19].replace(":", "-")
 
 
-def caminho_trava(id_video: str) -> Path:
-    return Path("dados") / "chats" / f"trava_{id_video}"
-
-
-def remover_trava(id_video: str) -> None:
-    """Exclui o arquivo-trava (usado pelo monitor)."""
-    try:
-        caminho_trava(id_video).unlink(missing_ok=True)
-    except Exception as exc:  # pragma: no cover
-        log.warning("Erro ao remover trava: %s", exc)
-
-
 # CHAMADAS À API / METADADOS
 def obter_chat_e_metadados(id_video: str) -> Tuple[str | None, Dict | None]:
     """Retorna (liveChatId, metadados) ou (None, None) se não achar/live offline."""
@@ -100,6 +128,7 @@ def obter_chat_e_metadados(id_video: str) -> Tuple[str | None, Dict | None]:
     "titulo"             : item["snippet"].get("title", ""),
     "descricao"          : item["snippet"].get("description", ""),
     "canal"              : item["snippet"].get("channelTitle", ""),
+    "id_canal"           : item["snippet"].get("channelId", ""),
     "data_publicacao"    : item["snippet"].get("publishedAt", ""),
     "data_inicio_live"   : detalhes.get("actualStartTime", ""),
     "espectadores_atuais": detalhes.get("concurrentViewers", ""),
@@ -110,88 +139,182 @@ def obter_chat_e_metadados(id_video: str) -> Tuple[str | None, Dict | None]:
     return id_chat, meta
 
 
-# MAIN
-def main() -> None:
-    if len(sys.argv) < 2:
-        log.error("Uso: python3 capturar_chat.py <ID_VIDEO>")
-        sys.exit(1)
+def requisitar_mensagens(id_chat: str, token: str | None) -> Dict:
+    """Busca uma página de ``liveChatMessages`` a partir do token informado."""
+    return api_manager.executar_requisicao(
+        lambda cli, **kw: cli.liveChatMessages().list(**kw),
+        liveChatId=id_chat,
+        part="snippet,authorDetails",
+        maxResults=TAM_PAGINA,
+        pageToken=token,
+    )
+
+
+def proxima_pagina(id_chat: str, estado: EstadoCaptura) -> Dict:
+    """
+    Página seguinte ao token do estado. Numa captura retomada, se a API
+    recusar o token salvo, recomeça sem ele (o escritor descarta as repetidas).
+    """
+    try:
+        return requisitar_mensagens(id_chat, estado.proximo_token)
+    except HttpError as exc:
+        if not (estado.retomado and estado.paginas_sessao == 0 and exc.resp.status == 400):
+            raise
+        log.warning("Token salvo de %s recusado pela API; recomeçando sem ele.", estado.id_video)
+        metricas.evento("token_recusado", id_video=estado.id_video)
+        estado.descartar_token()
+        return requisitar_mensagens(id_chat, None)
+
+
+def gravar_linhas(escritor, linhas: List[Dict], id_video: str) -> int:
+    """Grava o lote e alimenta as métricas. Devolve as mensagens novas."""
+    with ESCRITA.cronometrar(formato=FORMATO_ARMAZENAMENTO):
+        novas = escritor.gravar(linhas)
+    MENSAGENS.inc(novas, id_video=id_video)
+    atraso = max(0.0, time.time() - linhas[-1]["timestamp_us"] / 1e6)
+    ATRASO.definir(round(atraso, 3), id_video=id_video)
+    ATRASO_HIST.observar(atraso)
+    return novas
+
+
+def registrar_coleta(estado: EstadoCaptura, resp: Dict, linhas: List[Dict], escritor) -> None:
+    """Persiste o estado da captura e renova o batimento da trava."""
+    estado.registrar(resp, linhas, escritor.total, confirmado=escritor.pendentes == 0)
+    travas.bater(estado.id_video)
+
+
+def converter_mensagem(item: Dict, id_video: str) -> Dict | None:
+    """Converte um item da API em linha do ``chat.csv`` (None se não houver texto)."""
+    texto = item["snippet"].get("displayMessage")
+    if not texto:
+        return None
+    return {
+        "id_video": id_video,
+        **campos_horario(iso_para_us(item["snippet"]["publishedAt"])),
+        "autor": item["authorDetails"]["displayName"],
+        "mensagem": texto,
+        "id_mensagem": item["id"],
+    }
 
-    id_video = sys.argv[1]
-    id_chat, meta = obter_chat_e_metadados(id_video)
-    if not id_chat:
-        sys.exit(1)
 
-    # Diretório de saída
+# SAÍDA
+def preparar_pasta_live(id_video: str, meta: Dict) -> Path:
+    """Cria a pasta da live, grava ``metadados.csv`` e devolve o caminho."""
     data_fmt, hora_fmt = split_iso_datetime(meta["data_inicio_live"])
     pasta_live = (
         Path("dados")
         / f"{slugify(meta['canal'])}__{data_fmt}__{hora_fmt}__{id_video}"
     )
     pasta_live.mkdir(parents=True, exist_ok=True)
-    arq_chat = pasta_live / "chat.csv"
-    arq_meta = pasta_live / "metadados.csv"
 
-    # Salva metadados
-    with arq_meta.open("w", newline="", encoding="utf-8") as fp:
+    with (pasta_live / "metadados.csv").open("w", newline="", encoding="utf-8") as fp:
         writer = csv.DictWriter(fp, fieldnames=meta.keys())
         writer.writeheader()      # grava o cabeçalho
         writer.writerow(meta)     # grava a linha de dados
+    return pasta_live
+
+
+def novo_escritor(pasta_live: Path, meta: Dict):
+    """Escritor do chat no formato configurado (``FORMATO_ARMAZENAMENTO``)."""
+    return criar_escritor(FORMATO_ARMAZENAMENTO, pasta_live, meta)
+
+
+def novo_agendador() -> AgendadorColeta:
+    return AgendadorColeta(
+        tam_pagina=TAM_PAGINA,
+        intervalo_min=INTERVALO_COLETA_MIN,
+        intervalo_max=INTERVALO_COLETA_MAX,
+        max_paginas=MAX_PAGINAS_POR_COLETA,
+    )
+
+
+# MAIN
+def main() -> None:
+    if len(sys.argv) < 2:
+        log.error("Uso: python3 capturar_chat.py <ID_VIDEO>")
+        sys.exit(1)
 
+    id_video = sys.argv[1]
+    metricas.configurar_eventos(metricas.PASTA_DADOS / "logs")
+    # a trava passa a ser deste processo (o monitor só a reserva com o nosso PID)
+    if not travas.adquirir(id_video):
+        log.error("O chat de %s já está sendo capturado por outro processo.", id_video)
+        sys.exit(SAIDA_JA_CAPTURANDO)
 
-    log.info("Capturando chat de '%s' (%s)…", meta["titulo"], id_video)
-    mensagens: List[Dict] = []
-    proximo_token: str | None = None
+    encerrada = False
+    try:
+        id_chat, meta = obter_chat_e_metadados(id_video)
+        if not id_chat:
+            sys.exit(SAIDA_SEM_CHAT)
+
+        # Diretório de saída
+        pasta_live = preparar_pasta_live(id_video, meta)
+        estado = EstadoCaptura(pasta_live, id_video, id_chat)
+        if estado.retomado:
+            log.info("Retomando a captura de %s (%d mensagens, reinício nº %d).",
+                     id_video, estado.mensagens, estado.reinicios)
+        metricas.evento("captura_iniciada", id_video=id_video,
+                        retomada=estado.retomado, reinicios=estado.reinicios)
+
+        log.info("Capturando chat de '%s' (%s)…", meta["titulo"], id_video)
+        escritor = novo_escritor(pasta_live, meta)
+        encerrada = capturar(id_chat, id_video, estado, escritor)
+    finally:
+        travas.liberar(id_video, encerrada=encerrada)
+        metricas.evento("captura_finalizada", id_video=id_video, live_encerrada=encerrada)
+    sys.exit(SAIDA_LIVE_ENCERRADA if encerrada else SAIDA_ERRO)
+
+
+def capturar(id_chat: str, id_video: str, estado: EstadoCaptura, escritor) -> bool:
+    """Laço de coleta. Devolve True se a live terminou (``offlineAt``)."""
+    agendador = novo_agendador()
     msgs_sem_texto = 0
+    arq_metricas = metricas.PASTA_INSTANTANEOS / f"captura_{id_video}.json"
+    ultimo_instantaneo = 0.0
 
     try:
         while True:
-            resp = api_manager.executar_requisicao(
-                lambda cli, **kw: cli.liveChatMessages().list(**kw),
-                liveChatId=id_chat,
-                part="snippet,authorDetails",
-                maxResults=200,
-                pageToken=proximo_token,
-            )
+            resp = proxima_pagina(id_chat, estado)
 
+            mensagens: List[Dict] = []
             for item in resp["items"]:
-                texto = item["snippet"].get("displayMessage")
-                if texto:
-                    mensagens.append(
-                        {
-                            "id_video": id_video,
-                            "timestamp": item["snippet"]["publishedAt"],
-                            "autor": item["authorDetails"]["displayName"],
-                            "mensagem": texto,
-                        }
-                    )
+                linha = converter_mensagem(item, id_video)
+                if linha:
+                    mensagens.append(linha)
                 else:
                     msgs_sem_texto += 1
 
             # Salva lote a cada iteração
             if mensagens:
-                df_novo = pd.DataFrame(mensagens)
-                if arq_chat.exists():
-                    df_novo = pd.concat([pd.read_csv(arq_chat), df_novo]).drop_duplicates(
-                        subset=["timestamp", "autor", "mensagem"]
-                    )
-                df_novo.to_csv(arq_chat, index=False, encoding="utf-8")
-                log.info("Mensagens acumuladas: %d", len(df_novo))
-                mensagens.clear()
-
-            proximo_token = resp.get("nextPageToken")
-
-            if msgs_sem_texto:
-                log.debug("%d mensagens sem texto ignoradas.", msgs_sem_texto)
-                msgs_sem_texto = 0
-
-            time.sleep(INTERVALO_COLETA)
+                novas = gravar_linhas(escritor, mensagens, id_video)
+                log.info("Mensagens novas: %d | acumuladas: %d", novas, escritor.total)
+            registrar_coleta(estado, resp, mensagens, escritor)
+            if time.monotonic() - ultimo_instantaneo >= INTERVALO_METRICAS_S:
+                metricas.REGISTRO.salvar(arq_metricas)
+                ultimo_instantaneo = time.monotonic()
+
+            if resp.get("offlineAt"):
+                log.info("Live encerrada em %s.", resp["offlineAt"])
+                return True
+
+            espera = agendador.registrar_pagina(resp, len(resp["items"]))
+            if agendador.coleta_encerrada:
+                if msgs_sem_texto:
+                    log.debug("%d mensagens sem texto ignoradas.", msgs_sem_texto)
+                    msgs_sem_texto = 0
+                log.info("%s | próxima coleta em %.1fs", agendador.resumo(), espera)
+
+            time.sleep(espera)
 
     except KeyboardInterrupt:
         log.info("Captura interrompida pelo usuário.")
     except Exception as exc: # pragma: no cover
         log.error("Erro durante a captura: %s", exc)
     finally:
-        remover_trava(id_video)
+        escritor.fechar()
+        estado.confirmar()
+        metricas.REGISTRO.salvar(arq_metricas)
+    return False
 
 
 if __name__ == "__main__":
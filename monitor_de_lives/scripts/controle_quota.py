@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+
+"""
+Contabilidade de quota da YouTube Data API por chave.
+
+A quota de cada chave (10.000 u/dia por padrão) renova à meia-noite do
+horário do Pacífico. O ``ControleQuota`` conhece o custo de cada endpoint,
+soma o gasto de cada chave no dia corrente e escolhe, antes de cada
+requisição, a chave com mais folga.
+
+O estado é persistido em JSON (por padrão ``dados/quota_estado.json``). Como
+monitor e capturadores rodam em processos diferentes, cada processo grava
+apenas o que gastou desde a última gravação, somando ao que está no arquivo
+sob ``flock``; assim o arquivo reflete o gasto de todos os processos.
+Dentro de um mesmo processo, os métodos públicos são protegidos por uma trava
+e podem ser chamados de várias threads.
+As chaves não são gravadas em disco, só um resumo (hash) de cada uma.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+from zoneinfo import ZoneInfo
+
+logger = logging.getLogger(__name__)
+
+FUSO_QUOTA = ZoneInfo("America/Los_Angeles")
+QUOTA_DIARIA = 10_000
+INTERVALO_PERSISTENCIA = 10  # segundos entre gravações do estado
+
+# Custo em unidades por método (``HttpRequest.methodId``), conforme a
+# calculadora de quota da API. Métodos ausentes custam ``CUSTO_PADRAO``.
+CUSTO_ENDPOINT: Dict[str, int] = {
+    "youtube.search.list": 100,
+    "youtube.videos.list": 1,
+    "youtube.channels.list": 1,
+    "youtube.playlistItems.list": 1,
+    "youtube.commentThreads.list": 1,
+    "youtube.comments.list": 1,
+    "youtube.liveChatMessages.list": 5,
+}
+CUSTO_PADRAO = 1
+# Resposta 304 (Not Modified) a uma requisição com ``If-None-Match``: a API
+# cobra toda requisição, mesmo as que não devolvem dados, então conta como uma
+# leitura de 1 u. Único modelo usado pelo livro-razão (``YouTubeAPIManager``),
+# pelo ``DetectorLives.unidades`` e pelo ``simulador_quota``.
+CUSTO_304 = 1
+
+
+class QuotaEsgotadaError(RuntimeError):
+    """Todas as chaves atingiram a quota diária."""
+
+
+def custo_metodo(id_metodo: str | None) -> int:
+    return CUSTO_ENDPOINT.get(id_metodo or "", CUSTO_PADRAO)
+
+
+def dia_quota(agora: datetime | None = None) -> str:
+    """Data (YYYY-MM-DD) do dia de quota corrente, no fuso do Pacífico."""
+    return (agora or datetime.now(FUSO_QUOTA)).astimezone(FUSO_QUOTA).strftime("%Y-%m-%d")
+
+
+def segundos_ate_renovacao(agora: datetime | None = None) -> float:
+    agora = (agora or datetime.now(FUSO_QUOTA)).astimezone(FUSO_QUOTA)
+    meia_noite = (agora + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (meia_noite - agora).total_seconds()
+
+
+def _resumo_chave(chave: str) -> str:
+    return hashlib.sha256(chave.encode("utf-8")).hexdigest()[:12]
+
+
+class ControleQuota:
+    """Livro-razão de quota por chave, por dia do Pacífico."""
+
+    def __init__(self, chaves: List[str], arq_estado: Path,
+                 quota_diaria: int = QUOTA_DIARIA) -> None:
+        self._ids = [_resumo_chave(c) for c in chaves]
+        self.arq_estado = Path(arq_estado)
+        self.quota_diaria = quota_diaria
+
+        self._dia = dia_quota()
+        self._gasto: Dict[str, int] = {i: 0 for i in self._ids}
+        self._esgotadas: set[str] = set()
+        self._pendente: Dict[str, int] = {}
+        self._ultima_gravacao = 0.0
+        self._trava = threading.RLock()
+        self.sincronizar()
+
+    # Persistência
+    def sincronizar(self) -> None:
+        """Soma o gasto pendente ao arquivo e recarrega o total de todos os processos."""
+        with self._trava:
+            self._sincronizar()
+
+    def _sincronizar(self) -> None:
+        self._virar_dia_se_preciso()
+        self.arq_estado.parent.mkdir(parents=True, exist_ok=True)
+        with self.arq_estado.with_suffix(".lock").open("w") as trava:
+            fcntl.flock(trava, fcntl.LOCK_EX)
+            estado = self._ler_estado()
+            if estado.get("dia") != self._dia:
+                estado = {"dia": self._dia, "gasto": {}, "esgotadas": []}
+
+            gasto = estado["gasto"]
+            for chave, unidades in self._pendente.items():
+                gasto[chave] = gasto.get(chave, 0) + unidades
+            esgotadas = set(estado["esgotadas"]) | self._esgotadas
+            estado["esgotadas"] = sorted(esgotadas)
+
+            tmp = self.arq_estado.with_suffix(".tmp")
+            tmp.write_text(json.dumps(estado, indent=2), encoding="utf-8")
+            tmp.replace(self.arq_estado)
+
+        self._pendente.clear()
+        self._gasto = {i: gasto.get(i, 0) for i in self._ids}
+        self._esgotadas = esgotadas & set(self._ids)
+        self._ultima_gravacao = time.monotonic()
+
+    def _ler_estado(self) -> Dict:
+        try:
+            return json.loads(self.arq_estado.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _virar_dia_se_preciso(self) -> None:
+        hoje = dia_quota()
+        if hoje != self._dia:
+            logger.info("Novo dia de quota (%s): contadores zerados.", hoje)
+            self._dia = hoje
+            self._gasto = {i: 0 for i in self._ids}
+            self._esgotadas.clear()
+            self._pendente.clear()
+
+    # Consulta / escolha de chave
+    def id_chave(self, idx: int) -> str:
+        """Identificador da chave (hash curto) para logs e métricas."""
+        return self._ids[idx]
+
+    def folga(self, idx: int) -> int:
+        chave = self._ids[idx]
+        if chave in self._esgotadas:
+            return 0
+        return max(0, self.quota_diaria - self._gasto[chave])
+
+    def escolher_chave(self, custo: int) -> int:
+        """Índice da chave com mais folga que comporte ``custo`` unidades."""
+        with self._trava:
+            self._virar_dia_se_preciso()
+            idx = max(range(len(self._ids)), key=self.folga)
+            if self.folga(idx) < custo:
+                raise QuotaEsgotadaError(
+                    f"Todas as {len(self._ids)} chaves sem quota; renova em "
+                    f"{segundos_ate_renovacao() / 3600:.1f} h."
+                )
+            return idx
+
+    # Registro
+    def registrar(self, idx: int, custo: int) -> None:
+        chave = self._ids[idx]
+        with self._trava:
+            self._gasto[chave] += custo
+            self._pendente[chave] = self._pendente.get(chave, 0) + custo
+            if time.monotonic() - self._ultima_gravacao >= INTERVALO_PERSISTENCIA:
+                self._sincronizar()
+
+    def marcar_esgotada(self, idx: int) -> None:
+        """Chamado quando a API responde ``quotaExceeded`` para a chave."""
+        with self._trava:
+            self._esgotadas.add(self._ids[idx])
+            self._sincronizar()
+
+    # Orçamento
+    def restante(self) -> int:
+        """Unidades ainda disponíveis hoje, somando todas as chaves."""
+        with self._trava:
+            self._virar_dia_se_preciso()
+            return sum(self.folga(i) for i in range(len(self._ids)))
+
+    def total(self) -> int:
+        return self.quota_diaria * len(self._ids)
+
+    def fator_ritmo(self, minimo: float = 0.5, maximo: float = 4.0) -> float:
+        """
+        Razão entre a fração do orçamento já gasta e a fração do dia de quota
+        já decorrida. Acima de 1 o consumo está adiantado (convém espaçar as
+        varreduras); abaixo de 1 há folga para varrer mais vezes.
+        """
+        total = self.total()
+        if not total:
+            return maximo
+        gasto = 1 - self.restante() / total
+        decorrido = 1 - segundos_ate_renovacao() / 86_400
+        fator = gasto / max(decorrido, 1 / 24)
+        return min(maximo, max(minimo, fator))
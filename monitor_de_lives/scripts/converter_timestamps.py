@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+"""
+Conversão única das coletas antigas para o horário canônico (``timestamps.py``).
+
+- ``chat.csv`` de cada pasta em ``--dados``: acrescenta a coluna
+  ``timestamp_us`` (o texto de ``timestamp`` é mantido como está). O arquivo é
+  reescrito em fluxo num temporário e trocado de forma atômica; pastas já
+  convertidas são puladas.
+- ``--banco``: aplica a migração do SQLite (``ALTER TABLE``) e preenche
+  ``timestamp_us`` nas mensagens que ainda não o têm.
+- ``--parquet``: reescreve os arquivos sem ``timestamp_us`` (requer pyarrow).
+
+Uso:
+    python converter_timestamps.py [--dados PASTA ...] [--banco dados/chat.sqlite3]
+        [--parquet dados/parquet]
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import sys
+from pathlib import Path
+
+from escritor_sqlite import conectar
+from timestamps import iso_para_us
+
+PASTA_DADOS = Path(__file__).resolve().parent.parent / "dados"
+LOTE_SQLITE = 50_000
+
+csv.field_size_limit(sys.maxsize)
+
+
+def _us(texto: str) -> int | None:
+    try:
+        return iso_para_us(texto)
+    except (ValueError, AttributeError):
+        return None
+
+
+def converter_csv(arq_chat: Path) -> int | None:
+    """Acrescenta ``timestamp_us`` ao CSV. Devolve as linhas, ou None se já tinha."""
+    tmp = arq_chat.with_name(arq_chat.name + ".tmp")
+    with arq_chat.open(newline="", encoding="utf-8") as ent:
+        leitor = csv.reader(ent)
+        cabecalho = next(leitor, [])
+        if "timestamp_us" in cabecalho or "timestamp" not in cabecalho:
+            return None
+        i_ts = cabecalho.index("timestamp")
+        n = 0
+        with tmp.open("w", newline="", encoding="utf-8") as sai:
+            escritor = csv.writer(sai)
+            escritor.writerow(cabecalho + ["timestamp_us"])
+            for linha in leitor:
+                us = _us(linha[i_ts]) if len(linha) > i_ts else None
+                escritor.writerow(linha + ["" if us is None else us])
+                n += 1
+    os.replace(tmp, arq_chat)
+    return n
+
+
+def converter_sqlite(arq_banco: Path) -> int:
+    """Migra o banco e preenche ``timestamp_us``. Devolve as linhas preenchidas."""
+    con = conectar(arq_banco)
+    total = 0
+    ultimo = 0
+    while True:
+        linhas = con.execute(
+            "SELECT id, timestamp FROM mensagens WHERE timestamp_us IS NULL AND id > ? "
+            "ORDER BY id LIMIT ?", (ultimo, LOTE_SQLITE),
+        ).fetchall()
+        if not linhas:
+            break
+        ultimo = linhas[-1][0]
+        with con:
+            con.executemany(
+                "UPDATE mensagens SET timestamp_us = ? WHERE id = ?",
+                [(us, i) for i, ts in linhas if (us := _us(ts)) is not None],
+            )
+        total += len(linhas)
+    con.close()
+    return total
+
+
+def converter_parquet(raiz: Path) -> int:
+    """Reescreve os arquivos Parquet sem ``timestamp_us``. Devolve quantos."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    n = 0
+    for arq in sorted(raiz.rglob("*.parquet")):
+        if arq.name.startswith("_") or "timestamp_us" in pq.read_schema(arq).names:
+            continue
+        tabela = pq.read_table(arq, partitioning=None)
+        ts = pc.cast(tabela.column("timestamp"), pa.timestamp("us", tz="UTC"), safe=False)
+        tabela = tabela.append_column("timestamp_us", ts.cast(pa.int64()))
+        tmp = arq.with_name("_" + arq.name + ".tmp")
+        pq.write_table(tabela, tmp, compression="zstd", use_dictionary=["autor", "id_video"])
+        os.replace(tmp, arq)
+        n += 1
+    return n
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Acrescenta timestamp_us às coletas antigas.")
+    ap.add_argument("--dados", nargs="*", type=Path, default=[PASTA_DADOS],
+                    help="pastas com as subpastas de cada live")
+    ap.add_argument("--banco", type=Path, help="banco SQLite a migrar")
+    ap.add_argument("--parquet", type=Path, help="raiz do armazenamento Parquet")
+    args = ap.parse_args()
+
+    for raiz in args.dados:
+        for arq in sorted(raiz.glob("*/chat.csv")):
+            n = converter_csv(arq)
+            print(f"{arq.parent.name}: {'já convertido' if n is None else f'{n} linhas'}")
+    if args.banco:
+        print(f"SQLite: {converter_sqlite(args.banco)} mensagens preenchidas")
+    if args.parquet:
+        print(f"Parquet: {converter_parquet(args.parquet)} arquivos reescritos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+
+"""
+Detecção de lives em lote, sem ``search.list``.
+
+Para cada canal:
+    1. lê a playlist de uploads (``UU…``) com ``playlistItems.list`` (1 u),
+       enviando ``If-None-Match`` com o ETag da última leitura; se a playlist
+       não mudou a API responde 304 e os IDs em cache são reaproveitados;
+    2. junta os vídeos recentes de todos os canais que ainda podem estar
+       (ou vir a estar) ao vivo e consulta ``videos.list`` com até 50 IDs por
+       chamada (1 u cada, via ``status_videos.consultar_videos``), olhando
+       ``liveBroadcastContent``.
+
+O monitor usa as duas etapas separadamente (``candidatos`` e ``classificar``)
+para juntar, na mesma consulta em lote, os candidatos e as lives já em
+captura; ``detectar`` faz tudo de uma vez.
+
+Vídeos que já terminaram (``actualEndTime``) ou que nunca foram lives são
+marcados como encerrados no cache e não voltam a ser consultados.
+
+O cache fica em ``dados/cache_detector.json`` e guarda, por canal, a playlist
+de uploads, o ETag, os IDs recentes e os vídeos já encerrados.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from googleapiclient.errors import HttpError
+
+from controle_quota import CUSTO_304
+from status_videos import chamadas_necessarias, consultar_videos
+from youtube_api_singleton import YouTubeAPIManager
+
+log = logging.getLogger(__name__)
+
+ITENS_POR_CANAL = 5   # vídeos mais recentes da playlist de uploads
+
+RE_ID_CANAL = re.compile(r"UC[A-Za-z0-9_-]{22}")
+RE_HANDLE = re.compile(r"@[A-Za-z0-9._-]+")
+
+
+def extrair_id_canal(linha: str) -> str:
+    """Aceita ID ``UC…``, URL ``/channel/UC…`` ou handle (``@nome``/URL)."""
+    m = RE_ID_CANAL.search(linha)
+    if m:
+        return m.group(0)
+    m = RE_HANDLE.search(linha)
+    return m.group(0) if m else linha.strip()
+
+
+class DetectorLives:
+    """Descobre quais canais estão ao vivo gastando ~1 u por canal."""
+
+    def __init__(self, api_manager: YouTubeAPIManager, arq_cache: Path,
+                 itens_por_canal: int = ITENS_POR_CANAL) -> None:
+        self.api = api_manager
+        self.arq_cache = Path(arq_cache)
+        self.itens_por_canal = itens_por_canal
+        self._cache: Dict[str, Dict] = self._carregar_cache()
+        self.zerar_contadores()
+
+    # Cache
+    def _carregar_cache(self) -> Dict[str, Dict]:
+        if not self.arq_cache.exists():
+            return {}
+        try:
+            return json.loads(self.arq_cache.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            log.warning("Cache do detector ilegível (%s); recomeçando.", exc)
+            return {}
+
+    def salvar_cache(self) -> None:
+        tmp = self.arq_cache.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._cache, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(self.arq_cache)
+
+    # Contadores de quota
+    def zerar_contadores(self) -> None:
+        self.q_canais = 0          # channels.list (resolução de handles)
+        self.q_playlists = 0       # playlistItems.list com resposta 200
+        self.q_nao_modificadas = 0 # playlistItems.list com resposta 304
+        self.q_videos = 0          # videos.list
+
+    @property
+    def unidades(self) -> int:
+        """Unidades estimadas desde o último ``zerar_contadores``."""
+        return (self.q_canais + self.q_playlists + self.q_videos
+                + self.q_nao_modificadas * CUSTO_304)
+
+    # Internos
+    def _playlist_uploads(self, canal: str) -> str | None:
+        entrada = self._cache.setdefault(canal, {})
+        if entrada.get("playlist"):
+            return entrada["playlist"]
+
+        id_canal = extrair_id_canal(canal)
+        if id_canal.startswith("UC"):
+            entrada["playlist"] = "UU" + id_canal[2:]
+            return entrada["playlist"]
+
+        # Handle: uma chamada a channels.list (1 u), feita uma única vez.
+        self.q_canais += 1
+        resp = self.api.executar_requisicao(
+            lambda c, **kw: c.channels().list(**kw),
+            part="contentDetails",
+            forHandle=id_canal,
+        )
+        itens = resp.get("items")
+        if not itens:
+            log.warning("Canal %s não encontrado.", canal)
+            return None
+        entrada["playlist"] = itens[0]["contentDetails"]["relatedPlaylists"]["uploads"]
+        return entrada["playlist"]
+
+    def _videos_recentes(self, canal: str) -> List[str]:
+        playlist = self._playlist_uploads(canal)
+        if not playlist:
+            return []
+        entrada = self._cache[canal]
+        etag = entrada.get("etag")
+
+        def requisicao(c, **kw):
+            req = c.playlistItems().list(**kw)
+            if etag:
+                req.headers["If-None-Match"] = etag
+            return req
+
+        try:
+            resp = self.api.executar_requisicao(
+                requisicao,
+                part="contentDetails",
+                playlistId=playlist,
+                maxResults=self.itens_por_canal,
+            )
+        except HttpError as exc:
+            if exc.resp.status == 304:
+                self.q_nao_modificadas += 1
+                return entrada.get("videos", [])
+            if exc.resp.status == 404:
+                log.warning("Playlist de uploads de %s não encontrada.", canal)
+                return []
+            raise
+
+        self.q_playlists += 1
+        entrada["etag"] = resp.get("etag")
+        entrada["videos"] = [it["contentDetails"]["videoId"] for it in resp.get("items", [])]
+        return entrada["videos"]
+
+    # API pública
+    def id_canal(self, canal: str) -> str | None:
+        """ID ``UC…`` do canal (de handles, só depois da primeira varredura)."""
+        playlist = self._cache.get(canal, {}).get("playlist") or ""
+        if playlist.startswith("UU"):
+            return "UC" + playlist[2:]
+        id_canal = extrair_id_canal(canal)
+        return id_canal if id_canal.startswith("UC") else None
+
+    def candidatos(self, canais: List[str]) -> Dict[str, str]:
+        """
+        Lê as playlists de uploads e devolve ``{id_video: canal}`` com os
+        vídeos recentes que ainda podem estar (ou vir a estar) ao vivo.
+        """
+        candidatos: Dict[str, str] = {}
+        for canal in canais:
+            encerrados = set(self._cache.get(canal, {}).get("encerrados", []))
+            for vid in self._videos_recentes(canal):
+                if vid not in encerrados:
+                    candidatos[vid] = canal
+        return candidatos
+
+    def classificar(self, candidatos: Dict[str, str],
+                    status: Dict[str, Dict]) -> Dict[str, List[Tuple[str, str]]]:
+        """
+        A partir do resultado de ``consultar_videos``, devolve
+        ``{canal: [(id_video, titulo), …]}`` só para os canais ao vivo e marca
+        como encerrados os vídeos que não são (nem serão) lives.
+        """
+        vivos: Dict[str, List[Tuple[str, str]]] = {}
+        for vid, canal in candidatos.items():
+            st = status.get(vid)
+            estado = st["estado"] if st else None
+            if estado == "live":
+                vivos.setdefault(canal, []).append((vid, st["metadados"]["titulo"]))
+            elif estado != "upcoming":
+                self._marcar_encerrado(canal, vid)
+
+        self.salvar_cache()
+        return vivos
+
+    def detectar(self, canais: List[str]) -> Dict[str, List[Tuple[str, str]]]:
+        """Atalho para ``candidatos`` + ``consultar_videos`` + ``classificar``."""
+        candidatos = self.candidatos(canais)
+        self.q_videos += chamadas_necessarias(len(candidatos))
+        return self.classificar(candidatos, consultar_videos(self.api, candidatos))
+
+    def _marcar_encerrado(self, canal: str, id_video: str) -> None:
+        entrada = self._cache.setdefault(canal, {})
+        encerrados = entrada.setdefault("encerrados", [])
+        if id_video not in encerrados:
+            encerrados.append(id_video)
+            # Só interessa lembrar dos vídeos que ainda aparecem entre os recentes.
+            del encerrados[:-self.itens_por_canal * 4]
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+
+"""
+Gravação incremental (append-only) das mensagens de chat de uma live.
+
+Em vez de reler e reescrever o CSV inteiro a cada coleta, o ``EscritorChat``
+mantém em memória o conjunto de IDs de mensagens já gravadas e apenas anexa as
+linhas novas, com *flush* ao fim de cada lote. O custo por coleta depende só do
+tamanho do lote, não do tamanho do arquivo.
+
+Para sobreviver a reinícios, os IDs gravados também são anexados a um arquivo
+auxiliar (``ids_mensagens.txt``, um ID por linha) na mesma pasta do chat; ao
+reabrir, o conjunto é reconstruído a partir dele, sem reprocessar o CSV.
+
+O formato de saída é plugável: ``criar_escritor`` devolve o ``EscritorChat``
+(CSV, padrão), o ``escritor_parquet.EscritorParquet`` (Parquet particionado
+por canal/data) ou o ``escritor_sqlite.EscritorSQLite`` (banco SQLite único);
+todos têm a mesma interface (``gravar``, ``ja_vistas``, ``total``,
+``pendentes``, ``fechar``).
+"""
+
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+from typing import Dict, Iterable, List, Set
+
+from resumo_live import ARQ_RESUMO, EscritorComResumo, ResumoLive
+
+CAMPOS_CHAT = ["id_video", "timestamp", "autor", "mensagem", "id_mensagem", "timestamp_us"]
+ARQ_IDS = "ids_mensagens.txt"
+FORMATOS = ("csv", "parquet", "sqlite")
+
+
+class RegistroIds:
+    """Conjunto de IDs já gravados, espelhado em ``ids_mensagens.txt``."""
+
+    def __init__(self, arq_ids: Path) -> None:
+        self.arq_ids = Path(arq_ids)
+        self._vistos: Set[str] = self._carregar()
+        self._fp = self.arq_ids.open("a", encoding="utf-8")
+
+    def _carregar(self) -> Set[str]:
+        if not self.arq_ids.exists():
+            return set()
+        with self.arq_ids.open(encoding="utf-8") as fp:
+            return {l.rstrip("\n") for l in fp if l.strip()}
+
+    def __len__(self) -> int:
+        return len(self._vistos)
+
+    def __contains__(self, id_mensagem: str) -> bool:
+        return id_mensagem in self._vistos
+
+    def filtrar_novas(self, linhas: Iterable[Dict]) -> List[Dict]:
+        """Devolve as linhas inéditas (também sem repetição dentro do lote)."""
+        novas: List[Dict] = []
+        lote: Set[str] = set()
+        for linha in linhas:
+            id_msg = linha["id_mensagem"]
+            if id_msg in self._vistos or id_msg in lote:
+                continue
+            lote.add(id_msg)
+            novas.append(linha)
+        return novas
+
+    def confirmar(self, ids: Iterable[str]) -> None:
+        """Marca como gravados (em memória e no disco) os IDs informados."""
+        ids = list(ids)
+        self._vistos.update(ids)
+        self._fp.writelines(f"{i}\n" for i in ids)
+        self._fp.flush()
+
+    def fechar(self) -> None:
+        if not self._fp.closed:
+            self._fp.close()
+
+
+class EscritorChat:
+    """Anexa mensagens novas ao CSV do chat, descartando IDs já vistos."""
+
+    def __init__(self, arq_chat: Path, campos: List[str] | None = None) -> None:
+        self.arq_chat = Path(arq_chat)
+        self.ids = RegistroIds(self.arq_chat.with_name(ARQ_IDS))
+
+        # Se o CSV já existe, respeita o cabeçalho dele (arquivos antigos
+        # não têm as colunas ``id_mensagem``/``timestamp_us``; ver
+        # ``converter_timestamps.py``).
+        cabecalho = self._ler_cabecalho()
+        self.campos = cabecalho or list(campos or CAMPOS_CHAT)
+
+        self._fp_chat = self.arq_chat.open("a", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(
+            self._fp_chat, fieldnames=self.campos, extrasaction="ignore"
+        )
+        if not cabecalho:
+            self._writer.writeheader()
+            self._fp_chat.flush()
+
+    # Internos
+    def _ler_cabecalho(self) -> List[str]:
+        """Lê apenas a primeira linha do CSV existente (se houver)."""
+        if not self.arq_chat.exists() or self.arq_chat.stat().st_size == 0:
+            return []
+        with self.arq_chat.open(newline="", encoding="utf-8") as fp:
+            return next(csv.reader(fp), [])
+
+    # API pública
+    @property
+    def total(self) -> int:
+        """Quantidade de mensagens com ID conhecido neste chat."""
+        return len(self.ids)
+
+    @property
+    def pendentes(self) -> int:
+        """Mensagens aceitas mas ainda não gravadas em definitivo (sempre 0 no CSV)."""
+        return 0
+
+    def ja_vistas(self, ids: Iterable[str]) -> Set[str]:
+        """Quais destes IDs já foram gravados."""
+        return {i for i in ids if i in self.ids}
+
+    def gravar(self, linhas: Iterable[Dict]) -> int:
+        """
+        Anexa ao CSV as linhas cujo ``id_mensagem`` ainda não foi gravado.
+        Devolve quantas linhas foram efetivamente escritas.
+        """
+        novas = self.ids.filtrar_novas(linhas)
+        if not novas:
+            return 0
+
+        # Primeiro o CSV, depois os IDs: numa queda entre os dois, o pior caso
+        # é uma linha duplicada, nunca uma mensagem perdida.
+        self._writer.writerows(novas)
+        self._fp_chat.flush()
+        self.ids.confirmar(l["id_mensagem"] for l in novas)
+        return len(novas)
+
+    def fechar(self) -> None:
+        if not self._fp_chat.closed:
+            self._fp_chat.close()
+        self.ids.fechar()
+
+    def __enter__(self) -> "EscritorChat":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fechar()
+
+
+def criar_escritor(formato: str, pasta_live: Path, meta: Dict,
+                   raiz_parquet: Path | None = None):
+    """
+    Devolve o escritor do formato pedido para a live em ``pasta_live``.
+
+    - ``csv``: ``<pasta_live>/chat.csv``;
+    - ``parquet``: ``<raiz_parquet>/canal=<canal>/data=<AAAA-MM-DD>/``
+      (por padrão ``raiz_parquet`` é ``<pasta de pasta_live>/parquet``);
+    - ``sqlite``: ``<pasta de pasta_live>/chat.sqlite3``.
+
+    No CSV e no Parquet o registro de IDs fica em ``pasta_live``; no SQLite a
+    deduplicação é feita pelo próprio banco. Em todos os formatos os
+    agregados da live vão para ``<pasta_live>/resumo.json`` (``resumo_live``).
+    """
+    if formato == "csv":
+        escritor = EscritorChat(Path(pasta_live) / "chat.csv")
+    elif formato == "parquet":
+        from escritor_parquet import EscritorParquet
+
+        raiz = raiz_parquet or Path(pasta_live).parent / "parquet"
+        escritor = EscritorParquet(raiz, meta, Path(pasta_live) / ARQ_IDS)
+    elif formato == "sqlite":
+        from escritor_sqlite import ARQ_BANCO, EscritorSQLite
+
+        escritor = EscritorSQLite(Path(pasta_live).parent / ARQ_BANCO, meta)
+    else:
+        raise ValueError(f"Formato de armazenamento desconhecido: {formato!r} (use {FORMATOS})")
+    return EscritorComResumo(escritor, ResumoLive(Path(pasta_live) / ARQ_RESUMO, meta))
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+"""
+Armazenamento colunar (Parquet) das mensagens de chat.
+
+Layout particionado no estilo Hive, legível direto por
+``pd.read_parquet(raiz)`` / ``pyarrow.dataset`` (as partições viram as colunas
+``canal`` e ``data``)::
+
+    <raiz>/canal=<canal>/data=<AAAA-MM-DD>/<id_video>-<seq>.parquet
+
+Durante a captura, as mensagens são acumuladas e escritas em *row groups* de
+``linhas_por_grupo`` linhas; o arquivo da vez é fechado (e outro aberto) a cada
+``linhas_por_arquivo`` linhas ou ``rotacao_s`` segundos. Enquanto está aberto,
+o arquivo tem o prefixo ``_`` e é ignorado pelos leitores.
+
+Os IDs só entram em ``ids_mensagens.txt`` quando o arquivo que os contém é
+fechado: numa queda perde-se no máximo a parte aberta, e uma coleta retomada
+(ex.: replay com checkpoint) volta a gravar essas mensagens.
+
+``autor`` e ``id_video`` usam codificação por dicionário; a compressão é zstd.
+Requer ``pyarrow`` (dependência opcional, só para este formato).
+"""
+
+from __future__ import annotations
+
+import time
+import unicodedata
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Set
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - dependência opcional
+    pa = pq = None
+
+from escritor_chat import CAMPOS_CHAT, RegistroIds
+
+LINHAS_POR_GRUPO = 10_000
+LINHAS_POR_ARQUIVO = 250_000
+ROTACAO_S = 300  # fecha o arquivo aberto a cada 5 min, no máximo
+
+
+def _slug(texto: str) -> str:
+    texto = unicodedata.normalize("NFKD", texto).encode("ASCII", "ignore").decode("ASCII")
+    return "".join(c if c.isalnum() or c in "._-" else "_" for c in texto) or "canal"
+
+
+def particao(meta: Dict) -> tuple[str, str]:
+    """(canal, AAAA-MM-DD) da live, a partir dos metadados."""
+    data = (meta.get("data_inicio_live") or meta.get("data_publicacao") or "")[:10]
+    if not data:
+        data = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    return _slug(meta.get("canal", "")), data
+
+
+class EscritorParquet:
+    """Mesma interface do ``EscritorChat``, gravando Parquet particionado."""
+
+    def __init__(self, raiz: Path, meta: Dict, arq_ids: Path,
+                 linhas_por_grupo: int = LINHAS_POR_GRUPO,
+                 linhas_por_arquivo: int = LINHAS_POR_ARQUIVO,
+                 rotacao_s: float = ROTACAO_S) -> None:
+        if pq is None:
+            raise ImportError("O formato parquet requer pyarrow (pip install pyarrow).")
+
+        canal, data = particao(meta)
+        self.id_video = meta["id_video"]
+        self.pasta = Path(raiz) / f"canal={canal}" / f"data={data}"
+        self.pasta.mkdir(parents=True, exist_ok=True)
+
+        self.linhas_por_grupo = linhas_por_grupo
+        self.linhas_por_arquivo = linhas_por_arquivo
+        self.rotacao_s = rotacao_s
+        self.campos = list(CAMPOS_CHAT)
+        self._esquema = pa.schema([
+            (c, pa.int64() if c == "timestamp_us" else pa.string()) for c in self.campos
+        ])
+
+        self.ids = RegistroIds(arq_ids)
+        self._buffer: List[Dict] = []
+        self._pendentes: Set[str] = set()   # no buffer ou no arquivo aberto
+        self._writer = None
+        self._arq_aberto: Path | None = None
+        self._linhas_arquivo = 0
+        self._inicio_parte = 0.0
+        self._seq = len(list(self.pasta.glob(f"{self.id_video}-*.parquet")))
+
+    # Internos
+    def _escrever_grupo(self) -> None:
+        if not self._buffer:
+            return
+        if self._writer is None:
+            self._arq_aberto = self.pasta / f"_{self.id_video}-{self._seq:05d}.parquet"
+            self._writer = pq.ParquetWriter(
+                self._arq_aberto, self._esquema,
+                compression="zstd", use_dictionary=["autor", "id_video"],
+            )
+        tabela = pa.Table.from_pylist(self._buffer, schema=self._esquema)
+        self._writer.write_table(tabela, row_group_size=len(self._buffer))
+        self._linhas_arquivo += len(self._buffer)
+        self._buffer.clear()
+
+    def _rotacionar(self) -> None:
+        """Fecha o arquivo da vez, publicando-o e confirmando seus IDs."""
+        self._escrever_grupo()
+        if self._writer is None:
+            return
+        self._writer.close()
+        self._arq_aberto.replace(self.pasta / self._arq_aberto.name.lstrip("_"))
+        self.ids.confirmar(self._pendentes)
+        self._pendentes.clear()
+        self._writer = self._arq_aberto = None
+        self._linhas_arquivo = 0
+        self._seq += 1
+
+    # API pública
+    @property
+    def total(self) -> int:
+        return len(self.ids) + len(self._pendentes)
+
+    @property
+    def pendentes(self) -> int:
+        """Mensagens no buffer ou no arquivo ainda aberto (perdidas numa queda)."""
+        return len(self._pendentes)
+
+    def ja_vistas(self, ids: Iterable[str]) -> Set[str]:
+        return {i for i in ids if i in self.ids or i in self._pendentes}
+
+    def gravar(self, linhas: Iterable[Dict]) -> int:
+        novas = [l for l in self.ids.filtrar_novas(linhas)
+                 if l["id_mensagem"] not in self._pendentes]
+        if novas:
+            if not self._pendentes:
+                self._inicio_parte = time.monotonic()
+            self._buffer.extend({c: l.get(c) for c in self.campos} for l in novas)
+            self._pendentes.update(l["id_mensagem"] for l in novas)
+
+        if len(self._buffer) >= self.linhas_por_grupo:
+            self._escrever_grupo()
+        if self._pendentes and (
+            self._linhas_arquivo + len(self._buffer) >= self.linhas_por_arquivo
+            or time.monotonic() - self._inicio_parte >= self.rotacao_s
+        ):
+            self._rotacionar()
+        return len(novas)
+
+    def fechar(self) -> None:
+        self._rotacionar()
+        self.ids.fechar()
+
+    def __enter__(self) -> "EscritorParquet":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fechar()
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+
+"""
+Banco SQLite (modo WAL) com as mensagens de todas as lives.
+
+Alternativa consultável à árvore ``dados/<canal>__<data>__<hora>__<id>/``:
+um único arquivo (por padrão ``dados/chat.sqlite3``) com as tabelas
+
+    canais     (id_canal, nome)
+    lives      (id_video, id_canal, titulo, …, comentarios)
+    autores    (id_autor, nome)
+    mensagens  (id, id_mensagem UNIQUE, id_video, timestamp, timestamp_us,
+                id_autor, mensagem)
+
+e índices em ``mensagens(id_video, timestamp)`` e ``mensagens(id_autor)``.
+O ``id_canal`` é o channelId do YouTube (``UC…``), o mesmo dos
+``metadados.csv``; o nome do canal é só um atributo, atualizado quando muda.
+Metadados antigos, sem ``id_canal``, caem no nome.
+Perguntas como "todas as mensagens do autor X" viram uma busca por índice em
+vez de uma leitura de todos os CSVs.
+
+Cada ``gravar`` é uma única transação (``INSERT OR IGNORE`` em lote); a
+restrição ``UNIQUE`` em ``id_mensagem`` faz a deduplicação, sem
+``ids_mensagens.txt``. O modo WAL permite ler o banco enquanto as capturas
+(inclusive em processos diferentes) continuam gravando.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Set
+
+ARQ_BANCO = "chat.sqlite3"
+TIMEOUT_TRAVA_S = 30  # espera por outro processo gravando no mesmo banco
+
+CAMPOS_LIVE = [
+    "titulo", "descricao", "data_publicacao", "data_inicio_live",
+    "espectadores_atuais", "likes", "visualizacoes", "comentarios",
+]
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS canais (
+    id_canal TEXT PRIMARY KEY,
+    nome     TEXT
+);
+CREATE TABLE IF NOT EXISTS lives (
+    id_video            TEXT PRIMARY KEY,
+    id_canal            TEXT REFERENCES canais(id_canal),
+    titulo              TEXT,
+    descricao           TEXT,
+    data_publicacao     TEXT,
+    data_inicio_live    TEXT,
+    espectadores_atuais TEXT,
+    likes               INTEGER,
+    visualizacoes       INTEGER,
+    comentarios         INTEGER
+);
+CREATE TABLE IF NOT EXISTS autores (
+    id_autor INTEGER PRIMARY KEY,
+    nome     TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS mensagens (
+    id          INTEGER PRIMARY KEY,
+    id_mensagem TEXT NOT NULL UNIQUE,
+    id_video    TEXT NOT NULL REFERENCES lives(id_video),
+    timestamp   TEXT NOT NULL,
+    timestamp_us INTEGER,
+    id_autor    INTEGER REFERENCES autores(id_autor),
+    mensagem    TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_mensagens_video_ts ON mensagens(id_video, timestamp);
+CREATE INDEX IF NOT EXISTS idx_mensagens_autor ON mensagens(id_autor);
+"""
+
+
+def conectar(arq_banco: Path) -> sqlite3.Connection:
+    """Abre (criando se preciso) o banco em modo WAL, com o esquema aplicado."""
+    Path(arq_banco).parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(arq_banco, timeout=TIMEOUT_TRAVA_S)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")  # seguro em WAL; fsync só no checkpoint
+    con.executescript(ESQUEMA)
+    migrar(con)
+    return con
+
+
+def migrar(con: sqlite3.Connection) -> None:
+    """
+    Atualiza bancos antigos: acrescenta ``timestamp_us`` e troca o
+    ``id_canal`` numérico (gerado pelo nome do canal) por texto. Esses bancos
+    não têm o channelId, então o nome passa a ser o ``id_canal`` dos canais já
+    gravados.
+    """
+    colunas = {c[1] for c in con.execute("PRAGMA table_info(mensagens)")}
+    if "timestamp_us" not in colunas:
+        with con:
+            con.execute("ALTER TABLE mensagens ADD COLUMN timestamp_us INTEGER")
+
+    tipos = {c[1]: c[2] for c in con.execute("PRAGMA table_info(canais)")}
+    if tipos.get("id_canal", "").upper() == "INTEGER":
+        campos = ", ".join(CAMPOS_LIVE)
+        with con:
+            con.execute("BEGIN")  # DDL incluída: tudo ou nada
+            con.execute("ALTER TABLE canais RENAME TO canais_antigo")
+            con.execute("ALTER TABLE lives RENAME TO lives_antigo")
+            for comando in ESQUEMA.split(";"):  # não executescript: ele confirmaria a transação
+                if comando.strip():
+                    con.execute(comando)
+            con.execute("INSERT INTO canais(id_canal, nome) SELECT nome, nome FROM canais_antigo")
+            con.execute(
+                f"INSERT INTO lives(id_video, id_canal, {campos}) "
+                f"SELECT l.id_video, c.nome, {', '.join('l.' + c for c in CAMPOS_LIVE)} "
+                "FROM lives_antigo l LEFT JOIN canais_antigo c ON c.id_canal = l.id_canal"
+            )
+            con.execute("DROP TABLE lives_antigo")
+            con.execute("DROP TABLE canais_antigo")
+
+
+def registrar_live(con: sqlite3.Connection, meta: Dict) -> None:
+    """Insere ou atualiza a live (e o canal) a partir dos metadados do projeto."""
+    with con:
+        nome = meta.get("canal") or None
+        id_canal = meta.get("id_canal") or nome  # metadados antigos: só o nome
+        if id_canal:
+            con.execute(
+                "INSERT INTO canais(id_canal, nome) VALUES (?, ?) "
+                "ON CONFLICT(id_canal) DO UPDATE SET nome = coalesce(excluded.nome, nome)",
+                (id_canal, nome),
+            )
+        campos = ", ".join(CAMPOS_LIVE)
+        atualizacao = ", ".join(f"{c} = excluded.{c}" for c in ["id_canal", *CAMPOS_LIVE])
+        con.execute(
+            f"INSERT INTO lives(id_video, id_canal, {campos}) "
+            f"VALUES (?, ?, {', '.join('?' * len(CAMPOS_LIVE))}) "
+            f"ON CONFLICT(id_video) DO UPDATE SET {atualizacao}",
+            [meta["id_video"], id_canal, *(meta.get(c) for c in CAMPOS_LIVE)],
+        )
+
+
+class EscritorSQLite:
+    """Mesma interface do ``EscritorChat``, gravando no banco SQLite."""
+
+    def __init__(self, arq_banco: Path, meta: Dict) -> None:
+        self.arq_banco = Path(arq_banco)
+        self.id_video = meta["id_video"]
+        self.con = conectar(self.arq_banco)
+        registrar_live(self.con, meta)
+        self._autores: Dict[str, int] = {}
+        self._total = self.con.execute(
+            "SELECT COUNT(*) FROM mensagens WHERE id_video = ?", (self.id_video,)
+        ).fetchone()[0]
+
+    # Internos
+    def _ids_autores(self, nomes: Iterable[str]) -> None:
+        """Garante o ``id_autor`` de cada nome no cache local."""
+        novos = list({n for n in nomes if n not in self._autores})
+        if not novos:
+            return
+        self.con.executemany(
+            "INSERT OR IGNORE INTO autores(nome) VALUES (?)", ((n,) for n in novos)
+        )
+        # em blocos, abaixo do limite de parâmetros do SQLite
+        for i in range(0, len(novos), 500):
+            bloco = novos[i:i + 500]
+            self._autores.update(self.con.execute(
+                f"SELECT nome, id_autor FROM autores WHERE nome IN ({', '.join('?' * len(bloco))})",
+                bloco,
+            ))
+
+    # API pública
+    @property
+    def total(self) -> int:
+        return self._total
+
+    @property
+    def pendentes(self) -> int:
+        """Cada ``gravar`` é confirmado na hora: nunca há pendências."""
+        return 0
+
+    def ja_vistas(self, ids: Iterable[str]) -> Set[str]:
+        """Uma consulta ``IN (...)`` por bloco de 500 IDs, não uma por mensagem."""
+        ids = list(ids)
+        vistas: Set[str] = set()
+        for i in range(0, len(ids), 500):
+            bloco = ids[i:i + 500]
+            vistas.update(r[0] for r in self.con.execute(
+                f"SELECT id_mensagem FROM mensagens WHERE id_mensagem IN "
+                f"({', '.join('?' * len(bloco))})",
+                bloco,
+            ))
+        return vistas
+
+    def gravar(self, linhas: Iterable[Dict]) -> int:
+        """Insere o lote numa transação; IDs repetidos são ignorados pelo banco."""
+        linhas: List[Dict] = list(linhas)
+        if not linhas:
+            return 0
+        try:
+            with self.con:
+                self._ids_autores(l.get("autor") or "" for l in linhas)
+                antes = self.con.total_changes
+                self.con.executemany(
+                    "INSERT OR IGNORE INTO mensagens(id_mensagem, id_video, timestamp, "
+                    "timestamp_us, id_autor, mensagem) VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        (l["id_mensagem"], l.get("id_video") or self.id_video, l["timestamp"],
+                         l.get("timestamp_us") or None, self._autores[l.get("autor") or ""],
+                         l.get("mensagem"))
+                        for l in linhas
+                    ),
+                )
+                novas = self.con.total_changes - antes
+        except Exception:
+            self._autores.clear()  # autores recém-criados foram desfeitos no rollback
+            raise
+        self._total += novas
+        return novas
+
+    def fechar(self) -> None:
+        self.con.close()
+
+    def __enter__(self) -> "EscritorSQLite":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fechar()
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+"""
+Estado persistente da captura de uma live (``estado_captura.json``).
+
+Depois de cada coleta, a captura grava na pasta da live (de forma atômica)
+o último ``nextPageToken``, o ID da última mensagem e os contadores. Se o
+processo cair, a próxima captura da mesma live continua desse token em vez
+de recomeçar do início do chat disponível (o que duplicaria trabalho) ou de
+perder o que foi dito enquanto ela estava parada.
+
+O token gravado é só o da última página cujas mensagens o escritor já
+confirmou em disco (``escritor.pendentes == 0``). O Parquet segura as linhas
+no buffer/arquivo aberto por até ``ROTACAO_S``: salvar o token da página mais
+recente faria a captura retomada pular essas mensagens.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ARQ_ESTADO = "estado_captura.json"
+
+
+class EstadoCaptura:
+    """Token, última mensagem e contadores de uma captura, salvos a cada coleta."""
+
+    def __init__(self, pasta_live: Path, id_video: str, id_chat: str) -> None:
+        self.arq = Path(pasta_live) / ARQ_ESTADO
+        anterior = self._ler()
+        # tokens só valem para o mesmo liveChatId
+        if anterior.get("id_chat") != id_chat:
+            anterior = {}
+
+        self.id_video = id_video
+        self.id_chat = id_chat
+        self.proximo_token: str | None = anterior.get("proximo_token")  # usado na coleta
+        self.token_confirmado: str | None = self.proximo_token          # gravado em disco
+        self.ultimo_id: str = anterior.get("ultimo_id", "")
+        self.mensagens: int = anterior.get("mensagens", 0)
+        self.paginas: int = anterior.get("paginas", 0)
+        self.reinicios: int = anterior.get("reinicios", -1) + 1
+        self.retomado = self.proximo_token is not None
+        self.paginas_sessao = 0  # páginas recebidas por este processo
+
+    def _ler(self) -> Dict:
+        try:
+            with self.arq.open(encoding="utf-8") as fp:
+                return json.load(fp)
+        except (OSError, ValueError):
+            return {}
+
+    def registrar(self, resp: Dict, linhas: List[Dict], total: int,
+                  confirmado: bool = True) -> None:
+        """
+        Atualiza o estado com uma página recebida e grava em disco.
+        ``confirmado``: tudo o que foi recebido até aqui já está em disco; só
+        então o token salvo avança.
+        """
+        self.proximo_token = resp.get("nextPageToken") or self.proximo_token
+        if confirmado:
+            self.token_confirmado = self.proximo_token
+        if linhas:
+            self.ultimo_id = linhas[-1]["id_mensagem"]
+        self.mensagens = total
+        self.paginas += 1
+        self.paginas_sessao += 1
+        self.salvar()
+
+    def confirmar(self) -> None:
+        """Escritor fechado (tudo em disco): o token mais recente passa a valer."""
+        self.token_confirmado = self.proximo_token
+        self.salvar()
+
+    def descartar_token(self) -> None:
+        """Token salvo rejeitado pela API: a próxima coleta começa sem ele."""
+        self.proximo_token = self.token_confirmado = None
+        self.retomado = False
+
+    def salvar(self) -> None:
+        dados = {
+            "id_video": self.id_video,
+            "id_chat": self.id_chat,
+            "proximo_token": self.token_confirmado,
+            "ultimo_id": self.ultimo_id,
+            "mensagens": self.mensagens,
+            "paginas": self.paginas,
+            "reinicios": self.reinicios,
+            "atualizado_em": time.time(),
+        }
+        tmp = self.arq.with_name(self.arq.name + ".tmp")
+        with tmp.open("w", encoding="utf-8") as fp:
+            json.dump(dados, fp)
+        os.replace(tmp, self.arq)
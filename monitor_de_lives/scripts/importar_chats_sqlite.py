@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+"""
+Importa a árvore de CSVs já coletada para o banco SQLite (``escritor_sqlite``).
+
+Percorre ``<dados>/<canal>__<data>__<hora>__<id>/`` (do monitor ou do
+coletor de replays), registra a live a partir do ``metadados.csv`` e insere o
+``chat.csv`` em transações de ``TAM_LOTE`` linhas. CSVs antigos, sem a coluna
+``id_mensagem``, recebem um ID derivado do conteúdo da linha (SHA-1), de modo
+que rodar o importador de novo não duplica nada; sem ``timestamp_us``, ele é
+calculado a partir do texto ISO.
+
+Uso:
+    python importar_chats_sqlite.py [--dados PASTA ...] [--banco ARQUIVO]
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+from escritor_sqlite import ARQ_BANCO, EscritorSQLite
+from timestamps import iso_para_us
+
+TAM_LOTE = 10_000
+PASTA_DADOS = Path(__file__).resolve().parent.parent / "dados"
+
+csv.field_size_limit(sys.maxsize)  # mensagens/descrições muito longas
+
+
+def ler_meta(pasta: Path) -> Dict:
+    """Metadados da live; sem ``metadados.csv``, só o ID (fim do nome da pasta)."""
+    try:
+        with (pasta / "metadados.csv").open(newline="", encoding="utf-8") as fp:
+            linha = next(csv.DictReader(fp), None)
+    except OSError:
+        linha = None
+    meta = dict(linha or {})
+    meta["id_video"] = meta.get("id_video") or pasta.name.rsplit("__", 1)[-1]
+    return meta
+
+
+def id_da_linha(linha: Dict) -> str:
+    bruto = "|".join(linha.get(c) or "" for c in ("id_video", "timestamp", "autor", "mensagem"))
+    return hashlib.sha1(bruto.encode("utf-8")).hexdigest()
+
+
+def lotes_do_chat(arq_chat: Path, id_video: str) -> Iterator[List[Dict]]:
+    with arq_chat.open(newline="", encoding="utf-8") as fp:
+        lote: List[Dict] = []
+        for linha in csv.DictReader(fp):
+            if not linha.get("timestamp"):
+                continue
+            linha["id_video"] = linha.get("id_video") or id_video
+            linha["id_mensagem"] = linha.get("id_mensagem") or id_da_linha(linha)
+            if not linha.get("timestamp_us"):
+                try:
+                    linha["timestamp_us"] = iso_para_us(linha["timestamp"])
+                except ValueError:
+                    linha["timestamp_us"] = None
+            lote.append(linha)
+            if len(lote) >= TAM_LOTE:
+                yield lote
+                lote = []
+        if lote:
+            yield lote
+
+
+def importar_pasta(pasta: Path, arq_banco: Path) -> tuple[int, int]:
+    """Importa uma live. Devolve (linhas lidas, mensagens novas no banco)."""
+    meta = ler_meta(pasta)
+    lidas = novas = 0
+    with EscritorSQLite(arq_banco, meta) as escritor:
+        for lote in lotes_do_chat(pasta / "chat.csv", meta["id_video"]):
+            lidas += len(lote)
+            novas += escritor.gravar(lote)
+    return lidas, novas
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Importa os chat.csv para o banco SQLite.")
+    ap.add_argument("--dados", nargs="+", type=Path, default=[PASTA_DADOS],
+                    help="pastas com as subpastas de cada live")
+    ap.add_argument("--banco", type=Path, default=PASTA_DADOS / ARQ_BANCO)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    total_lidas = total_novas = n_lives = 0
+    for raiz in args.dados:
+        for pasta in sorted(p for p in raiz.iterdir() if (p / "chat.csv").is_file()):
+            try:
+                lidas, novas = importar_pasta(pasta, args.banco)
+            except Exception as e:
+                print(f"Erro ao importar {pasta.name}: {e}")
+                continue
+            n_lives += 1
+            total_lidas += lidas
+            total_novas += novas
+            print(f"{pasta.name}: {novas}/{lidas} mensagens novas")
+
+    dt = time.perf_counter() - t0
+    print(f"\n{n_lives} lives, {total_novas} mensagens novas ({total_lidas} lidas) "
+          f"em {dt:.1f}s — {total_lidas / dt if dt else 0:.0f} linhas/s → {args.banco}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,438 @@
+# -*- coding: utf-8 -*-
+
+"""
+Índice de alinhamento entre o chat e a transcrição de cada live.
+
+As duas fontes são postas no mesmo eixo: segundos desde ``data_inicio_live``.
+
+- **Chat** (``dados/<canal>__<data>__<hora>__<id>/chat.csv``): mensagens por
+  segundo num ``array('I')`` (4 bytes por segundo de live: uma live de 4 h
+  ocupa ~56 KB). Janelas maiores (10 s, 1 min…) saem de somas de prefixo.
+- **Transcrição** (``<id>.<idioma>.segmentos.csv`` de
+  ``transcricao_video.py``): início e fim de cada fala num ``array('d')``
+  intercalado, ordenado pelo início, e os textos num arquivo de uma fala por
+  linha. O tempo das legendas é o do vídeo gravado, que começa no início da
+  live.
+
+Cada live vira três arquivos em ``dados/indice_alinhamento/`` (``<id>.chat``,
+``<id>.falas``, ``<id>.textos``), e o ``manifesto.json`` guarda, por live, o
+início, os totais, até que byte do ``chat.csv`` já foi lido, a transcrição
+usada e os maiores picos de chat já calculados (``JANELAS_PICOS``).
+
+**Incremental.** O ``chat.csv`` só cresce (``escritor_chat``): ``atualizar``
+continua a leitura do byte onde parou (até a última linha completa), então
+lives em captura e lives novas custam só as mensagens novas; a transcrição é
+relida só quando o arquivo muda. Quem reescreve o arquivo inteiro
+(``converter_timestamps``, importações) troca o inode e/ou os primeiros bytes:
+o manifesto guarda essa identidade junto de ``bytes_lidos`` e, se ela mudar ou
+o arquivo encolher, o chat da live é reindexado do zero. Chat em
+Parquet/SQLite não é indexado.
+
+**Consultas** (milissegundos, mesmo com centenas de lives): ``contexto`` dá
+o chat por janela e as falas em volta de um instante ("o que se dizia no
+minuto 42, quando o chat explodiu?"); ``picos`` lista os maiores picos de
+chat de uma live ou de todas, usando o que o manifesto já tem. Janelas fora
+de ``JANELAS_PICOS`` são calculadas na hora, live a live, pulando as que
+o pico já guardado numa janela maior mostra que não alcançam o top.
+
+Uso:
+    python indice_alinhamento_chat_transcricao.py atualizar [--dados PASTA] [--transcricoes PASTA]
+    python indice_alinhamento_chat_transcricao.py contexto <id_video> <minuto> [--janela 60] [--passo 10]
+    python indice_alinhamento_chat_transcricao.py picos [--id-video ID] [--janela 10] [--top 10]
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import csv
+import hashlib
+import heapq
+import io
+import json
+import logging
+import operator
+import os
+import sys
+import time
+from array import array
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+from timestamps import iso_para_us
+
+log = logging.getLogger(__name__)
+
+PASTA_DADOS = Path(__file__).resolve().parent.parent / "dados"
+PASTA_TRANSCRICOES = (Path(__file__).resolve().parents[2] / "scripts_auxiliares_e_extras"
+                      / "2-transcricao_video" / "legendas")
+NOME_INDICE = "indice_alinhamento"
+ARQ_MANIFESTO = "manifesto.json"
+
+DURACAO_MAX_S = 48 * 3600        # mensagens além disso (horário inválido) ficam fora
+TAM_BLOCO_BYTES = 8 * 1024 * 1024
+TAM_IDENTIDADE = 4096            # bytes iniciais do chat.csv que identificam o arquivo
+JANELAS_PICOS = (10, 60)         # s; picos pré-calculados no manifesto
+TOP_PICOS = 20                   # por live e janela
+US = 1_000_000
+
+Fala = Tuple[float, float, str]
+
+
+# Leitura das fontes
+def ler_metadados(pasta_live: Path) -> Dict:
+    try:
+        with (pasta_live / "metadados.csv").open(newline="", encoding="utf-8") as fp:
+            return next(csv.DictReader(fp), None) or {}
+    except OSError:
+        return {}
+
+
+def blocos_csv(arq: Path, desde: int) -> Iterator[Tuple[List[List[str]], int]]:
+    """
+    Linhas do CSV a partir do byte ``desde``, em blocos; cada bloco vem com o
+    byte em que termina. Uma última linha ainda incompleta fica para depois.
+    """
+    with arq.open("rb") as fp:
+        fp.seek(desde)
+        resto = b""
+        while True:
+            bloco = fp.read(TAM_BLOCO_BYTES)
+            if not bloco:
+                return
+            bloco = resto + bloco
+            corte = bloco.rfind(b"\n") + 1
+            resto = bloco[corte:]
+            if not corte:
+                continue
+            desde += corte
+            yield list(csv.reader(io.StringIO(bloco[:corte].decode("utf-8"), newline=""))), desde
+
+
+def identidade_chat(arq: Path, ate: int) -> List:
+    """``[inode, n, sha1 dos n primeiros bytes]``, com ``n = min(ate, TAM_IDENTIDADE)``."""
+    n = min(ate, TAM_IDENTIDADE)
+    with arq.open("rb") as fp:
+        return [os.fstat(fp.fileno()).st_ino, n, hashlib.sha1(fp.read(n)).hexdigest()]
+
+
+def achar_transcricao(pasta: Path, id_video: str) -> Path | None:
+    candidatos = sorted(pasta.glob(f"{id_video}.*segmentos.csv")) if pasta.is_dir() else []
+    return candidatos[0] if candidatos else None
+
+
+def ler_falas(arq: Path) -> Tuple[array, List[str]]:
+    falas = []
+    with arq.open(newline="", encoding="utf-8") as fp:
+        for l in csv.DictReader(fp):
+            falas.append((float(l["inicio_s"]), float(l["fim_s"]), " ".join(l["texto"].split())))
+    falas.sort(key=lambda f: f[0])
+    tempos = array("d")
+    for ini, fim, _ in falas:
+        tempos.append(ini)
+        tempos.append(fim)
+    return tempos, [f[2] for f in falas]
+
+
+def picos_serie(acum: array, janela: int, top: int) -> List[Tuple[int, int]]:
+    """``top`` janelas de ``janela`` s sem sobreposição com mais mensagens: (n, início)."""
+    n = len(acum) - 1
+    if n <= 0:
+        return []
+    janela = min(janela, n)
+    somas = list(map(operator.sub, acum[janela:], acum[:n - janela + 1]))
+    # cada janela escolhida descarta menos de 2·janela inícios vizinhos:
+    # os top·2·janela maiores bastam para o guloso
+    k = top * 2 * janela
+    if k < len(somas) // 4:
+        ordem = heapq.nlargest(k, range(len(somas)), key=somas.__getitem__)
+    else:
+        ordem = sorted(range(len(somas)), key=somas.__getitem__, reverse=True)
+    escolhidos: List[Tuple[int, int]] = []
+    for i in ordem:
+        if not somas[i] or len(escolhidos) >= top:
+            break
+        if all(abs(i - j) >= janela for _, j in escolhidos):
+            escolhidos.append((somas[i], i))
+    return escolhidos
+
+
+# Uma live
+class LiveIndexada:
+    """Arrays de uma live (chat por segundo e falas) e as consultas sobre eles."""
+
+    def __init__(self, id_video: str, chat: array, tempos: array, textos: List[str]) -> None:
+        self.id_video = id_video
+        self.chat = chat
+        self.inicios = tempos[0::2]
+        self.fins = tempos[1::2]
+        self.textos = textos
+        self._acum: array | None = None
+
+    @property
+    def acum(self) -> array:
+        if self._acum is None:
+            self._acum = array("Q", accumulate(self.chat, initial=0))
+        return self._acum
+
+    def mensagens(self, ini_s: int, fim_s: int) -> int:
+        """Mensagens em ``[ini_s, fim_s)``."""
+        n = len(self.chat)
+        ini_s, fim_s = max(0, min(ini_s, n)), max(0, min(fim_s, n))
+        return self.acum[fim_s] - self.acum[ini_s] if fim_s > ini_s else 0
+
+    def chat_por_janela(self, ini_s: int, fim_s: int, passo: int) -> List[Tuple[int, int]]:
+        return [(t, self.mensagens(t, t + passo)) for t in range(ini_s, fim_s, passo)]
+
+    def falas(self, ini_s: float, fim_s: float) -> List[Fala]:
+        """Falas que se sobrepõem a ``[ini_s, fim_s)``."""
+        saida = []
+        # falas duram poucos segundos: basta recuar um pouco antes de ini_s
+        i = bisect.bisect_left(self.inicios, ini_s - 60)
+        j = bisect.bisect_left(self.inicios, fim_s)
+        for k in range(i, j):
+            if self.fins[k] > ini_s:
+                saida.append((self.inicios[k], self.fins[k], self.textos[k]))
+        return saida
+
+
+# Índice
+class IndiceAlinhamento:
+    """Manifesto + arquivos por live; as lives são carregadas sob demanda."""
+
+    def __init__(self, pasta: Path) -> None:
+        self.pasta = Path(pasta)
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        try:
+            self.manifesto: Dict[str, Dict] = json.loads(
+                (self.pasta / ARQ_MANIFESTO).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.manifesto = {}
+        self._lives: Dict[str, LiveIndexada] = {}
+
+    def _arq(self, id_video: str, tipo: str) -> Path:
+        return self.pasta / f"{id_video}.{tipo}"
+
+    def _ler_array(self, id_video: str, tipo: str, codigo: str) -> array:
+        arr = array(codigo)
+        arq = self._arq(id_video, tipo)
+        if arq.exists():
+            arr.frombytes(arq.read_bytes())
+            if self.manifesto.get(id_video, {}).get("ordem_bytes", sys.byteorder) != sys.byteorder:
+                arr.byteswap()
+        return arr
+
+    def _gravar(self, id_video: str, tipo: str, dados: bytes) -> None:
+        arq = self._arq(id_video, tipo)
+        tmp = arq.with_name(arq.name + ".tmp")
+        tmp.write_bytes(dados)
+        os.replace(tmp, arq)
+
+    def salvar_manifesto(self) -> None:
+        arq = self.pasta / ARQ_MANIFESTO
+        tmp = arq.with_name(arq.name + ".tmp")
+        tmp.write_text(json.dumps(self.manifesto, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, arq)
+
+    def live(self, id_video: str) -> LiveIndexada:
+        if id_video not in self._lives:
+            if id_video not in self.manifesto:
+                raise KeyError(f"Live {id_video} não está no índice.")
+            textos_arq = self._arq(id_video, "textos")
+            textos = textos_arq.read_text(encoding="utf-8").splitlines() if textos_arq.exists() else []
+            self._lives[id_video] = LiveIndexada(
+                id_video, self._ler_array(id_video, "chat", "I"),
+                self._ler_array(id_video, "falas", "d"), textos)
+        return self._lives[id_video]
+
+    # Construção incremental
+    def atualizar(self, pasta_dados: Path = PASTA_DADOS,
+                  pasta_transcricoes: Path = PASTA_TRANSCRICOES) -> Dict[str, int]:
+        """Indexa o que mudou desde a última vez; devolve contadores."""
+        cont = {"lives": 0, "novas": 0, "mensagens_novas": 0, "transcricoes": 0}
+        for arq_chat in sorted(Path(pasta_dados).glob("*__*__*__*/chat.csv")):
+            pasta_live = arq_chat.parent
+            id_video = pasta_live.name.rsplit("__", 1)[-1]
+            cont["lives"] += 1
+            ent = self.manifesto.get(id_video)
+            if ent is None:
+                meta = ler_metadados(pasta_live)
+                try:
+                    inicio_us = iso_para_us(meta.get("data_inicio_live", ""))
+                except ValueError:
+                    log.warning("%s sem data_inicio_live válida — ignorada.", pasta_live.name)
+                    continue
+                ent = {"canal": meta.get("canal", ""), "titulo": meta.get("titulo", ""),
+                       "inicio_us": inicio_us, "mensagens": 0, "fora": 0,
+                       "bytes_lidos": 0, "colunas": None, "transcricao": None,
+                       "transcricao_mtime": 0.0, "segmentos": 0, "ordem_bytes": sys.byteorder}
+                cont["novas"] += 1
+            mudou = False
+
+            # chat: só o trecho do arquivo ainda não lido, ou tudo se foi reescrito
+            lidos = ent["bytes_lidos"]
+            reescrito = bool(lidos) and (
+                arq_chat.stat().st_size < lidos
+                or ent.get("identidade_chat") != identidade_chat(arq_chat, lidos))
+            if reescrito:
+                log.info("%s: chat.csv reescrito — reindexando do início.", id_video)
+                ent.update(bytes_lidos=0, colunas=None, mensagens=0, fora=0)
+            if reescrito or arq_chat.stat().st_size > lidos:
+                cont["mensagens_novas"] += self._indexar_chat(id_video, arq_chat, ent)
+                mudou = reescrito or ent["bytes_lidos"] != lidos
+
+            # transcrição: relida inteira quando o arquivo muda
+            arq_transc = achar_transcricao(Path(pasta_transcricoes), id_video)
+            if arq_transc and (str(arq_transc) != ent["transcricao"]
+                               or arq_transc.stat().st_mtime != ent["transcricao_mtime"]):
+                tempos, textos = ler_falas(arq_transc)
+                self._gravar(id_video, "falas", tempos.tobytes())
+                self._gravar(id_video, "textos", "".join(t + "\n" for t in textos).encode("utf-8"))
+                ent.update(transcricao=str(arq_transc), segmentos=len(textos),
+                           transcricao_mtime=arq_transc.stat().st_mtime)
+                cont["transcricoes"] += 1
+                mudou = True
+
+            if mudou:
+                self.manifesto[id_video] = ent
+                self._lives.pop(id_video, None)
+                ent["picos"] = {str(j): picos_serie(self.live(id_video).acum, j, TOP_PICOS)
+                                for j in JANELAS_PICOS}
+                self.salvar_manifesto()  # a cada live: uma queda não perde o que já foi feito
+        return cont
+
+    def _indexar_chat(self, id_video: str, arq_chat: Path, ent: Dict) -> int:
+        chat = self._ler_array(id_video, "chat", "I") if ent["bytes_lidos"] else array("I")
+        inicio_us, novas = ent["inicio_us"], 0
+        for linhas, fim_byte in blocos_csv(arq_chat, ent["bytes_lidos"]):
+            if ent["colunas"] is None and linhas:
+                ent["colunas"] = linhas.pop(0)
+            colunas = ent["colunas"] or []
+            i_us = colunas.index("timestamp_us") if "timestamp_us" in colunas else None
+            i_iso = colunas.index("timestamp") if "timestamp" in colunas else None
+            for l in linhas:
+                try:
+                    if i_us is not None and i_us < len(l) and l[i_us]:
+                        us = int(l[i_us])
+                    else:
+                        us = iso_para_us(l[i_iso])
+                except (TypeError, ValueError, IndexError):
+                    ent["fora"] += 1
+                    continue
+                seg = (us - inicio_us) // US
+                if not 0 <= seg < DURACAO_MAX_S:
+                    ent["fora"] += 1  # antes do início (pré-live) ou horário inválido
+                    continue
+                if seg >= len(chat):
+                    chat.frombytes(bytes(chat.itemsize * (seg + 1 - len(chat))))
+                chat[seg] += 1
+                novas += 1
+            ent["bytes_lidos"] = fim_byte
+        self._gravar(id_video, "chat", chat.tobytes())
+        ent["identidade_chat"] = identidade_chat(arq_chat, ent["bytes_lidos"])
+        ent["mensagens"] += novas
+        ent["duracao_s"] = len(chat)
+        return novas
+
+    # Consultas
+    def contexto(self, id_video: str, segundo: float, janela_s: int = 60,
+                 passo_s: int = 10) -> Dict:
+        live = self.live(id_video)
+        ini = max(0, int(segundo) - janela_s)
+        fim = int(segundo) + janela_s
+        return {
+            "id_video": id_video,
+            "chat": live.chat_por_janela(ini, fim, passo_s),
+            "falas": live.falas(ini, fim),
+        }
+
+    def picos(self, id_video: str | None = None, janela_s: int = 10,
+              top: int = 10) -> List[Tuple[int, str, int]]:
+        """Maiores picos ``(mensagens, id_video, início_s)``, de uma live ou de todas."""
+        ids = [id_video] if id_video else list(self.manifesto)
+        candidatos, a_calcular = [], []
+        for vid in ids:
+            picos = self.manifesto[vid].get("picos", {})
+            pre = picos.get(str(janela_s))
+            if pre is not None and top <= TOP_PICOS:
+                candidatos.extend((n, vid, ini) for n, ini in pre[:top])
+                continue
+            # teto: o maior pico numa janela pré-calculada maior contém qualquer
+            # janela menor; sem ela, a live inteira
+            maiores = [picos[str(j)] for j in JANELAS_PICOS if j >= janela_s and str(j) in picos]
+            teto = maiores[0][0][0] if maiores and maiores[0] else 0
+            if not maiores:
+                teto = self.manifesto[vid].get("mensagens", 0)
+            a_calcular.append((teto, vid))
+
+        melhores = heapq.nlargest(top, candidatos)
+        heapq.heapify(melhores)
+        for teto, vid in sorted(a_calcular, reverse=True):
+            if len(melhores) >= top and teto <= melhores[0][0]:
+                break  # nenhuma live restante pode entrar no top
+            for n, ini in picos_serie(self.live(vid).acum, janela_s, top):
+                if len(melhores) < top:
+                    heapq.heappush(melhores, (n, vid, ini))
+                elif n > melhores[0][0]:
+                    heapq.heapreplace(melhores, (n, vid, ini))
+        return sorted(melhores, reverse=True)
+
+
+def _mmss(segundos: float) -> str:
+    h, r = divmod(int(segundos), 3600)
+    return f"{h}:{r // 60:02d}:{r % 60:02d}"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Índice de alinhamento chat × transcrição.")
+    ap.add_argument("--indice", type=Path, default=PASTA_DADOS / NOME_INDICE)
+    sub = ap.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("atualizar", help="indexa lives novas e o que mudou nas antigas")
+    p.add_argument("--dados", type=Path, default=PASTA_DADOS)
+    p.add_argument("--transcricoes", type=Path, default=PASTA_TRANSCRICOES)
+
+    p = sub.add_parser("contexto", help="chat e falas em volta de um minuto da live")
+    p.add_argument("id_video")
+    p.add_argument("minuto", type=float)
+    p.add_argument("--janela", type=int, default=60, help="s antes e depois")
+    p.add_argument("--passo", type=int, default=10, help="s por janela de chat")
+
+    p = sub.add_parser("picos", help="maiores picos de chat (e o que se falava)")
+    p.add_argument("--id-video")
+    p.add_argument("--janela", type=int, default=JANELAS_PICOS[0])
+    p.add_argument("--top", type=int, default=10)
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    t0 = time.perf_counter()
+    indice = IndiceAlinhamento(args.indice)
+
+    if args.comando == "atualizar":
+        c = indice.atualizar(args.dados, args.transcricoes)
+        print(f"{c['lives']} lives ({c['novas']} novas) | {c['mensagens_novas']} mensagens novas | "
+              f"{c['transcricoes']} transcrições (re)lidas | {time.perf_counter() - t0:.2f}s")
+
+    elif args.comando == "contexto":
+        r = indice.contexto(args.id_video, args.minuto * 60, args.janela, args.passo)
+        dt = (time.perf_counter() - t0) * 1000
+        for t, n in r["chat"]:
+            print(f"{_mmss(t)}  {n:>5}  {'█' * min(n, 60)}")
+        print()
+        for ini, _, texto in r["falas"]:
+            print(f"{_mmss(ini)}  {texto}")
+        print(f"\n({dt:.1f} ms)")
+
+    else:
+        picos = indice.picos(args.id_video, args.janela, args.top)
+        for n, vid, ini in picos:
+            live = indice.live(vid)
+            fala = " / ".join(f[2] for f in live.falas(ini, ini + args.janela))
+            print(f"{n:>5} msg  {vid}  {_mmss(ini)}  {indice.manifesto[vid].get('canal', '')}"
+                  f"{'  — ' + fala[:120] if fala else ''}")
+        print(f"\n({(time.perf_counter() - t0) * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
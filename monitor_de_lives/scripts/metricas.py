@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+
+"""
+Instrumentação do monitor e das capturas (contadores, medidores, histogramas).
+
+Sem dependências externas: as métricas ficam num ``Registro`` em memória
+(``REGISTRO``, um por processo) e são expostas no formato texto do
+Prometheus em ``http://127.0.0.1:<porta>/metrics`` por ``servir_http``.
+
+As capturas em subprocesso não abrem porta própria: de tempos em tempos
+gravam um instantâneo JSON do seu registro em ``dados/metricas/`` (``salvar``)
+e o servidor do monitor junta esses arquivos aos seus números na hora de
+responder (contadores e histogramas de mesmo nome e rótulos são somados).
+Um arquivo sem atualização há ``INSTANTANEO_EXPIRADO_S`` é de uma captura
+encerrada: os contadores e histogramas dele passam para um total retido em
+memória e o arquivo é apagado, para que totais como
+``yt_api_requisicoes_total`` nunca diminuam (o Prometheus leria a queda como
+reinício do contador e ``rate()`` mostraria picos falsos). Só os medidores
+expiram. O total retido recomeça com o monitor, junto com os contadores dele.
+
+Eventos pontuais (live detectada, captura reiniciada, quota esgotada…) vão
+para ``dados/logs/eventos_AAAAMMDD.jsonl``, um JSON por linha, com
+``evento(...)`` — depois de ``configurar_eventos(pasta)``.
+
+Exemplo::
+
+    REQS = metricas.contador("yt_api_requisicoes_total", "Requisições à API",
+                             ("endpoint", "resultado"))
+    REQS.inc(endpoint="videos.list", resultado="ok")
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+log = logging.getLogger(__name__)
+
+PASTA_DADOS = Path(__file__).resolve().parent.parent / "dados"
+PASTA_INSTANTANEOS = PASTA_DADOS / "metricas"
+INSTANTANEO_EXPIRADO_S = 300
+BALDES_PADRAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+Rotulos = Tuple[Tuple[str, str], ...]
+
+
+def _chave(nomes: Sequence[str], valores: Dict[str, object]) -> Rotulos:
+    return tuple((n, str(valores.get(n, ""))) for n in nomes)
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_rotulos(rotulos: Iterable[Tuple[str, str]], extra: str = "") -> str:
+    partes = [f'{n}="{_escapar(v)}"' for n, v in rotulos]
+    if extra:
+        partes.append(extra)
+    return "{" + ",".join(partes) + "}" if partes else ""
+
+
+def _fmt_num(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) and not v.is_integer() else str(int(v))
+
+
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()) -> None:
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._valores: Dict[Rotulos, object] = {}
+        self._trava = threading.Lock()
+
+    def instantaneo(self) -> Dict:
+        with self._trava:
+            amostras = [[list(map(list, k)), copy.deepcopy(v)] for k, v in self._valores.items()]
+        return {"tipo": self.tipo, "ajuda": self.ajuda, "amostras": amostras}
+
+    def remover(self, **rotulos) -> None:
+        """Esquece uma série (ex.: medidor de uma live que acabou)."""
+        with self._trava:
+            self._valores.pop(_chave(self.rotulos, rotulos), None)
+
+
+class Contador(_Metrica):
+    tipo = "counter"
+
+    def inc(self, valor: float = 1, **rotulos) -> None:
+        k = _chave(self.rotulos, rotulos)
+        with self._trava:
+            self._valores[k] = self._valores.get(k, 0) + valor
+
+
+class Medidor(_Metrica):
+    tipo = "gauge"
+
+    def definir(self, valor: float, **rotulos) -> None:
+        with self._trava:
+            self._valores[_chave(self.rotulos, rotulos)] = valor
+
+
+class Histograma(_Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Sequence[str] = (),
+                 baldes: Sequence[float] = BALDES_PADRAO) -> None:
+        super().__init__(nome, ajuda, rotulos)
+        self.baldes = tuple(sorted(baldes))
+
+    def observar(self, valor: float, **rotulos) -> None:
+        k = _chave(self.rotulos, rotulos)
+        with self._trava:
+            h = self._valores.get(k)
+            if h is None:
+                h = self._valores[k] = {"baldes": [0] * len(self.baldes), "soma": 0.0, "n": 0}
+            for i, limite in enumerate(self.baldes):
+                if valor <= limite:
+                    h["baldes"][i] += 1
+            h["soma"] += valor
+            h["n"] += 1
+
+    def instantaneo(self) -> Dict:
+        dados = super().instantaneo()
+        dados["limites"] = list(self.baldes)
+        return dados
+
+    def cronometrar(self, **rotulos) -> "_Cronometro":
+        """``with HIST.cronometrar(endpoint=...):`` observa a duração do bloco."""
+        return _Cronometro(self, rotulos)
+
+
+class _Cronometro:
+    def __init__(self, hist: Histograma, rotulos: Dict) -> None:
+        self.hist, self.rotulos = hist, rotulos
+
+    def __enter__(self) -> "_Cronometro":
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.hist.observar(time.perf_counter() - self.t0, **self.rotulos)
+
+
+class Registro:
+    """Conjunto de métricas de um processo."""
+
+    def __init__(self) -> None:
+        self._metricas: Dict[str, _Metrica] = {}
+        self._trava = threading.Lock()
+
+    def _obter(self, classe, nome: str, *args, **kwargs):
+        with self._trava:
+            m = self._metricas.get(nome)
+            if m is None:
+                m = self._metricas[nome] = classe(nome, *args, **kwargs)
+            return m
+
+    def contador(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()) -> Contador:
+        return self._obter(Contador, nome, ajuda, rotulos)
+
+    def medidor(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()) -> Medidor:
+        return self._obter(Medidor, nome, ajuda, rotulos)
+
+    def histograma(self, nome: str, ajuda: str, rotulos: Sequence[str] = (),
+                   baldes: Sequence[float] = BALDES_PADRAO) -> Histograma:
+        return self._obter(Histograma, nome, ajuda, rotulos, baldes)
+
+    def instantaneo(self) -> Dict[str, Dict]:
+        with self._trava:
+            metricas = list(self._metricas.values())
+        return {m.nome: m.instantaneo() for m in metricas}
+
+    def salvar(self, arq: Path) -> None:
+        """Grava o instantâneo (atômico) para o servidor de outro processo ler."""
+        arq = Path(arq)
+        arq.parent.mkdir(parents=True, exist_ok=True)
+        tmp = arq.with_name(f".{arq.name}.tmp")
+        tmp.write_text(json.dumps(self.instantaneo()), encoding="utf-8")
+        os.replace(tmp, arq)
+
+
+def juntar(instantaneos: Iterable[Dict[str, Dict]]) -> Dict[str, Dict]:
+    """Soma contadores/histogramas de mesma série; medidores: vale o último."""
+    total: Dict[str, Dict] = {}
+    for inst in instantaneos:
+        for nome, m in inst.items():
+            destino = total.setdefault(nome, {**m, "amostras": {}})
+            amostras = m["amostras"]  # lista do instantâneo ou dict de um ``juntar``
+            for rot, valor in (amostras.items() if isinstance(amostras, dict) else amostras):
+                k = tuple(map(tuple, rot))
+                atual = destino["amostras"].get(k)
+                if atual is None or m["tipo"] == "gauge":
+                    destino["amostras"][k] = valor
+                elif m["tipo"] == "counter":
+                    destino["amostras"][k] = atual + valor
+                else:
+                    destino["amostras"][k] = {
+                        "baldes": [a + b for a, b in zip(atual["baldes"], valor["baldes"])],
+                        "soma": atual["soma"] + valor["soma"],
+                        "n": atual["n"] + valor["n"],
+                    }
+    return total
+
+
+def formatar_prometheus(instantaneo: Dict[str, Dict]) -> str:
+    """Formato texto de exposição do Prometheus (versão 0.0.4)."""
+    linhas: List[str] = []
+    for nome in sorted(instantaneo):
+        m = instantaneo[nome]
+        amostras = m["amostras"]
+        if isinstance(amostras, list):
+            amostras = {tuple(map(tuple, r)): v for r, v in amostras}
+        linhas.append(f"# HELP {nome} {m['ajuda']}")
+        linhas.append(f"# TYPE {nome} {m['tipo']}")
+        for rot, valor in sorted(amostras.items()):
+            if m["tipo"] != "histogram":
+                linhas.append(f"{nome}{_fmt_rotulos(rot)} {_fmt_num(valor)}")
+                continue
+            for limite, n in zip(m["limites"] + [float("inf")], valor["baldes"] + [valor["n"]]):
+                le = 'le="' + _fmt_num(limite) + '"'
+                linhas.append(f"{nome}_bucket{_fmt_rotulos(rot, le)} {n}")
+            linhas.append(f"{nome}_sum{_fmt_rotulos(rot)} {_fmt_num(valor['soma'])}")
+            linhas.append(f"{nome}_count{_fmt_rotulos(rot)} {valor['n']}")
+    return "\n".join(linhas) + "\n"
+
+
+_encerradas: Dict[str, Dict[str, Dict]] = {}  # pasta → total retido das capturas encerradas
+_trava_encerradas = threading.Lock()
+
+
+def ler_instantaneos(pasta: Path = PASTA_INSTANTANEOS,
+                     expira_s: float = INSTANTANEO_EXPIRADO_S) -> List[Dict]:
+    """
+    Instantâneos recentes gravados pelas capturas em subprocesso, mais o total
+    retido das encerradas. Os expirados entram nesse total (sem os medidores)
+    e são apagados.
+    """
+    agora = time.time()
+    saida = []
+    with _trava_encerradas:
+        retido = _encerradas.get(str(pasta), {})
+        for arq in Path(pasta).glob("*.json"):
+            try:
+                expirado = agora - arq.stat().st_mtime > expira_s
+                inst = json.loads(arq.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            if not expirado:
+                saida.append(inst)
+                continue
+            try:
+                arq.unlink()  # antes de somar: nunca entra duas vezes no total
+            except OSError:
+                continue
+            cumulativos = {n: m for n, m in inst.items() if m["tipo"] != "gauge"}
+            retido = juntar([retido, cumulativos])
+        _encerradas[str(pasta)] = retido
+    if retido:
+        saida.append(retido)
+    return saida
+
+
+# Registro padrão do processo
+REGISTRO = Registro()
+contador = REGISTRO.contador
+medidor = REGISTRO.medidor
+histograma = REGISTRO.histograma
+
+
+def texto_metricas(pasta_instantaneos: Path | None = PASTA_INSTANTANEOS) -> str:
+    """Métricas deste processo + as das capturas em subprocesso."""
+    outros = ler_instantaneos(pasta_instantaneos) if pasta_instantaneos else []
+    return formatar_prometheus(juntar([REGISTRO.instantaneo(), *outros]))
+
+
+def servir_http(porta: int, endereco: str = "127.0.0.1",
+                pasta_instantaneos: Path | None = PASTA_INSTANTANEOS) -> ThreadingHTTPServer:
+    """Sobe ``/metrics`` numa thread daemon e devolve o servidor."""
+
+    class Tratador(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            corpo = texto_metricas(pasta_instantaneos).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *_args) -> None:  # sem uma linha de log por coleta
+            pass
+
+    servidor = ThreadingHTTPServer((endereco, porta), Tratador)
+    threading.Thread(target=servidor.serve_forever, name="metricas-http", daemon=True).start()
+    log.info("Métricas em http://%s:%d/metrics", endereco, porta)
+    return servidor
+
+
+# Eventos (JSON lines)
+_pasta_eventos: Path | None = None
+_trava_eventos = threading.Lock()
+
+
+def configurar_eventos(pasta: Path) -> None:
+    """Liga o log de eventos em ``pasta/eventos_AAAAMMDD.jsonl``."""
+    global _pasta_eventos
+    _pasta_eventos = Path(pasta)
+    _pasta_eventos.mkdir(parents=True, exist_ok=True)
+
+
+def evento(tipo: str, **campos) -> None:
+    """Anexa um evento ao log do dia (sem efeito se não configurado)."""
+    if _pasta_eventos is None:
+        return
+    agora = datetime.now()
+    linha = json.dumps({"ts": agora.isoformat(timespec="milliseconds"), "evento": tipo,
+                        "pid": os.getpid(), **campos}, ensure_ascii=False, default=str)
+    arq = _pasta_eventos / f"eventos_{agora:%Y%m%d}.jsonl"
+    with _trava_eventos:
+        try:
+            with arq.open("a", encoding="utf-8") as fp:
+                fp.write(linha + "\n")
+        except OSError as exc:
+            log.debug("Evento não gravado: %s", exc)
@@ -3,10 +3,24 @@
 """
 Monitor contínuo de lives em canais do YouTube.
 
-• Percorre a lista em ``../canais.txt`` a cada N minutos.
+• Percorre a lista em ``../canais.txt`` a cada N minutos, detectando lives
+  pela playlist de uploads (``detector_lives.DetectorLives``, ~1 u por canal)
+  em vez de ``search.list`` (100 u por canal).
 • Quando detecta uma live:
     1. Salva metadados em ``../dados/metadados/``.
-    2. Dispara ``capturar_chat.py`` em subprocesso para baixar o chat.
+    2. Entrega a live ao ``SupervisorCapturas``, que roda
+       ``capturar_chat.py`` em subprocesso (no máximo
+       ``MAX_CAPTURAS_SIMULTANEAS`` ao mesmo tempo, as de mais espectadores
+       primeiro, com reinício e log por captura em ``../dados/logs/``)
+       (ou, com ``MODO_CAPTURA = "async"``, entrega a live ao
+       ``MotorCapturaAsync``, que captura todas as lives num só processo).
+• Com ``MODO_VARREDURA = "adaptativo"``, cada canal é varrido no seu próprio
+  ritmo por hora do dia (``agendador_varredura``), aprendido com os horários
+  de início das lives já vistas e limitado a ``ORCAMENTO_VARREDURA`` u/dia;
+  com ``"fixo"``, todos os canais seguem ``obter_intervalo``.
+• Supervisiona as capturas em andamento (``travas.py``): a cada
+  ``SUPERVISAO_S`` segundos, reinicia as que morreram ou pararam de renovar o
+  batimento; a captura reiniciada continua do último token salvo.
 • Usa ``YouTubeAPIManager`` (singleton) para rotação de chaves.
 • Possui tratamento para reiniciar automaticamente após falhas de conexão.
 
@@ -18,11 +32,7 @@ Requer:
 
 from __future__ import annotations
 
-import json
 import logging
-import os
-import subprocess
-import sys
 import time
 import unicodedata
 from datetime import datetime
@@ -31,7 +41,15 @@ from typing import Dict, List, Tuple
 
 from rich.console import Console
 from rich.table import Table
+from agendador_varredura import AgendadorVarredura, carregar_inicios
+from cache_metadados import CacheMetadados
+from detector_lives import DetectorLives
+from status_videos import chamadas_necessarias, consultar_videos
+from controle_quota import CUSTO_304, QuotaEsgotadaError, segundos_ate_renovacao
+from supervisor_captura import SupervisorCapturas
+import metricas
 from youtube_api_singleton import YouTubeAPIManager
+import travas
 
 # Adicionado para tratar o erro específico de conexão
 from httplib2.error import ServerNotFoundError
@@ -48,22 +66,74 @@ log = logging.getLogger(__name__)
 # CONFIG
 INTERVALO_CURTO = 600   # seg (21h–0h)
 INTERVALO_LONGO = 3600  # seg (resto do dia)
+INTERVALO_MINIMO = 300  # seg (piso quando sobra quota)
+MODO_CAPTURA = "subprocesso"  # "subprocesso" (um processo por live) ou "async"
+SUPERVISAO_S = 60       # seg entre verificações das capturas em andamento
+MAX_CAPTURAS_SIMULTANEAS = 20  # modo subprocesso; as demais esperam na fila
+PORTA_METRICAS = 9108   # /metrics em 127.0.0.1 (None desliga)
+MODO_VARREDURA = "adaptativo"  # "adaptativo" (por canal e hora) ou "fixo" (obter_intervalo)
+ORCAMENTO_VARREDURA = 2_000    # u/dia para a detecção no modo adaptativo
+PASSO_VARREDURA_S = 300        # modo adaptativo: maior espera entre dois passos
+
+QUOTA_RESTANTE = metricas.medidor("yt_quota_restante", "Unidades de quota disponíveis hoje")
+UNIDADES_VARREDURA = metricas.contador(
+    "monitor_unidades_varredura_total", "Unidades gastas nas varreduras, por tipo", ("tipo",))
+LIVES_ATIVAS = metricas.medidor("monitor_lives_ativas", "Lives em captura")
+DURACAO_VARREDURA = metricas.histograma(
+    "monitor_varredura_segundos", "Duração de uma varredura dos canais")
 
 console = Console()
 
 # FUNÇÕES UTIL
-def obter_intervalo() -> int:
+def obter_intervalo(api_manager: YouTubeAPIManager | None = None) -> int:
+    """
+    Intervalo base pelo horário, esticado ou encurtado conforme o ritmo de
+    consumo da quota do dia (``YouTubeAPIManager.fator_ritmo``).
+    """
     hora = datetime.now().hour
-    return INTERVALO_CURTO if hora >= 21 or hora <= 0 else INTERVALO_LONGO
+    base = INTERVALO_CURTO if hora >= 21 or hora <= 0 else INTERVALO_LONGO
+    if api_manager is None:
+        return base
+    return max(INTERVALO_MINIMO, int(base * api_manager.fator_ritmo()))
 
 
-def registrar_consumo(q_busca: int, q_meta: int) -> None:
+def criar_agendador(canais: List[str], detector: DetectorLives,
+                    base: Path) -> AgendadorVarredura:
+    """Agenda adaptativa aprendida com os metadados já salvos."""
+    por_id = carregar_inicios(base / ".." / "dados" / "metadados")
+    inicios = {c: por_id.get(detector.id_canal(c) or "", []) for c in canais}
+    agendador = AgendadorVarredura(orcamento_diario=ORCAMENTO_VARREDURA)
+    agendador.aprender(inicios, canais)
+    log.info("Agenda de varredura: %s", agendador.resumo())
+    return agendador
+
+
+def inicio_local(meta: Dict) -> datetime | None:
+    """``data_inicio_live`` (UTC) no horário local, sem fuso."""
+    try:
+        inicio = datetime.fromisoformat(meta["data_inicio_live"].replace("Z", "+00:00"))
+    except (KeyError, ValueError):
+        return None
+    return inicio.astimezone().replace(tzinfo=None)
+
+
+def registrar_consumo(detector: DetectorLives, q_videos: int,
+                      restante: int | None = None) -> None:
     hoje = datetime.now().strftime("%Y%m%d")
     arq = Path(f"log_consumo_{hoje}.txt")
-    pontos = q_busca * 100 + q_meta
+    pontos = detector.unidades + q_videos
+    UNIDADES_VARREDURA.inc(detector.q_playlists, tipo="playlists")
+    UNIDADES_VARREDURA.inc(detector.q_nao_modificadas * CUSTO_304, tipo="nao_modificadas")
+    UNIDADES_VARREDURA.inc(detector.q_canais, tipo="canais")
+    UNIDADES_VARREDURA.inc(detector.q_videos + q_videos, tipo="videos")
+    if restante is not None:
+        QUOTA_RESTANTE.definir(restante)
     with arq.open("a", encoding="utf-8") as fp:
-        fp.write(f"{datetime.now().isoformat()} BUSCA:{q_busca} "
-                 f"METADADOS:{q_meta} TOTAL:{pontos}\n")
+        fp.write(f"{datetime.now().isoformat()} PLAYLISTS:{detector.q_playlists} "
+                 f"NAO_MODIFICADAS:{detector.q_nao_modificadas} "
+                 f"CANAIS:{detector.q_canais} "
+                 f"VIDEOS:{detector.q_videos + q_videos} TOTAL:{pontos}"
+                 f" RESTANTE:{restante if restante is not None else '-'}\n")
 
 
 def criar_estruturas_pastas(base: Path) -> None:
@@ -81,101 +151,76 @@ def gerar_nome_pasta(texto: str) -> str:
     texto = unicodedata.normalize("NFKD", texto).encode("ASCII", "ignore").decode("ASCII")
     return "".join(c if c.isalnum() or c in "._-" else "_" for c in texto) or "canal"
 
-# API WRAPPERS
-def buscar_lives_ativas(api_manager: YouTubeAPIManager, canal_id: str) -> List[Tuple[str, str]]:
-    resp = api_manager.executar_requisicao(
-        lambda c, **kw: c.search().list(**kw),
-        part="id,snippet",
-        channelId=canal_id,
-        eventType="live",
-        type="video",
-        maxResults=1,
-    )
-    return [
-        (it["id"]["videoId"], it["snippet"]["title"])
-        for it in resp.get("items", [])
-    ]
-
-
-def buscar_metadados(api_manager: YouTubeAPIManager, id_video: str) -> Dict:
-    resp = api_manager.executar_requisicao(
-        lambda c, **kw: c.videos().list(**kw),
-        part="snippet,liveStreamingDetails,statistics",
-        id=id_video,
-    )
-    itens = resp.get("items")
-    if not itens:
-        return {}
-    item = itens[0]
-    det  = item.get("liveStreamingDetails", {})
-    stat = item.get("statistics", {})
-    return {
-        "id_video":            id_video,
-        "titulo":              item["snippet"].get("title", ""),
-        "descricao":           item["snippet"].get("description", ""),
-        "canal":               item["snippet"].get("channelTitle", ""),
-        "data_publicacao":     item["snippet"].get("publishedAt", ""),
-        "data_inicio_live":    det.get("actualStartTime", ""),
-        "espectadores_atuais": det.get("concurrentViewers", ""),
-        "likes":               int(stat.get("likeCount", 0)),
-        "visualizacoes":       int(stat.get("viewCount", 0)),
-        "comentarios":         int(stat.get("commentCount", 0)),
-    }
-
-
-def live_ainda_ativa(api_manager: YouTubeAPIManager, id_video: str) -> bool:
-    resp = api_manager.executar_requisicao(
-        lambda c, **kw: c.videos().list(**kw),
-        part="liveStreamingDetails",
-        id=id_video,
-    )
-    itens = resp.get("items")
-    if not itens:
-        return False
-    det = itens[0].get("liveStreamingDetails", {})
-    return "actualEndTime" not in det
-
-# TRAVAS DE CHAT
-def caminho_trava(id_video: str, base: Path) -> Path:
-    return base / ".." / "dados" / "chats" / f"trava_{id_video}"
-
-
-def trava_ativa(id_video: str, base: Path) -> bool:
-    p = caminho_trava(id_video, base)
-    if not p.exists():
-        return False
+# CAPTURA CHAT
+def salvar_metadados(id_video: str, dados: Dict, base: Path, estado: str = "live") -> None:
+    """Grava ``metadados_<id>.json``, que também serve de cache (ver ``cache_metadados``)."""
+    CacheMetadados(base / ".." / "dados" / "metadados").salvar(id_video, dados, estado)
+
+
+def prioridade_live(meta: Dict) -> int:
+    """Espectadores simultâneos da live (maior = capturada primeiro)."""
     try:
-        pid = int(p.read_text().strip())
-        os.kill(pid, 0)
-        return True
-    except (ValueError, OSError):
-        return False
+        return int(meta.get("espectadores_atuais") or 0)
+    except (TypeError, ValueError):
+        return 0
 
 
-def criar_trava(id_video: str, base: Path) -> None:
-    caminho_trava(id_video, base).write_text(str(os.getpid()))
+def encerrar_captura_travada(id_video: str, motor) -> None:
+    """Derruba a tarefa async que parou de renovar o batimento da trava."""
+    motor.cancelar(id_video)
+    travas.remover(id_video)
 
-# CAPTURA CHAT
-def salvar_metadados(id_video: str, dados: Dict, base: Path) -> None:
-    arq = base / ".." / "dados" / "metadados" / f"metadados_{id_video}.json"
-    with arq.open("w", encoding="utf-8") as fp:
-        json.dump(dados, fp, ensure_ascii=False, indent=2)
 
+def iniciar_captura_chat(id_video: str, motor=None, supervisor=None,
+                         prioridade: int = 0) -> None:
+    if motor is None:
+        # modo subprocesso: o supervisor decide quando (e se) a captura roda
+        if supervisor.enfileirar(id_video, prioridade):
+            log.info("Captura do chat de %s na fila (prioridade %d)", id_video, prioridade)
+        return
 
-def iniciar_captura_chat(id_video: str, base: Path) -> None:
-    if trava_ativa(id_video, base):
+    situacao = travas.situacao(id_video)
+    if situacao in ("ativa", "encerrada"):
         log.info("Chat %s já está sendo capturado.", id_video)
         return
-    criar_trava(id_video, base)
-    subprocess.Popen(
-        [sys.executable, base / "capturar_chat.py", id_video],
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-    )
-    log.info("Captura do chat iniciada para %s", id_video)
+    if situacao == "travada":
+        log.warning("Captura de %s sem batimento; reiniciando.", id_video)
+        encerrar_captura_travada(id_video, motor)
+    if travas.adquirir(id_video):
+        motor.adicionar(id_video)
+        log.info("Captura do chat iniciada para %s (async)", id_video)
+
+
+def supervisionar_capturas(vivos: Dict[str, Dict], motor=None, supervisor=None) -> None:
+    """Reinicia as capturas das lives em andamento que caíram ou travaram."""
+    if supervisor is not None:
+        supervisor.verificar()
+        return
+    for info in list(vivos.values()):
+        situacao = travas.situacao(info["vid"])
+        if situacao in ("ativa", "encerrada"):
+            continue
+        log.warning("Captura de %s %s; reiniciando.", info["vid"],
+                    "travada" if situacao == "travada" else "interrompida")
+        iniciar_captura_chat(info["vid"], motor)
+        info["reinicios"] = info.get("reinicios", 0) + 1
+
+
+def aguardar(intervalo: int, vivos: Dict[str, Dict], motor=None, supervisor=None) -> None:
+    """Espera até a próxima varredura, supervisionando as capturas no caminho."""
+    fim = time.monotonic() + intervalo
+    while (resta := fim - time.monotonic()) > 0:
+        time.sleep(min(SUPERVISAO_S, resta))
+        supervisionar_capturas(vivos, motor, supervisor)
 
 # STATUS NO TERMINAL
-def exibir_status(vivos: Dict[str, Dict]) -> None:
+def _fmt(valor, sufixo: str = "") -> str:
+    return "-" if valor is None else f"{valor}{sufixo}"
+
+
+def exibir_status(vivos: Dict[str, Dict], metricas: Dict[str, Dict] | None = None,
+                  recursos: Dict[str, Dict] | None = None) -> None:
+    """``metricas``: do motor async; ``recursos``: processos do supervisor."""
     console.clear()
     if not vivos:
         console.print("[bold yellow]Nenhuma live ativa[/]")
@@ -185,12 +230,28 @@ def exibir_status(vivos: Dict[str, Dict]) -> None:
     tabela.add_column("Canal")
     tabela.add_column("Título (até 60 car.)")
     tabela.add_column("Duração da coleta (horas)", justify="right")
+    if metricas is not None:
+        tabela.add_column("Msgs", justify="right")
+        tabela.add_column("Atraso (s)", justify="right")
+    if recursos is not None:
+        tabela.add_column("Captura")
+        tabela.add_column("CPU", justify="right")
+        tabela.add_column("RSS (MB)", justify="right")
+        tabela.add_column("Reinícios", justify="right")
 
     for info in vivos.values():
         dur = datetime.now() - info["inicio"]
         hh, rem = divmod(int(dur.total_seconds()), 3600)
         mm = rem // 60
-        tabela.add_row(info["canal_nome"], info["titulo"], f"{hh:02d}:{mm:02d}")
+        linha = [info["canal_nome"], info["titulo"], f"{hh:02d}:{mm:02d}"]
+        if metricas is not None:
+            m = metricas.get(info["vid"], {})
+            linha += [str(m.get("mensagens", "-")), str(m.get("atraso_mensagens_s", "-"))]
+        if recursos is not None:
+            r = recursos.get(info["vid"], {})
+            linha += [r.get("estado", "encerrada"), _fmt(r.get("cpu_pct"), "%"),
+                      _fmt(r.get("rss_mb")), _fmt(r.get("reinicios"))]
+        tabela.add_row(*linha)
 
     console.print(tabela)
 
@@ -202,39 +263,86 @@ def main() -> None:
 
     # canal_id → {vid, inicio, canal_nome, titulo}
     vivos: Dict[str, Dict] = {}
+    motor = None
+    supervisor = None
+    agendador = None
+
+    metricas.configurar_eventos(base_dir / ".." / "dados" / "logs")
+    if PORTA_METRICAS:
+        try:
+            metricas.servir_http(PORTA_METRICAS)
+        except OSError as e:
+            log.warning("Sem /metrics (porta %d): %s", PORTA_METRICAS, e)
 
     # Laço de repetição externo para garantir que o script reinicie em caso de falha de rede
     while True:
         try:
             # A instância da API agora é criada dentro do try/except
             api_manager = YouTubeAPIManager.obter_instancia()
+            detector = DetectorLives(
+                api_manager, base_dir / ".." / "dados" / "cache_detector.json"
+            )
+            if MODO_CAPTURA == "async" and motor is None:
+                from captura_assincrona import MotorCapturaAsync
+                motor = MotorCapturaAsync()
+                motor.iniciar()
+            elif MODO_CAPTURA != "async" and supervisor is None:
+                supervisor = SupervisorCapturas(
+                    base_dir / "capturar_chat.py",
+                    base_dir / ".." / "dados" / "logs",
+                    max_simultaneas=MAX_CAPTURAS_SIMULTANEAS,
+                )
+            if MODO_VARREDURA == "adaptativo" and agendador is None:
+                agendador = criar_agendador(canais, detector, base_dir)
             log.info("Monitorando %d canais…", len(canais))
 
             # Laço de monitoramento principal (lógica original)
             while True:
-                q_busca = q_meta = 0
-
-                for canal in canais:
-                    # se já há live, verifique se terminou
-                    if canal in vivos:
-                        if live_ainda_ativa(api_manager, vivos[canal]["vid"]):
-                            continue
-                        log.info("Live %s finalizada.", vivos[canal]["vid"])
-                        vivos.pop(canal, None)
-
-                    # buscar novas lives
-                    q_busca += 1
-                    for vid, titulo in buscar_lives_ativas(api_manager, canal):
-                        if trava_ativa(vid, base_dir):
+                t_varredura = time.perf_counter()
+                detector.zerar_contadores()
+
+                # candidatos a novas lives nos canais sem live ativa
+                agora = datetime.now()
+                sem_live = [c for c in canais if c not in vivos]
+                if agendador:
+                    sem_live = agendador.devidos(sem_live, agora)
+                candidatos = detector.candidatos(sem_live)
+                if agendador:
+                    fator = api_manager.fator_ritmo()
+                    for canal in sem_live:
+                        agendador.registrar_varredura(canal, agora, fator)
+
+                # uma única consulta em lote (50 IDs por chamada) resolve o
+                # estado das lives em captura e o estado + metadados dos candidatos
+                ids = [info["vid"] for info in vivos.values()] + list(candidatos)
+                status = consultar_videos(api_manager, ids)
+                q_videos = chamadas_necessarias(len(set(ids)))
+
+                # se já há live, verifique se terminou
+                for canal in list(vivos):
+                    if status.get(vivos[canal]["vid"], {}).get("ativa"):
+                        continue
+                    log.info("Live %s finalizada.", vivos[canal]["vid"])
+                    vid = vivos.pop(canal)["vid"]
+                    metricas.evento("live_finalizada", id_video=vid, canal=canal)
+                    if supervisor:
+                        supervisor.descartar(vid)
+                    travas.remover(vid)
+
+                for canal, lives in detector.classificar(candidatos, status).items():
+                    for vid, titulo in lives[:1]:
+                        if travas.situacao(vid) == "ativa":
                             continue
 
-                        meta = buscar_metadados(api_manager, vid)
-                        q_meta += 1
-                        if meta:
-                            salvar_metadados(vid, meta, base_dir)
+                        meta = status[vid]["metadados"]
+                        salvar_metadados(vid, meta, base_dir, status[vid]["estado"])
 
                         log.info("Nova live: %s — %s", meta["canal"], titulo)
-                        iniciar_captura_chat(vid, base_dir)
+                        metricas.evento("live_detectada", id_video=vid, canal=canal,
+                                        espectadores=prioridade_live(meta))
+                        iniciar_captura_chat(vid, motor, supervisor, prioridade_live(meta))
+                        if agendador and (inicio := inicio_local(meta)):
+                            agendador.registrar_inicio(canal, inicio)
 
                         vivos[canal] = {
                             "vid": vid,
@@ -243,13 +351,30 @@ def main() -> None:
                             "titulo": titulo[:60],
                         }
 
-                exibir_status(vivos)
-                registrar_consumo(q_busca, q_meta)
-
-                intervalo = obter_intervalo()
-                log.info("Aguardando %d min…\n", intervalo // 60)
-                time.sleep(intervalo)
-
+                DURACAO_VARREDURA.observar(time.perf_counter() - t_varredura)
+                LIVES_ATIVAS.definir(len(vivos))
+                if supervisor:
+                    supervisor.verificar()
+                exibir_status(vivos, motor.metricas() if motor else None,
+                              supervisor.metricas() if supervisor else None)
+                registrar_consumo(detector, q_videos, api_manager.orcamento_restante())
+
+                if agendador:
+                    pendentes = [c for c in canais if c not in vivos]
+                    intervalo = int(min(PASSO_VARREDURA_S, max(
+                        SUPERVISAO_S, agendador.segundos_ate_proxima(pendentes, datetime.now()))))
+                    log.info("%d canais varridos. Aguardando %d s…\n", len(sem_live), intervalo)
+                else:
+                    intervalo = obter_intervalo(api_manager)
+                    log.info("Aguardando %d min…\n", intervalo // 60)
+                aguardar(intervalo, vivos, motor, supervisor)
+
+        # Todas as chaves sem quota: espera a renovação (meia-noite do Pacífico)
+        except QuotaEsgotadaError as e:
+            espera = segundos_ate_renovacao() + 60
+            log.error("%s Aguardando %d min.", e, espera // 60)
+            metricas.evento("quota_esgotada", espera_s=int(espera))
+            time.sleep(espera)
         # Tratamento para falha de conexão
         except ServerNotFoundError:
             log.error("Falha de conexão. Tentando novamente em 5 minutos...")
@@ -257,6 +382,10 @@ def main() -> None:
         # Tratamento para interrupção do usuário (Ctrl+C)
         except KeyboardInterrupt:
             log.info("Monitor interrompido pelo usuário.")
+            if motor:
+                motor.parar()
+            if supervisor:
+                supervisor.parar()
             break  # Sai do laço externo e encerra o script
         # Tratamento para qualquer outra exceção inesperada
         except Exception as e:
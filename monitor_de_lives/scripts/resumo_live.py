@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+"""
+Agregados de cada live, mantidos durante a gravação do chat.
+
+O ``ResumoLive`` acompanha as mensagens à medida que são gravadas e guarda em
+``resumo.json`` (na pasta da live):
+
+    - total de mensagens, primeira e última (UTC);
+    - mensagens por minuto (``"AAAA-MM-DDTHH:MM": n``);
+    - mensagens por autor (contagem exata) → autores únicos e top autores.
+
+Assim, descrições do dataset (por canal, por live, por janela) saem da
+leitura desses arquivos, sem varrer as mensagens. O arquivo é regravado
+sempre que o escritor confirma em disco tudo o que recebeu (``pendentes ==
+0``: a cada lote no CSV/SQLite, a cada arquivo fechado no Parquet) e ao
+fechar. Assim o ``resumo.json`` acompanha as mensagens já gravadas (numa
+queda, fica de fora no máximo o lote que estava sendo gravado) e, ao reabrir
+(captura retomada), continua de onde parou.
+
+``criar_escritor`` já devolve o escritor embrulhado em ``EscritorComResumo``.
+Para lives antigas, sem resumo, rode::
+
+    python resumo_live.py dados/<pasta_da_live> [...]
+
+que reconstrói o ``resumo.json`` a partir do ``chat.csv``.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import os
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+ARQ_RESUMO = "resumo.json"
+TOP_AUTORES = 10
+CAMPOS_META = ("id_video", "canal", "titulo", "data_inicio_live")
+
+
+class ResumoLive:
+    """Contadores incrementais de uma live, persistidos em ``resumo.json``."""
+
+    def __init__(self, arq: Path, meta: Dict) -> None:
+        self.arq = Path(arq)
+        anterior = ler_resumo(self.arq) or {}
+        self.meta = {c: meta.get(c) or anterior.get(c, "") for c in CAMPOS_META}
+        self.total: int = anterior.get("total", 0)
+        self.primeira: str = anterior.get("primeira", "")
+        self.ultima: str = anterior.get("ultima", "")
+        self.por_minuto: Counter = Counter(anterior.get("por_minuto", {}))
+        self.autores: Counter = Counter(anterior.get("autores", {}))
+        self.alterado = False  # contadores mudaram desde o último ``salvar``
+
+    def atualizar(self, linhas: Iterable[Dict]) -> None:
+        """Soma as mensagens recém-gravadas aos contadores."""
+        for l in linhas:
+            ts = l.get("timestamp") or ""
+            self.total += 1
+            self.alterado = True
+            self.autores[l.get("autor") or ""] += 1
+            if not ts:
+                continue
+            self.por_minuto[ts[:16]] += 1
+            if not self.primeira or ts < self.primeira:
+                self.primeira = ts
+            if ts > self.ultima:
+                self.ultima = ts
+
+    def dados(self) -> Dict:
+        return {
+            **self.meta,
+            "total": self.total,
+            "primeira": self.primeira,
+            "ultima": self.ultima,
+            "autores_unicos": len(self.autores),
+            "top_autores": self.autores.most_common(TOP_AUTORES),
+            "por_minuto": dict(sorted(self.por_minuto.items())),
+            "autores": dict(self.autores.most_common()),
+        }
+
+    def salvar(self) -> None:
+        """Grava o resumo (atômico)."""
+        tmp = self.arq.with_name(self.arq.name + ".tmp")
+        with tmp.open("w", encoding="utf-8") as fp:
+            json.dump(self.dados(), fp, ensure_ascii=False)
+        os.replace(tmp, self.arq)
+        self.alterado = False
+
+
+class EscritorComResumo:
+    """Repassa as mensagens ao escritor e soma ao resumo só as inéditas."""
+
+    def __init__(self, escritor, resumo: ResumoLive) -> None:
+        self.escritor = escritor
+        self.resumo = resumo
+
+    def __getattr__(self, nome):
+        return getattr(self.escritor, nome)
+
+    def gravar(self, linhas: Iterable[Dict]) -> int:
+        linhas = list(linhas)
+        vistas = self.escritor.ja_vistas(l["id_mensagem"] for l in linhas)
+        novas: List[Dict] = []
+        for l in linhas:
+            id_msg = l["id_mensagem"]
+            if id_msg not in vistas:
+                vistas.add(id_msg)  # repetida dentro do lote
+                novas.append(l)
+        n = self.escritor.gravar(novas)
+        self.resumo.atualizar(novas)
+        # salva junto com a confirmação do escritor (ver docstring do módulo)
+        if self.resumo.alterado and self.escritor.pendentes == 0:
+            self.resumo.salvar()
+        return n
+
+    def fechar(self) -> None:
+        self.escritor.fechar()
+        self.resumo.salvar()
+
+    def __enter__(self) -> "EscritorComResumo":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fechar()
+
+
+def ler_resumo(arq: Path) -> Dict | None:
+    try:
+        with Path(arq).open(encoding="utf-8") as fp:
+            return json.load(fp)
+    except (OSError, ValueError):
+        return None
+
+
+def reconstruir(pasta: Path) -> Dict:
+    """Refaz o ``resumo.json`` de uma live a partir do ``chat.csv``."""
+    pasta = Path(pasta)
+    meta: Dict = {}
+    if (pasta / "metadados.csv").exists():
+        with (pasta / "metadados.csv").open(newline="", encoding="utf-8") as fp:
+            meta = next(csv.DictReader(fp), None) or {}
+    meta.setdefault("id_video", pasta.name.rsplit("__", 1)[-1])
+
+    (pasta / ARQ_RESUMO).unlink(missing_ok=True)
+    resumo = ResumoLive(pasta / ARQ_RESUMO, meta)
+    csv.field_size_limit(sys.maxsize)
+    with (pasta / "chat.csv").open(newline="", encoding="utf-8") as fp:
+        resumo.atualizar(csv.DictReader(fp))
+    resumo.salvar()
+    return resumo.dados()
+
+
+if __name__ == "__main__":
+    for caminho in sys.argv[1:]:
+        r = reconstruir(Path(caminho))
+        print(f"{caminho}: {r['total']} mensagens, {r['autores_unicos']} autores")
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+"""
+Simulador do custo diário de quota da detecção de lives.
+
+Compara, para N canais, o modelo antigo (um ``search.list`` de 100 u por canal
+a cada varredura) com o ``DetectorLives`` (``playlistItems.list`` por canal,
+respondido com 304 quando a playlist não mudou, mais ``videos.list`` em lotes
+de 50). O custo do 304 é ``controle_quota.CUSTO_304``, o mesmo do monitor;
+``--custo-304`` permite testar outro valor.
+
+O número de varreduras por dia segue ``obter_intervalo`` do monitor
+(10 min das 21h à 0h, 60 min no resto do dia).
+
+Uso:
+    python simulador_quota.py [--mudanca 0.05] [--custo-304 1] [--canais 10,50,100]
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+from typing import Dict, List
+
+from controle_quota import CUSTO_304
+
+QUOTA_DIARIA = 10_000  # por chave
+CUSTO_SEARCH = 100
+CUSTO_LISTA = 1
+
+INTERVALO_CURTO = 600
+INTERVALO_LONGO = 3600
+
+
+def varreduras_por_dia() -> int:
+    """Reproduz o agendamento de ``monitorar_lives.obter_intervalo``."""
+    total, seg = 0, 0
+    while seg < 24 * 3600:
+        hora = seg // 3600
+        seg += INTERVALO_CURTO if hora >= 21 or hora <= 0 else INTERVALO_LONGO
+        total += 1
+    return total
+
+
+def custo_antigo(n_canais: int, varreduras: int) -> int:
+    return n_canais * CUSTO_SEARCH * varreduras
+
+
+def custo_novo(n_canais: int, varreduras: int, taxa_mudanca: float,
+               candidatos_fixos: float, custo_304: float) -> float:
+    """
+    Custo esperado do detector por dia.
+
+    - ``taxa_mudanca``: fração das playlists que mudam entre duas varreduras
+      (novo vídeo, live agendada ou iniciada);
+    - ``candidatos_fixos``: fração dos canais com algum vídeo pendente
+      (agendado ou ao vivo), consultado em toda varredura.
+    """
+    mudaram = n_canais * taxa_mudanca
+    playlists = mudaram * CUSTO_LISTA + (n_canais - mudaram) * custo_304
+    candidatos = mudaram + n_canais * candidatos_fixos
+    videos = math.ceil(candidatos / 50) * CUSTO_LISTA if candidatos else 0
+    return (playlists + videos) * varreduras
+
+
+def max_canais(custo_por_canal_dia: float) -> int:
+    return int(QUOTA_DIARIA // custo_por_canal_dia) if custo_por_canal_dia else 0
+
+
+def simular(canais: List[int], taxa_mudanca: float, candidatos_fixos: float,
+            custo_304: float) -> List[Dict]:
+    varreduras = varreduras_por_dia()
+    linhas = []
+    for n in canais:
+        antigo = custo_antigo(n, varreduras)
+        novo = custo_novo(n, varreduras, taxa_mudanca, candidatos_fixos, custo_304)
+        linhas.append({
+            "canais": n,
+            "antigo": antigo,
+            "novo": novo,
+            "economia": 1 - novo / antigo if antigo else 0,
+        })
+    return linhas
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--canais", default="10,50,100,500,1000")
+    ap.add_argument("--mudanca", type=float, default=0.05,
+                    help="fração de playlists alteradas por varredura")
+    ap.add_argument("--pendentes", type=float, default=0.02,
+                    help="fração de canais com vídeo agendado/ao vivo")
+    ap.add_argument("--custo-304", type=float, default=CUSTO_304,
+                    help="unidades cobradas por resposta 304 (Not Modified)")
+    args = ap.parse_args()
+
+    canais = [int(c) for c in args.canais.split(",")]
+    varreduras = varreduras_por_dia()
+    print(f"Varreduras por dia: {varreduras} | quota por chave: {QUOTA_DIARIA:,} u\n")
+    print(f"{'canais':>7} | {'search.list (u/dia)':>20} | {'detector (u/dia)':>17} | {'economia':>8}")
+    for l in simular(canais, args.mudanca, args.pendentes, args.custo_304):
+        print(f"{l['canais']:>7} | {l['antigo']:>20,} | {l['novo']:>17,.0f} | {l['economia']:>8.1%}")
+
+    por_canal_novo = custo_novo(1000, varreduras, args.mudanca, args.pendentes, args.custo_304) / 1000
+    print(f"\nCanais monitoráveis com 1 chave: "
+          f"antigo {max_canais(CUSTO_SEARCH * varreduras)} | novo {max_canais(por_canal_novo)}")
+
+
+if __name__ == "__main__":
+    main()
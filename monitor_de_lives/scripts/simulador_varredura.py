@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+
+"""
+Simulador offline: atraso de detecção × quota da agenda de varredura.
+
+Reaplica os inícios de live do histórico (``dados/metadados``) ou de um
+histórico sintético e compara o agendamento fixo do monitor
+(``obter_intervalo``: todos os canais a cada 10 min das 21h à 0h e a cada
+60 min no resto do dia) com o ``AgendadorVarredura`` em vários orçamentos.
+
+O histórico é dividido no tempo: o agendador aprende com a parte inicial
+(``--treino``) e é avaliado nas lives da parte final, que ele não viu. O
+atraso de uma live é o tempo entre o início e a primeira varredura do canal
+depois dele; o custo é 1 u por canal varrido (``CUSTO_VARREDURA``).
+
+Uso:
+    python simulador_varredura.py [--metadados dados/metadados] [--orcamentos 500,1000,2000]
+    python simulador_varredura.py --sintetico 100 --dias 60
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import random
+import statistics
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from agendador_varredura import (
+    CUSTO_VARREDURA, PASTA_METADADOS, AgendadorVarredura, carregar_inicios,
+)
+from simulador_quota import INTERVALO_CURTO, INTERVALO_LONGO
+
+DETECCAO_RAPIDA_S = 600  # "detectada a tempo": até 10 min
+
+
+def historico_sintetico(n_canais: int, dias: int, semente: int = 7) -> Dict[str, List[datetime]]:
+    """
+    Canais com hábitos próprios: cada um tem 1–2 horários preferidos (a maioria
+    à noite, parte à tarde) e de 0,1 a 1,2 lives por dia.
+    """
+    rnd = random.Random(semente)
+    inicio = datetime(2025, 1, 1)
+    inicios: Dict[str, List[datetime]] = {}
+    for i in range(n_canais):
+        horas = [rnd.choice([14, 15, 19, 20, 21, 21, 22, 22, 23]) for _ in range(rnd.randint(1, 2))]
+        taxa = rnd.uniform(0.1, 1.2)
+        ts = []
+        for d in range(dias):
+            if rnd.random() < taxa:
+                h = rnd.choice(horas) + rnd.gauss(0, 0.75)
+                ts.append(inicio + timedelta(days=d, hours=min(23.99, max(0.0, h))))
+        inicios[f"UC_sintetico_{i:04d}"] = ts
+    return inicios
+
+
+def varreduras_fixas(t0: datetime, t1: datetime) -> List[datetime]:
+    """Horários de varredura de ``monitorar_lives.obter_intervalo`` (sem ajuste de quota)."""
+    saida, t = [], t0.replace(hour=0, minute=0, second=0, microsecond=0)
+    while t <= t1 + timedelta(hours=1):
+        saida.append(t)
+        hora = t.hour
+        t += timedelta(seconds=INTERVALO_CURTO if hora >= 21 or hora <= 0 else INTERVALO_LONGO)
+    return saida
+
+
+def varreduras_adaptativas(agendador: AgendadorVarredura, canal: str,
+                           t0: datetime, t1: datetime) -> List[datetime]:
+    saida, t = [], t0
+    while t <= t1 + timedelta(hours=4):
+        saida.append(t)
+        t += timedelta(seconds=agendador.intervalo(canal, t))
+    return saida
+
+
+def atrasos(inicios: Dict[str, List[datetime]],
+            varreduras: Callable[[str], List[datetime]]) -> List[float]:
+    saida = []
+    for canal, ts in inicios.items():
+        if not ts:
+            continue
+        grade = varreduras(canal)
+        for t in ts:
+            i = bisect.bisect_left(grade, t)
+            if i < len(grade):
+                saida.append((grade[i] - t).total_seconds())
+    return saida
+
+
+def resumir(nome: str, custo_dia: float, atr: List[float]) -> Dict:
+    atr = sorted(atr)
+    if not atr:
+        return {"politica": nome, "u_dia": custo_dia, "n": 0}
+    return {
+        "politica": nome,
+        "u_dia": custo_dia,
+        "n": len(atr),
+        "media_min": statistics.fmean(atr) / 60,
+        "p50_min": atr[len(atr) // 2] / 60,
+        "p90_min": atr[int(len(atr) * 0.9)] / 60,
+        "rapidas": sum(a <= DETECCAO_RAPIDA_S for a in atr) / len(atr),
+    }
+
+
+def simular(inicios: Dict[str, List[datetime]], orcamentos: List[float],
+            frac_treino: float) -> List[Dict]:
+    todos = sorted(t for ts in inicios.values() for t in ts)
+    if len(todos) < 2:
+        raise SystemExit("Histórico insuficiente (menos de 2 lives com data de início).")
+    corte = todos[int(len(todos) * frac_treino)]
+    fim = todos[-1]
+    treino = {c: [t for t in ts if t < corte] for c, ts in inicios.items()}
+    teste = {c: [t for t in ts if t >= corte] for c, ts in inicios.items()}
+    canais = list(inicios)
+
+    grade_fixa = varreduras_fixas(corte, fim)
+    por_dia_fixo = sum(1 for t in grade_fixa if t.date() == grade_fixa[0].date())
+    linhas = [resumir("fixo (obter_intervalo)", len(canais) * por_dia_fixo * CUSTO_VARREDURA,
+                      atrasos(teste, lambda _c: grade_fixa))]
+
+    for orc in orcamentos:
+        ag = AgendadorVarredura(orcamento_diario=orc)
+        ag.aprender(treino, canais, agora=corte)
+        linhas.append(resumir(
+            f"adaptativo {orc:,.0f} u",
+            ag.custo_diario(),
+            atrasos(teste, lambda c: varreduras_adaptativas(ag, c, corte, fim)),
+        ))
+    return linhas
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--metadados", type=Path, default=PASTA_METADADOS)
+    ap.add_argument("--sintetico", type=int, metavar="CANAIS",
+                    help="usa um histórico sintético com N canais em vez dos metadados")
+    ap.add_argument("--dias", type=int, default=60, help="dias do histórico sintético")
+    ap.add_argument("--orcamentos", default="250,500,1000,2000,4000",
+                    help="u/dia para o agendador adaptativo")
+    ap.add_argument("--treino", type=float, default=0.7,
+                    help="fração inicial do histórico usada para aprender")
+    args = ap.parse_args()
+
+    if args.sintetico:
+        inicios = historico_sintetico(args.sintetico, args.dias)
+    else:
+        inicios = carregar_inicios(args.metadados)
+    orcamentos = [float(o) for o in args.orcamentos.split(",")]
+    n_lives = sum(len(ts) for ts in inicios.values())
+    print(f"{len(inicios)} canais, {n_lives} lives | treino {args.treino:.0%}\n")
+
+    print(f"{'política':<24} | {'u/dia':>7} | {'lives':>5} | {'média':>7} | "
+          f"{'p50':>7} | {'p90':>7} | {'≤10 min':>7}")
+    for l in simular(inicios, orcamentos, args.treino):
+        if not l["n"]:
+            print(f"{l['politica']:<24} | {l['u_dia']:>7,.0f} | {0:>5} |")
+            continue
+        print(f"{l['politica']:<24} | {l['u_dia']:>7,.0f} | {l['n']:>5} | "
+              f"{l['media_min']:>5.1f}mn | {l['p50_min']:>5.1f}mn | {l['p90_min']:>5.1f}mn | "
+              f"{l['rapidas']:>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
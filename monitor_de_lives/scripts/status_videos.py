@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+"""
+Consulta em lote de estado e metadados de vídeos (``videos.list``).
+
+Numa única chamada para até 50 IDs (1 u), com as partes
+``snippet,liveStreamingDetails,statistics``, obtém tudo o que o monitor
+precisa por ciclo: se cada live continua ativa e o dicionário de metadados
+que vai para ``dados/metadados/metadados_<id>.json``.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, Iterable
+
+from youtube_api_singleton import YouTubeAPIManager
+
+LOTE_VIDEOS = 50  # limite de IDs por videos.list
+PARTES = "snippet,liveStreamingDetails,statistics"
+
+
+def montar_metadados(item: Dict) -> Dict:
+    """Converte um item de ``videos.list`` no dicionário de metadados do projeto."""
+    det  = item.get("liveStreamingDetails", {})
+    stat = item.get("statistics", {})
+    return {
+        "id_video":            item["id"],
+        "titulo":              item["snippet"].get("title", ""),
+        "descricao":           item["snippet"].get("description", ""),
+        "canal":               item["snippet"].get("channelTitle", ""),
+        "id_canal":            item["snippet"].get("channelId", ""),
+        "data_publicacao":     item["snippet"].get("publishedAt", ""),
+        "data_inicio_live":    det.get("actualStartTime", ""),
+        "espectadores_atuais": det.get("concurrentViewers", ""),
+        "likes":               int(stat.get("likeCount", 0)),
+        "visualizacoes":       int(stat.get("viewCount", 0)),
+        "comentarios":         int(stat.get("commentCount", 0)),
+    }
+
+
+def chamadas_necessarias(n_ids: int) -> int:
+    """Quantas chamadas (= unidades) ``consultar_videos`` faz para n IDs."""
+    return math.ceil(n_ids / LOTE_VIDEOS)
+
+
+def consultar_videos(api_manager: YouTubeAPIManager, ids: Iterable[str]) -> Dict[str, Dict]:
+    """
+    Devolve ``{id_video: {"estado", "ativa", "metadados"}}`` para os IDs
+    encontrados (vídeos removidos/privados simplesmente não aparecem).
+
+    - ``estado``: ``liveBroadcastContent`` (``live``, ``upcoming`` ou ``none``);
+    - ``ativa``: a transmissão começou e ainda não terminou.
+    """
+    ids = list(dict.fromkeys(ids))  # sem repetições, mantendo a ordem
+    resultado: Dict[str, Dict] = {}
+    for i in range(0, len(ids), LOTE_VIDEOS):
+        resp = api_manager.executar_requisicao(
+            lambda c, **kw: c.videos().list(**kw),
+            part=PARTES,
+            id=",".join(ids[i:i + LOTE_VIDEOS]),
+        )
+        for item in resp.get("items", []):
+            det = item.get("liveStreamingDetails", {})
+            resultado[item["id"]] = {
+                "estado": item["snippet"].get("liveBroadcastContent", "none"),
+                "ativa": bool(det.get("actualStartTime")) and "actualEndTime" not in det,
+                "metadados": montar_metadados(item),
+            }
+    return resultado
@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+
+"""
+Supervisor dos subprocessos ``capturar_chat.py`` (modo "subprocesso" do monitor).
+
+Em vez de um ``Popen`` solto por live, o monitor entrega cada live ao
+``SupervisorCapturas``, que:
+
+    - limita as capturas simultâneas (``max_simultaneas``) e segura novas
+      capturas quando a memória livre fica abaixo de ``MEM_LIVRE_MIN_MB``;
+      as que não cabem esperam numa fila de prioridade (mais espectadores
+      primeiro), o que evita derrubar a máquina no pico das 21h;
+    - recolhe os filhos que terminaram e aplica a política de reinício pelo
+      código de saída: 0/2/3 (live encerrada, sem chat, já em captura) não
+      reiniciam; os demais voltam à fila com espera exponencial, até
+      ``max_reinicios`` vezes; a captura reiniciada continua do token salvo;
+    - encerra e reinicia capturas travadas (batimento velho em ``travas.py``);
+    - grava a saída de cada captura em ``dados/logs/captura_<id>.log``;
+    - amostra CPU (%) e memória residente (MB) de cada processo via ``/proc``
+      (sem ``/proc``, as métricas ficam vazias).
+
+Todos os métodos são chamados da thread do monitor, a cada ``verificar()``.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import metricas
+import travas
+
+log = logging.getLogger(__name__)
+
+RSS = metricas.medidor("captura_rss_bytes", "Memória residente do processo de captura", ("id_video",))
+CPU = metricas.medidor("captura_cpu_percentual", "Uso de CPU do processo de captura", ("id_video",))
+RODANDO = metricas.medidor("capturas_rodando", "Capturas em subprocesso rodando")
+NA_FILA = metricas.medidor("capturas_na_fila", "Capturas esperando vaga no supervisor")
+REINICIOS = metricas.contador("captura_reinicios_total", "Reinícios de captura", ("motivo",))
+
+MAX_SIMULTANEAS = 20       # capturas rodando ao mesmo tempo
+MAX_REINICIOS = 5          # por live, contando só saídas com erro/travamento
+ESPERA_REINICIO_S = 30     # 30 s, 60 s, 120 s…
+MEM_LIVRE_MIN_MB = 300     # abaixo disso, não inicia novas capturas
+SAIDAS_SEM_REINICIO = (0, 2, 3)  # ver códigos de saída em capturar_chat.py
+LINHAS_LOG_ERRO = 5        # fim do log mostrado quando uma captura desiste
+
+_TICKS_S = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGINA_KB = (os.sysconf("SC_PAGE_SIZE") // 1024) if hasattr(os, "sysconf") else 4
+
+
+def ler_uso_proc(pid: int) -> Tuple[float, float] | None:
+    """(segundos de CPU, RSS em MB) do processo, lidos de ``/proc``; None se indisponível."""
+    try:
+        with open(f"/proc/{pid}/stat", encoding="ascii") as fp:
+            campos = fp.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm", encoding="ascii") as fp:
+            paginas_rss = int(fp.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    # após o ")" do nome: estado (3), … utime (14), stime (15)
+    cpu_s = (int(campos[11]) + int(campos[12])) / _TICKS_S
+    return cpu_s, paginas_rss * _PAGINA_KB / 1024
+
+
+def memoria_livre_mb() -> float | None:
+    try:
+        with open("/proc/meminfo", encoding="ascii") as fp:
+            for linha in fp:
+                if linha.startswith("MemAvailable:"):
+                    return int(linha.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+class Captura:
+    """Uma live sob o supervisor: processo atual, reinícios e uso de recursos."""
+
+    def __init__(self, id_video: str, prioridade: int) -> None:
+        self.id_video = id_video
+        self.prioridade = prioridade
+        self.proc: subprocess.Popen | None = None
+        self.inicio = 0.0
+        self.reinicios = 0
+        self.liberar_em = 0.0          # não reinicia antes disso (monotonic)
+        self.encerrada_por_nos = False  # travada: terminate() do supervisor
+        self.descartada = False         # a live acabou: não reiniciar
+
+        self.cpu_pct: float | None = None
+        self.rss_mb: float | None = None
+        self._amostra: Tuple[float, float] | None = None  # (monotonic, cpu_s)
+
+    def amostrar(self) -> None:
+        uso = ler_uso_proc(self.proc.pid) if self.proc else None
+        if uso is None:
+            return
+        cpu_s, self.rss_mb = uso
+        agora = time.monotonic()
+        if self._amostra:
+            t0, cpu0 = self._amostra
+            if agora > t0:
+                self.cpu_pct = 100 * (cpu_s - cpu0) / (agora - t0)
+                CPU.definir(round(self.cpu_pct, 1), id_video=self.id_video)
+        self._amostra = (agora, cpu_s)
+        RSS.definir(int(self.rss_mb * 1024 * 1024), id_video=self.id_video)
+
+    def esquecer_metricas(self) -> None:
+        RSS.remover(id_video=self.id_video)
+        CPU.remover(id_video=self.id_video)
+
+    def metricas(self) -> Dict:
+        return {
+            "estado": "rodando" if self.proc else "na fila",
+            "pid": self.proc.pid if self.proc else None,
+            "cpu_pct": None if self.cpu_pct is None else round(self.cpu_pct, 1),
+            "rss_mb": None if self.rss_mb is None else round(self.rss_mb, 1),
+            "reinicios": self.reinicios,
+        }
+
+
+class SupervisorCapturas:
+    """Pool de subprocessos de captura com limite, fila de prioridade e reinício."""
+
+    def __init__(
+        self,
+        script: Path,
+        pasta_logs: Path,
+        max_simultaneas: int = MAX_SIMULTANEAS,
+        max_reinicios: int = MAX_REINICIOS,
+        espera_reinicio_s: float = ESPERA_REINICIO_S,
+        mem_livre_min_mb: float = MEM_LIVRE_MIN_MB,
+    ) -> None:
+        self.script = Path(script)
+        self.pasta_logs = Path(pasta_logs)
+        self.max_simultaneas = max_simultaneas
+        self.max_reinicios = max_reinicios
+        self.espera_reinicio_s = espera_reinicio_s
+        self.mem_livre_min_mb = mem_livre_min_mb
+
+        self._capturas: Dict[str, Captura] = {}
+        self._fila: List[Tuple[int, int, str]] = []   # (-prioridade, ordem, id)
+        self._ordem = itertools.count()
+
+    # API usada pelo monitor
+    def enfileirar(self, id_video: str, prioridade: int = 0) -> bool:
+        """Coloca a live na fila. False se ela já estiver no supervisor."""
+        if id_video in self._capturas:
+            return False
+        cap = Captura(id_video, prioridade)
+        self._capturas[id_video] = cap
+        self._empurrar(cap)
+        self._despachar()
+        return True
+
+    def descartar(self, id_video: str) -> None:
+        """A live acabou: tira da fila (se ainda esperava) e não a reinicia mais."""
+        cap = self._capturas.get(id_video)
+        if cap and cap.proc is None:
+            self._capturas.pop(id_video)
+        elif cap:
+            cap.descartada = True  # termina sozinha ao ver offlineAt
+
+    def verificar(self) -> None:
+        """Recolhe, reinicia, amostra e despacha. Chamar periodicamente."""
+        self._recolher()
+        self._encerrar_travadas()
+        for cap in self.rodando():
+            cap.amostrar()
+        self._despachar()
+        RODANDO.definir(len(self.rodando()))
+        NA_FILA.definir(self.na_fila())
+
+    def rodando(self) -> List[Captura]:
+        return [c for c in self._capturas.values() if c.proc]
+
+    def na_fila(self) -> int:
+        return sum(1 for c in self._capturas.values() if c.proc is None)
+
+    def metricas(self) -> Dict[str, Dict]:
+        return {vid: cap.metricas() for vid, cap in self._capturas.items()}
+
+    def parar(self, timeout: float = 10) -> None:
+        """Encerra todas as capturas (SIGTERM; SIGKILL após ``timeout``)."""
+        for cap in self.rodando():
+            cap.proc.terminate()
+        fim = time.monotonic() + timeout
+        for cap in self.rodando():
+            try:
+                cap.proc.wait(max(0.0, fim - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                cap.proc.kill()
+                cap.proc.wait()
+        self._capturas.clear()
+        self._fila.clear()
+
+    # Internos
+    def _empurrar(self, cap: Captura) -> None:
+        heapq.heappush(self._fila, (-cap.prioridade, next(self._ordem), cap.id_video))
+
+    def _arq_log(self, id_video: str) -> Path:
+        return self.pasta_logs / f"captura_{id_video}.log"
+
+    def _lancar(self, cap: Captura) -> None:
+        self.pasta_logs.mkdir(parents=True, exist_ok=True)
+        with self._arq_log(cap.id_video).open("ab") as saida:
+            cap.proc = subprocess.Popen(
+                [sys.executable, self.script, cap.id_video],
+                stdout=saida,
+                stderr=subprocess.STDOUT,
+            )
+        # reserva a trava com o PID do filho, que a assume ao começar
+        travas.adquirir(cap.id_video, pid=cap.proc.pid)
+        cap.inicio = time.monotonic()
+        cap.encerrada_por_nos = False
+        cap.cpu_pct = cap.rss_mb = cap._amostra = None
+        log.info("Captura do chat iniciada para %s (PID %d, prioridade %d)",
+                 cap.id_video, cap.proc.pid, cap.prioridade)
+
+    def _pode_lancar(self) -> bool:
+        if len(self.rodando()) >= self.max_simultaneas:
+            return False
+        livre = memoria_livre_mb()
+        if livre is not None and livre < self.mem_livre_min_mb:
+            log.warning("Memória livre em %.0f MB; novas capturas aguardam.", livre)
+            return False
+        return True
+
+    def _despachar(self) -> None:
+        adiadas: List[Tuple[int, int, str]] = []
+        agora = time.monotonic()
+        while self._fila and self._pode_lancar():
+            item = heapq.heappop(self._fila)
+            cap = self._capturas.get(item[2])
+            if cap is None or cap.proc is not None:
+                continue  # descartada ou já rodando
+            if cap.liberar_em > agora:
+                adiadas.append(item)
+                continue
+            situacao = travas.situacao(cap.id_video)
+            if situacao in ("ativa", "encerrada"):
+                # outro processo já captura (ou a live acabou): nada a fazer
+                self._capturas.pop(cap.id_video)
+                continue
+            if situacao == "travada":
+                # dono de uma execução anterior do monitor, parado
+                self._derrubar_dono(cap.id_video)
+            self._lancar(cap)
+        for item in adiadas:
+            heapq.heappush(self._fila, item)
+
+    def _recolher(self) -> None:
+        for cap in self.rodando():
+            codigo = cap.proc.poll()
+            if codigo is None:
+                continue
+            cap.proc = None
+            cap.esquecer_metricas()
+            duracao = time.monotonic() - cap.inicio
+            metricas.evento("captura_saiu", id_video=cap.id_video, codigo=codigo,
+                            duracao_s=round(duracao), travada=cap.encerrada_por_nos)
+            if cap.descartada:
+                self._capturas.pop(cap.id_video)
+                continue
+            if not cap.encerrada_por_nos and (
+                codigo in SAIDAS_SEM_REINICIO or travas.situacao(cap.id_video) == "encerrada"
+            ):
+                log.info("Captura de %s terminou (código %d, %.0f min).",
+                         cap.id_video, codigo, duracao / 60)
+                self._capturas.pop(cap.id_video)
+                continue
+            if cap.reinicios >= self.max_reinicios:
+                log.error("Captura de %s desistiu após %d reinícios (código %d). Fim do log:\n%s",
+                          cap.id_video, cap.reinicios, codigo, self._fim_do_log(cap.id_video))
+                metricas.evento("captura_desistiu", id_video=cap.id_video, codigo=codigo)
+                travas.remover(cap.id_video)
+                self._capturas.pop(cap.id_video)
+                continue
+            REINICIOS.inc(motivo="travada" if cap.encerrada_por_nos else "erro")
+            espera = self.espera_reinicio_s * 2 ** cap.reinicios
+            cap.reinicios += 1
+            cap.liberar_em = time.monotonic() + espera
+            log.warning("Captura de %s saiu com código %d após %.0f s; reinício %d/%d em %.0f s.",
+                        cap.id_video, codigo, duracao, cap.reinicios, self.max_reinicios, espera)
+            travas.remover(cap.id_video)
+            self._empurrar(cap)
+
+    def _encerrar_travadas(self) -> None:
+        for cap in self.rodando():
+            if travas.situacao(cap.id_video) != "travada":
+                continue
+            log.warning("Captura de %s (PID %d) sem batimento; encerrando.",
+                        cap.id_video, cap.proc.pid)
+            cap.encerrada_por_nos = True
+            cap.proc.terminate()
+            try:
+                cap.proc.wait(10)
+            except subprocess.TimeoutExpired:
+                cap.proc.kill()
+                cap.proc.wait()
+        self._recolher()
+
+    @staticmethod
+    def _derrubar_dono(id_video: str) -> None:
+        pid = (travas.ler_trava(id_video) or {}).get("pid")
+        if pid and pid != os.getpid():
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+        travas.remover(id_video)
+
+    def _fim_do_log(self, id_video: str) -> str:
+        try:
+            with self._arq_log(id_video).open(encoding="utf-8", errors="replace") as fp:
+                return "".join(deque(fp, maxlen=LINHAS_LOG_ERRO))
+        except OSError:
+            return ""
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+"""
+Representação canônica dos horários das mensagens.
+
+Toda mensagem gravada (ao vivo ou replay) leva duas colunas de horário:
+
+    - ``timestamp_us``: inteiro, microssegundos desde 1970-01-01 UTC — tipado,
+      ordenável entre fontes com precisão de sub-segundo;
+    - ``timestamp``: o mesmo instante em ISO 8601 fixo,
+      ``AAAA-MM-DDTHH:MM:SS.ffffffZ`` (legível, ordenável como texto).
+
+A API entrega ``publishedAt`` com precisão variável e sufixos ``Z`` ou
+``+00:00``; o chat-downloader entrega um epoch em µs (às vezes ms/s). As
+funções abaixo convertem as duas origens para o mesmo formato, e
+``converter_timestamps.py`` faz o mesmo com as coletas antigas.
+
+Na análise, prefira ``pd.to_datetime(df["timestamp_us"], unit="us", utc=True)``
+a ``format="mixed"``.
+"""
+
+from __future__ import annotations
+
+import re
+from datetime import datetime, timedelta, timezone
+
+EPOCA = datetime(1970, 1, 1, tzinfo=timezone.utc)
+UM_US = timedelta(microseconds=1)
+FORMATO_ISO = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+_ISO = re.compile(
+    r"(\d{4}-\d\d-\d\d)[T ](\d\d:\d\d:\d\d)(?:\.(\d+))?\s*(Z|[+-]\d\d:?\d\d)?$"
+)
+
+
+def iso_para_us(texto: str) -> int:
+    """ISO 8601 (qualquer precisão, ``Z``/offset; sem offset = UTC) → epoch µs."""
+    m = _ISO.match(texto.strip())
+    if not m:
+        raise ValueError(f"Horário fora do padrão ISO 8601: {texto!r}")
+    data, hora, fracao, fuso = m.groups()
+    fuso = "+00:00" if fuso in (None, "Z") else fuso
+    dt = datetime.fromisoformat(f"{data}T{hora}{fuso}")
+    return (dt - EPOCA) // UM_US + int((fracao or "0")[:6].ljust(6, "0"))
+
+
+def epoca_para_us(valor: float | int) -> int:
+    """
+    Epoch em µs, ms ou s (chat-downloader) → epoch µs.
+    ≥1e14 → µs; ≥1e11 → ms; senão segundos.
+    """
+    if valor >= 1e14:
+        return int(valor)
+    if valor >= 1e11:
+        return int(round(valor * 1_000))
+    return int(round(valor * 1_000_000))
+
+
+def us_para_iso(us: int) -> str:
+    """Epoch µs → ``AAAA-MM-DDTHH:MM:SS.ffffffZ``."""
+    return (EPOCA + us * UM_US).strftime(FORMATO_ISO)
+
+
+def campos_horario(us: int) -> dict:
+    """As duas colunas de horário de uma linha de chat."""
+    return {"timestamp": us_para_iso(us), "timestamp_us": us}
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+"""
+Travas de captura (``dados/chats/trava_<id>``) com batimento.
+
+Cada trava é um JSON pequeno com o PID do processo que captura o chat (o
+próprio ``capturar_chat.py`` ou, no modo async, o monitor), o horário de
+início e o último batimento. Quem captura renova o batimento a cada coleta;
+assim o monitor distingue três casos:
+
+    - sem trava, ou PID morto      → captura caída (reiniciar);
+    - PID vivo, batimento recente → captura em andamento;
+    - PID vivo, batimento velho   → captura travada (encerrar e reiniciar);
+    - marca ``encerrada``          → a live acabou (não reiniciar).
+
+A criação é atômica (``O_EXCL``): dois processos nunca pegam a mesma live.
+Travas antigas (só o PID em texto) continuam sendo lidas, com o horário de
+modificação do arquivo no lugar do batimento.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict
+
+PASTA_TRAVAS = Path(__file__).resolve().parent.parent / "dados" / "chats"
+TRAVA_EXPIRADA_S = 180  # sem batimento há mais que isso = captura travada
+
+
+def caminho_trava(id_video: str, pasta: Path = PASTA_TRAVAS) -> Path:
+    return Path(pasta) / f"trava_{id_video}"
+
+
+def pid_vivo(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # existe, mas é de outro usuário
+        return True
+    return True
+
+
+def ler_trava(id_video: str, pasta: Path = PASTA_TRAVAS) -> Dict | None:
+    """Conteúdo da trava (``pid``, ``inicio``, ``batimento``) ou None."""
+    arq = caminho_trava(id_video, pasta)
+    try:
+        texto = arq.read_text(encoding="utf-8").strip()
+        mtime = arq.stat().st_mtime
+    except OSError:
+        return None
+    try:
+        dados = json.loads(texto)
+        if isinstance(dados, dict):
+            return dados
+    except ValueError:
+        pass
+    try:  # formato antigo: só o PID
+        return {"pid": int(texto), "inicio": mtime, "batimento": mtime}
+    except ValueError:
+        return {"pid": 0, "inicio": mtime, "batimento": mtime}
+
+
+def situacao(id_video: str, pasta: Path = PASTA_TRAVAS,
+             expira_s: float = TRAVA_EXPIRADA_S) -> str:
+    """
+    ``"livre"``, ``"ativa"``, ``"travada"`` (PID vivo sem batimento),
+    ``"morta"`` ou ``"encerrada"`` (a live acabou e a captura terminou normalmente).
+    """
+    trava = ler_trava(id_video, pasta)
+    if trava is None:
+        return "livre"
+    if trava.get("encerrada"):
+        return "encerrada"
+    if not trava.get("pid"):
+        # recém-criada e ainda vazia, ou ilegível
+        return "ativa" if time.time() - trava.get("inicio", 0) < 5 else "morta"
+    if not pid_vivo(int(trava["pid"])):
+        return "morta"
+    if time.time() - trava.get("batimento", 0) > expira_s:
+        return "travada"
+    return "ativa"
+
+
+def _gravar(arq: Path, dados: Dict) -> None:
+    tmp = arq.with_name(f".{arq.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(dados), encoding="utf-8")
+    os.replace(tmp, arq)
+
+
+def adquirir(id_video: str, pid: int | None = None, pasta: Path = PASTA_TRAVAS) -> bool:
+    """
+    Cria a trava para ``pid`` (padrão: este processo). Também a assume se ela
+    já for deste PID (reserva feita pelo monitor) ou estiver morta/travada.
+    """
+    pid = pid or os.getpid()
+    arq = caminho_trava(id_video, pasta)
+    arq.parent.mkdir(parents=True, exist_ok=True)
+    agora = time.time()
+    dados = {"pid": pid, "inicio": agora, "batimento": agora}
+    try:
+        fd = os.open(arq, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except FileExistsError:
+        atual = ler_trava(id_video, pasta) or {}
+        if atual.get("pid") != pid and situacao(id_video, pasta) == "ativa":
+            return False
+        _gravar(arq, dados)
+        # outro processo pode ter assumido a mesma trava velha ao mesmo tempo
+        return (ler_trava(id_video, pasta) or {}).get("pid") == pid
+    with os.fdopen(fd, "w", encoding="utf-8") as fp:
+        json.dump(dados, fp)
+    return True
+
+
+def bater(id_video: str, pid: int | None = None, pasta: Path = PASTA_TRAVAS) -> None:
+    """Renova o batimento (só se a trava ainda for de ``pid``)."""
+    pid = pid or os.getpid()
+    trava = ler_trava(id_video, pasta)
+    if trava is None or trava.get("pid") != pid:
+        return
+    trava["batimento"] = time.time()
+    _gravar(caminho_trava(id_video, pasta), trava)
+
+
+def liberar(id_video: str, pid: int | None = None, encerrada: bool = False,
+            pasta: Path = PASTA_TRAVAS) -> None:
+    """
+    Solta a trava se ela for de ``pid`` (padrão: este processo). Com
+    ``encerrada=True`` (a live acabou), deixa a marca ``encerrada`` para o
+    monitor não reiniciar a captura; ele remove a trava ao tirar a live da lista.
+    """
+    pid = pid or os.getpid()
+    trava = ler_trava(id_video, pasta)
+    if trava is None or trava.get("pid") != pid:
+        return
+    if encerrada:
+        _gravar(caminho_trava(id_video, pasta), dict(trava, encerrada=True, batimento=time.time()))
+    else:
+        caminho_trava(id_video, pasta).unlink(missing_ok=True)
+
+
+def remover(id_video: str, pasta: Path = PASTA_TRAVAS) -> None:
+    """Apaga a trava, seja de quem for (uso do monitor)."""
+    caminho_trava(id_video, pasta).unlink(missing_ok=True)
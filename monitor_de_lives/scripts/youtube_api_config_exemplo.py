@@ -8,6 +8,8 @@ Arquivo de configuração do coletor de lives.
   ⚠️  NÃO versionar este arquivo em repositórios públicos.
 
 - try_again_timeout: segundos entre novas tentativas em erros 5xx.
+
+- quota_diaria (opcional): unidades por chave por dia (padrão 10.000).
 """
 
 youtube_keys = [
@@ -17,3 +19,5 @@ youtube_keys = [
 ]
 
 try_again_timeout = 60  # segundos de espera antes de nova tentativa
+
+quota_diaria = 10_000  # unidades por chave por dia (horário do Pacífico)
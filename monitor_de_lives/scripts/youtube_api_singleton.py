@@ -4,21 +4,60 @@
 Gerencia a rotação de chaves da API do YouTube.
 
 Mantém uma instância única (Singleton) para que todo o código compartilhe a
-mesma cota e troca de chave automaticamente quando recebe quotaExceeded (HTTP 403).
+mesma cota. Antes de cada requisição consulta o ``ControleQuota`` para usar a
+chave com mais folga no dia (horário do Pacífico); se a API ainda assim
+responder quotaExceeded (HTTP 403), marca a chave como esgotada e tenta a
+próxima. Quando nenhuma chave comporta a requisição, levanta
+``QuotaEsgotadaError`` em vez de ficar girando entre chaves vazias. Limite
+de ritmo (HTTP 429 ou 403 ``rateLimitExceeded``) não é falta de quota: a
+requisição é repetida com espera exponencial (com jitter), no lugar de
+``sleep`` fixo entre chamadas nos scripts.
+
+Pode ser usado por várias threads ao mesmo tempo: o ``httplib2.Http`` não é
+thread-safe, então cada thread recebe a sua própria conexão HTTP (reutilizada
+entre requisições e entre chaves) e os seus próprios clientes, montados a
+partir do documento de discovery carregado uma única vez por processo. A
+contabilidade de quota é protegida por trava.
 """
 
+import json
 import time
+import random
 import logging
-from googleapiclient.discovery import build
+import threading
+from pathlib import Path
+
+import httplib2
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build, build_from_document
 from googleapiclient.errors import HttpError
 
+import metricas
 import youtube_api_config
+from controle_quota import CUSTO_304, ControleQuota, QuotaEsgotadaError, custo_metodo
 
 logger = logging.getLogger(__name__)
 
+REQUISICOES = metricas.contador(
+    "yt_api_requisicoes_total", "Requisições à API do YouTube", ("endpoint", "resultado"))
+LATENCIA = metricas.histograma(
+    "yt_api_latencia_segundos", "Duração das requisições à API", ("endpoint",))
+UNIDADES = metricas.contador(
+    "yt_quota_unidades_total", "Unidades de quota gastas, por chave (hash)", ("chave",))
+
+ARQ_ESTADO_QUOTA = Path(__file__).resolve().parent / ".." / "dados" / "quota_estado.json"
+TIMEOUT_HTTP = 30  # segundos por requisição
+ESPERA_LIMITE_S = 1.0        # primeira espera após limite de ritmo (dobra a cada tentativa)
+ESPERA_LIMITE_MAX_S = 64.0
+TENTATIVAS_LIMITE = 8
+MOTIVOS_LIMITE = (b"rateLimitExceeded", b"userRateLimitExceeded")
+
 
 class YouTubeAPIManager:
     _instancia = None
+    _trava_instancia = threading.Lock()
+    _documento = None  # discovery da API, compartilhado por todas as instâncias
+    _ids_metodo: dict = {}  # código do `metodo` → methodId (ex.: "youtube.videos.list")
 
     SERVICO = "youtube"
     VERSAO = "v3"
@@ -26,39 +65,108 @@ class YouTubeAPIManager:
     def __init__(self, timeout: int | None = None) -> None:
         self._keys: list[str] = youtube_api_config.youtube_keys
         self._timeout: int = timeout or getattr(youtube_api_config, "try_again_timeout", 60)
-        self._idx: int = -1
-        self.youtube = self._novo_cliente()
+        self._api_endpoint = getattr(youtube_api_config, "api_endpoint", None)
+        self._local = threading.local()
+        self.quota = ControleQuota(
+            self._keys,
+            getattr(youtube_api_config, "arq_estado_quota", ARQ_ESTADO_QUOTA),
+            getattr(youtube_api_config, "quota_diaria", 10_000),
+        )
 
     # Padrão Singleton
     @classmethod
     def obter_instancia(cls) -> "YouTubeAPIManager":
-        if cls._instancia is None:
-            cls._instancia = cls()
+        with cls._trava_instancia:
+            if cls._instancia is None:
+                cls._instancia = cls()
         return cls._instancia
 
     # Internos
-    def _novo_cliente(self):
-        """Cria e devolve um objeto `youtube` com a próxima chave."""
-        self._idx = (self._idx + 1) % len(self._keys)
-        chave = self._keys[self._idx]
-        logger.info("Usando chave %d/%d", self._idx + 1, len(self._keys))
-        return build(self.SERVICO, self.VERSAO, developerKey=chave, cache_discovery=False)
+    @classmethod
+    def _documento_discovery(cls) -> dict:
+        """Carrega (uma vez) o documento de discovery empacotado na biblioteca."""
+        if cls._documento is None:
+            doc = discovery_cache.get_static_doc(cls.SERVICO, cls.VERSAO)
+            if doc is None:  # versão antiga do googleapiclient: busca pela rede
+                doc = build(cls.SERVICO, cls.VERSAO, cache_discovery=False)._rootDesc
+            cls._documento = json.loads(doc) if isinstance(doc, str) else doc
+        return cls._documento
+
+    def _cliente(self, idx: int):
+        """Devolve o objeto `youtube` da chave `idx` para a thread atual."""
+        local = self._local
+        if not hasattr(local, "clientes"):
+            local.clientes = {}
+            local.http = httplib2.Http(timeout=TIMEOUT_HTTP)
+        if idx not in local.clientes:
+            logger.debug("Cliente da chave %d/%d criado na thread %s",
+                         idx + 1, len(self._keys), threading.current_thread().name)
+            opcoes = {"api_endpoint": self._api_endpoint} if self._api_endpoint else None
+            local.clientes[idx] = build_from_document(
+                self._documento_discovery(),
+                developerKey=self._keys[idx],
+                http=local.http,
+                client_options=opcoes,
+            )
+        return local.clientes[idx]
+
+    @property
+    def youtube(self):
+        """Cliente da chave com mais folga, para a thread atual."""
+        return self._cliente(self.quota.escolher_chave(0))
 
     # API pública
     def executar_requisicao(self, metodo, **kwargs):
         """
-        Executa `metodo(youtube, **kwargs).execute()` trocando de chave caso
-        receba erro de quota (403). Retorna o JSON da resposta.
+        Executa `metodo(youtube, **kwargs).execute()` com a chave de maior folga,
+        contabilizando o custo do endpoint. Em erro de quota (403) marca a chave
+        como esgotada e tenta outra; em limite de ritmo espera e repete.
+        Retorna o JSON da resposta.
+
+        O custo vem do methodId, guardado por código de `metodo` (os lambdas
+        são recriados a cada chamada, mas o código é o mesmo): a requisição só
+        é montada uma vez, já no cliente da chave escolhida.
         """
+        chave_metodo = getattr(metodo, "__code__", metodo)
+        tentativas_limite = 0
         while True:
+            requisicao = None
+            id_metodo = self._ids_metodo.get(chave_metodo)
+            if id_metodo is None:  # primeira chamada deste `metodo`
+                requisicao = metodo(self._cliente(0), **kwargs)
+                id_metodo = self._ids_metodo[chave_metodo] = requisicao.methodId
+            endpoint = (id_metodo or "").removeprefix("youtube.")
+            custo = custo_metodo(id_metodo)
+            idx = self.quota.escolher_chave(custo)
+            if requisicao is None or idx != 0:
+                requisicao = metodo(self._cliente(idx), **kwargs)
+
+            t0 = time.perf_counter()
             try:
-                return metodo(self.youtube, **kwargs).execute()
+                resp = requisicao.execute()
+                self._contabilizar(idx, custo, endpoint, "ok", t0)
+                return resp
 
             except HttpError as exc:
                 quota = exc.resp.status == 403 and b"quotaExceeded" in exc.content
                 if quota:
-                    logger.warning("Quota estourada — trocando de chave…")
-                    self.youtube = self._novo_cliente()
+                    logger.warning("Quota estourada na chave %d — trocando de chave…", idx + 1)
+                    REQUISICOES.inc(endpoint=endpoint, resultado="quota")
+                    metricas.evento("chave_esgotada", chave=self.quota.id_chave(idx))
+                    self.quota.marcar_esgotada(idx)
+                    continue
+
+                self._contabilizar(idx, CUSTO_304 if exc.resp.status == 304 else custo,
+                                   endpoint, f"http_{exc.resp.status}", t0)
+                limite = exc.resp.status == 429 or (
+                    exc.resp.status == 403 and any(m in exc.content for m in MOTIVOS_LIMITE))
+                if limite and tentativas_limite < TENTATIVAS_LIMITE:
+                    espera = min(ESPERA_LIMITE_MAX_S, ESPERA_LIMITE_S * 2 ** tentativas_limite)
+                    espera *= random.uniform(0.5, 1.0)
+                    tentativas_limite += 1
+                    logger.warning("Limite de ritmo em %s — nova tentativa em %.1fs",
+                                   endpoint, espera)
+                    time.sleep(espera)
                     continue
 
                 if exc.resp.status in (500, 503):
@@ -68,3 +176,18 @@ class YouTubeAPIManager:
                     continue
 
                 raise
+
+    def _contabilizar(self, idx: int, custo: int, endpoint: str,
+                      resultado: str, t0: float) -> None:
+        self.quota.registrar(idx, custo)
+        LATENCIA.observar(time.perf_counter() - t0, endpoint=endpoint)
+        REQUISICOES.inc(endpoint=endpoint, resultado=resultado)
+        UNIDADES.inc(custo, chave=self.quota.id_chave(idx))
+
+    def orcamento_restante(self) -> int:
+        """Unidades de quota ainda disponíveis hoje (todas as chaves)."""
+        return self.quota.restante()
+
+    def fator_ritmo(self) -> float:
+        """Ver ``ControleQuota.fator_ritmo``: >1 consumo adiantado, <1 folga."""
+        return self.quota.fator_ritmo()
@@ -1,84 +1,202 @@
-from googleapiclient.discovery import build
-from dotenv import load_dotenv
-import os
+# -*- coding: utf-8 -*-
+"""
+Relatório dos vídeos do "iceberg da calvoesfera": busca o termo, filtra pelo
+título e exporta título, canal, data, URL, visualizações e comentários.
+
+- A busca já pede ``snippet`` (mesmo custo de ``id``: 100 u por página), então
+  o filtro de ``PALAVRAS_CHAVE`` no título é aplicado antes de
+  ``videos().list``: só os vídeos que vão para o relatório têm estatísticas
+  consultadas, em lotes de 50 IDs, sem repetir IDs que aparecem em mais de
+  uma página.
+- Cache em ``cache/``: os resultados da busca (``busca.json``) e as
+  estatísticas (``estatisticas.json``). Na execução seguinte a busca só pede
+  o que foi publicado depois da última (``publishedAfter``, com margem de
+  ``MARGEM_BUSCA``) e só são consultadas as estatísticas novas ou mais velhas
+  que ``--validade`` horas. ``--completo`` refaz a busca inteira.
+- Sem ``sleep`` fixo: as chamadas passam pelo ``YouTubeAPIManager`` do
+  monitor, que espera e repete quando a API acusa limite de ritmo.
+
+Ao final mostra a quota gasta e o tempo da execução.
+
+Uso:
+    python relatorio_video_viral_2024.py [--termo "iceberg da calvoesfera"]
+        [--validade 24] [--completo]
+"""
+
+from __future__ import annotations
+
+import argparse
 import csv
+import json
+import os
+import sys
 import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List
 
-# Carrega as variáveis do arquivo .env
-load_dotenv()
-CHAVE_API = os.getenv('YOUTUBE_API_KEY')
-
-if not CHAVE_API:
-    raise RuntimeError("CHAVE DA API não encontrada! Verifique o arquivo .env.")
+# módulos compartilhados com o monitor de lives
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "monitor_de_lives" / "scripts"))
+from controle_quota import custo_metodo  # noqa: E402
+from youtube_api_singleton import YouTubeAPIManager  # noqa: E402
 
-# Inicializa a API do YouTube
-youtube = build('youtube', 'v3', developerKey=CHAVE_API)
+CAMINHO_BASE = Path(__file__).resolve().parent
+PASTA_CACHE = CAMINHO_BASE / "cache"
+ARQ_SAIDA = CAMINHO_BASE / "relatorio_video_viral_2024_filtrado.csv"
 
 # Termo de busca
-termo_busca = "iceberg da calvoesfera"
-
-# Parâmetros da busca
-parametros_busca = {
-    'q': termo_busca,
-    'part': 'id',
-    'type': 'video',
-    'maxResults': 50
-}
-
-ids_videos = []
-resposta_busca = youtube.search().list(**parametros_busca).execute()
-for item in resposta_busca.get('items', []):
-    ids_videos.append(item['id']['videoId'])
-
-# Busca todas as páginas de resultados (caso existam mais de 50 vídeos)
-while 'nextPageToken' in resposta_busca:
-    parametros_busca['pageToken'] = resposta_busca['nextPageToken']
-    resposta_busca = youtube.search().list(**parametros_busca).execute()
-    for item in resposta_busca.get('items', []):
-        ids_videos.append(item['id']['videoId'])
-    # Se precisar limitar a quantidade de páginas para evitar consumo de cota, adicionar um break aqui
-
-# Prepara a lista de dados para exportar em CSV
-dados_csv = []
-cabecalho = ['Título', 'Canal', 'Data de publicação', 'URL', 'Visualizações', 'Comentários']
-
-# Para cada lote de até 50 vídeos (limite da API), busca as estatísticas e informações
-for i in range(0, len(ids_videos), 50):
-    lote_ids = ids_videos[i:i + 50]
-    resposta_videos = youtube.videos().list(
-        part='snippet,statistics',
-        id=','.join(lote_ids)
-    ).execute()
-
-    for video in resposta_videos.get('items', []):
-        estatisticas = video.get('statistics', {})
-        snippet = video.get('snippet', {})
-        titulo = snippet.get('title', '')
-        canal = snippet.get('channelTitle', '')
-        data_publicacao = snippet.get('publishedAt', '')
-        url = f"https://www.youtube.com/watch?v={video['id']}"
-        visualizacoes = estatisticas.get('viewCount', '0')
-        comentarios = estatisticas.get('commentCount', '0')
-
-        dados_csv.append([titulo, canal, data_publicacao, url, visualizacoes, comentarios])
-    time.sleep(1)  # Aguarda para evitar bloqueio de requisições
+TERMO_BUSCA = "iceberg da calvoesfera"
 
 # Filtro para considerar apenas vídeos com os termos desejados no título
-palavras_chave = [
-    'iceberg da calvoesfera',
-    'iceberg da calvosfera', # cobre erros de digitação
+PALAVRAS_CHAVE = [
+    "iceberg da calvoesfera",
+    "iceberg da calvosfera",  # cobre erros de digitação
 ]
 
-dados_csv_filtrados = []
-for linha in dados_csv:
-    titulo = linha[0].lower()
-    if any(palavra in titulo for palavra in palavras_chave):
-        dados_csv_filtrados.append(linha)
+CABECALHO = ["Título", "Canal", "Data de publicação", "URL", "Visualizações", "Comentários"]
+LOTE_VIDEOS = 50
+VALIDADE_ESTATISTICAS_H = 24
+MARGEM_BUSCA = timedelta(days=2)  # o índice da busca demora a incluir vídeos novos
+
+
+def agora_iso() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def ler_json(arq: Path, padrao: Dict) -> Dict:
+    try:
+        return json.loads(arq.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return padrao
+
+
+def salvar_json(arq: Path, dados: Dict) -> None:
+    tmp = arq.with_suffix(".tmp")
+    tmp.write_text(json.dumps(dados, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, arq)
+
+
+def titulo_relevante(titulo: str) -> bool:
+    titulo = titulo.lower()
+    return any(palavra in titulo for palavra in PALAVRAS_CHAVE)
+
+
+class Relatorio:
+    """Busca + estatísticas com cache em disco e contagem de quota."""
+
+    def __init__(self, termo: str, api: YouTubeAPIManager | None = None) -> None:
+        self.termo = termo
+        self.api = api or YouTubeAPIManager.obter_instancia()
+        self.unidades = 0
+        self.requisicoes = 0
+        PASTA_CACHE.mkdir(parents=True, exist_ok=True)
+        self.arq_busca = PASTA_CACHE / "busca.json"
+        self.arq_stats = PASTA_CACHE / "estatisticas.json"
+        self.busca = ler_json(self.arq_busca, {})
+        if self.busca.get("termo") != termo:  # cache de outro termo não serve
+            self.busca = {"termo": termo, "consultado_em": None, "videos": {}}
+        self.stats = ler_json(self.arq_stats, {})
+
+    def _requisitar(self, metodo, id_metodo: str, **params) -> Dict:
+        self.unidades += custo_metodo(id_metodo)
+        self.requisicoes += 1
+        return self.api.executar_requisicao(metodo, **params)
+
+    # 1 – busca (só o que é novo desde a última execução)
+    def buscar(self, completo: bool = False) -> int:
+        params = {"q": self.termo, "part": "snippet", "type": "video", "maxResults": 50}
+        ultima = self.busca.get("consultado_em")
+        if ultima and not completo:
+            desde = datetime.fromisoformat(ultima.replace("Z", "+00:00")) - MARGEM_BUSCA
+            params["publishedAfter"] = desde.strftime("%Y-%m-%dT%H:%M:%SZ")
+        inicio_consulta = agora_iso()
+
+        videos = self.busca["videos"]
+        antes = len(videos)
+        token = None
+        while True:
+            resp = self._requisitar(lambda c, **kw: c.search().list(**kw),
+                                    "youtube.search.list", pageToken=token, **params)
+            for item in resp.get("items", []):
+                vid = item["id"].get("videoId")
+                if not vid or vid in videos:  # a busca repete vídeos entre páginas
+                    continue
+                sn = item["snippet"]
+                videos[vid] = {"titulo": sn.get("title", ""), "canal": sn.get("channelTitle", ""),
+                               "data_publicacao": sn.get("publishedAt", "")}
+            token = resp.get("nextPageToken")
+            if not token:
+                break
+
+        self.busca["consultado_em"] = inicio_consulta
+        salvar_json(self.arq_busca, self.busca)
+        return len(videos) - antes
+
+    # 2 – estatísticas só dos relevantes, novas ou vencidas
+    def atualizar_estatisticas(self, ids: List[str], validade_h: float) -> int:
+        limite = (datetime.now(timezone.utc) - timedelta(hours=validade_h)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        faltam = [i for i in ids if self.stats.get(i, {}).get("em", "") < limite]
+        for i in range(0, len(faltam), LOTE_VIDEOS):
+            lote = faltam[i:i + LOTE_VIDEOS]
+            resp = self._requisitar(lambda c, **kw: c.videos().list(**kw),
+                                    "youtube.videos.list", part="snippet,statistics",
+                                    id=",".join(lote))
+            em = agora_iso()
+            for video in resp.get("items", []):
+                estatisticas = video.get("statistics", {})
+                self.stats[video["id"]] = {
+                    "titulo": video["snippet"].get("title", ""),
+                    "visualizacoes": estatisticas.get("viewCount", "0"),
+                    "comentarios": estatisticas.get("commentCount", "0"),
+                    "em": em,
+                }
+            salvar_json(self.arq_stats, self.stats)
+        return len(faltam)
+
+    def linhas(self, ids: List[str]) -> List[List]:
+        saida = []
+        for vid in ids:
+            st = self.stats.get(vid)
+            if not st:  # removido/privado desde a busca
+                continue
+            # o título atual (videos.list) prevalece sobre o da busca
+            if not titulo_relevante(st["titulo"]):
+                continue
+            meta = self.busca["videos"][vid]
+            saida.append([st["titulo"], meta["canal"], meta["data_publicacao"],
+                          f"https://www.youtube.com/watch?v={vid}",
+                          st["visualizacoes"], st["comentarios"]])
+        return saida
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Relatório de vídeos de um termo de busca.")
+    ap.add_argument("--termo", default=TERMO_BUSCA)
+    ap.add_argument("--validade", type=float, default=VALIDADE_ESTATISTICAS_H,
+                    help="horas até as estatísticas em cache serem consultadas de novo")
+    ap.add_argument("--completo", action="store_true",
+                    help="ignora o cache da busca e refaz todas as páginas")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    rel = Relatorio(args.termo)
+    novos = rel.buscar(args.completo)
+    ids = [vid for vid, v in rel.busca["videos"].items() if titulo_relevante(v["titulo"])]
+    consultados = rel.atualizar_estatisticas(ids, args.validade)
+    dados_csv = rel.linhas(ids)
+
+    # Salva apenas os vídeos filtrados
+    with open(ARQ_SAIDA, "w", newline="", encoding="utf-8") as arquivo_csv:
+        escritor = csv.writer(arquivo_csv)
+        escritor.writerow(CABECALHO)
+        escritor.writerows(dados_csv)
+
+    print(f"Busca: {novos} vídeos novos ({len(rel.busca['videos'])} no cache), "
+          f"{len(ids)} com o termo no título; estatísticas consultadas: {consultados}")
+    print(f"Exportação concluída: {len(dados_csv)} vídeos filtrados salvos em {ARQ_SAIDA.name}")
+    print(f"Quota: {rel.unidades} u em {rel.requisicoes} requisições | "
+          f"{time.perf_counter() - t0:.1f}s")
 
-# Salva apenas os vídeos filtrados em um novo arquivo CSV
-with open('relatorio_video_viral_2024_filtrado.csv', 'w', newline='', encoding='utf-8') as arquivo_csv:
-    escritor = csv.writer(arquivo_csv)
-    escritor.writerow(cabecalho)
-    escritor.writerows(dados_csv_filtrados)
 
-print(f"Exportação concluída: {len(dados_csv_filtrados)} vídeos filtrados salvos em relatorio_video_viral_2024_filtrado.csv")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Gera legendas automáticas sintéticas de várias horas e mede a conversão
+VTT → texto/segmentos de ``transcricao_video.converter_vtt``.
+
+A legenda imita a automática do YouTube: blocos de ~2 s com a linha anterior
+repetida, a linha nova com marcas ``<00:00:00.000><c> palavra</c>``, o bloco
+de 10 ms só com a repetição e, de vez em quando (``FRAC_REPETIDOS``), um bloco
+que repete as duas últimas linhas. Para cada duração mede tempo, pico de
+memória (``tracemalloc``, numa segunda execução) e confere que cada fala
+gerada saiu exatamente uma vez, na ordem. Com ``--legado`` mede também a
+conversão antiga (quatro ``re.sub`` por linha e só duplicatas consecutivas
+removidas, o que deixa passar os blocos repetidos).
+
+Uso:
+    python benchmark_transcricao.py [--horas 1,4,8] [--pasta /tmp/bench_vtt] [--legado]
+"""
+
+import argparse
+import html
+import os
+import random
+import re
+import time
+import tracemalloc
+
+import transcricao_video as transcricao
+
+PALAVRAS = ("calvoesfera live chat kkkk mano tipo assim cara então iceberg streamer "
+            "jogo hoje ontem amanhã porque nunca sempre muito pouco &amp; treta").split()
+DURACAO_BLOCO_S = 2.0
+FRAC_REPETIDOS = 0.05
+REPETICOES = 3  # o tempo reportado é o melhor de N execuções
+
+
+def _tempo(s):
+    h, r = divmod(s, 3600)
+    m, s = divmod(r, 60)
+    return f"{int(h):02d}:{int(m):02d}:{s:06.3f}"
+
+
+def gerar_vtt(arq, horas, semente=42):
+    """Escreve a legenda sintética e devolve a lista de falas, na ordem."""
+    rnd = random.Random(semente)
+    falas = []
+    anterior = ""
+    t = 0.0
+    with open(arq, "w", encoding="utf-8") as f:
+        f.write("WEBVTT\nKind: captions\nLanguage: pt\n\n")
+        while t < horas * 3600:
+            palavras = [rnd.choice(PALAVRAS) for _ in range(rnd.randint(4, 9))]
+            falas.append(html.unescape(" ".join(palavras)))
+            passo = DURACAO_BLOCO_S / len(palavras)
+            marcada = palavras[0] + "".join(
+                f"<{_tempo(t + i * passo)}><c> {p}</c>" for i, p in enumerate(palavras[1:], 1))
+            f.write(f"{_tempo(t)} --> {_tempo(t + DURACAO_BLOCO_S)} align:start position:0%\n"
+                    f"{anterior or ' '}\n{marcada}\n\n")
+            t += DURACAO_BLOCO_S
+            f.write(f"{_tempo(t)} --> {_tempo(t + 0.01)} align:start position:0%\n"
+                    f"{' '.join(palavras)}\n \n\n")
+            t += 0.01
+            if anterior and rnd.random() < FRAC_REPETIDOS:
+                f.write(f"{_tempo(t)} --> {_tempo(t + 0.5)} align:start position:0%\n"
+                        f"{anterior}\n{' '.join(palavras)}\n\n")
+                t += 0.5
+            anterior = " ".join(palavras)
+    return falas
+
+
+def vtt_to_txt_legado(vtt_path):
+    """Conversão anterior de ``transcricao_video.py`` (devolve as linhas)."""
+    last = ''
+    out_lines = []
+    with open(vtt_path, encoding='utf-8') as f:
+        for raw in f:
+            line = raw.rstrip('\n')
+            if line.startswith(('WEBVTT', 'Kind:', 'Language:')) or not line:
+                continue
+            if '-->' in line:
+                continue
+            line = re.sub(r'<\d{2}:\d{2}:\d{2}\.\d{3}>', '', line)
+            line = re.sub(r'</?c[^>]*>', '', line)
+            line = re.sub(r'</?i>', '', line)
+            line = html.unescape(line).strip()
+            if line and line != last:
+                out_lines.append(line)
+                last = line
+    return out_lines
+
+
+def medir(funcao, *args):
+    """Melhor tempo em execuções limpas e pico de memória noutra (o tracemalloc pesa no tempo)."""
+    dt = float("inf")
+    for _ in range(REPETICOES):
+        t0 = time.perf_counter()
+        resultado = funcao(*args)
+        dt = min(dt, time.perf_counter() - t0)
+    tracemalloc.start()
+    funcao(*args)
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return resultado, dt, pico
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--horas", default="1,4,8")
+    ap.add_argument("--pasta", default="/tmp/bench_vtt")
+    ap.add_argument("--legado", action="store_true")
+    args = ap.parse_args()
+    os.makedirs(args.pasta, exist_ok=True)
+
+    print(f"{'horas':>5} | {'MB':>6} | {'falas':>7} | {'método':<7} | {'tempo':>7} | "
+          f"{'MB/s':>6} | {'pico':>8} | ok")
+    for horas in [float(h) for h in args.horas.split(",")]:
+        arq = os.path.join(args.pasta, f"sintetica_{horas:g}h.pt.vtt")
+        falas = gerar_vtt(arq, horas)
+        mb = os.path.getsize(arq) / 1e6
+
+        (arq_txt, _, n), dt, pico = medir(transcricao.converter_vtt, arq)
+        with open(arq_txt, encoding="utf-8") as f:
+            ok = f.read().splitlines() == falas
+        print(f"{horas:>5g} | {mb:>6.1f} | {len(falas):>7} | {'atual':<7} | {dt:>6.2f}s | "
+              f"{mb / dt:>6.1f} | {pico / 1e6:>6.2f}MB | {'sim' if ok else 'NÃO'}")
+
+        if args.legado:
+            linhas, dt, pico = medir(vtt_to_txt_legado, arq)
+            print(f"{horas:>5g} | {mb:>6.1f} | {len(falas):>7} | {'legado':<7} | {dt:>6.2f}s | "
+                  f"{mb / dt:>6.1f} | {pico / 1e6:>6.2f}MB | {'sim' if linhas == falas else 'NÃO'}")
+
+
+if __name__ == "__main__":
+    main()
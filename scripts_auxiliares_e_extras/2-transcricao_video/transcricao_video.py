@@ -1,65 +1,242 @@
-import sys, os, re, html, glob
-from yt_dlp import YoutubeDL
-
-# 1. URL do vídeo
-url = sys.argv[1] if len(sys.argv) > 1 else \
-      'https://youtu.be/dK1ZOCCbEDI?si=cn5LRVhjVyEpwR2A'
-
-# 2. Opções do yt-dlp: baixa só a legenda .vtt em português
-ydl_opts = {
-    'skip_download': True,
-    'writesubtitles': True,
-    'writeautomaticsub': True,
-    'subtitleslangs': ['pt'],
-    'outtmpl': '%(title)s.%(ext)s',
-}
-
-# 3. Baixa a legenda
-with YoutubeDL(ydl_opts) as ydl:
-    ydl.download([url])
-
-# 4. Converte todos os .vtt recém-baixados para .txt
-def vtt_to_txt(vtt_path):
+# -*- coding: utf-8 -*-
+"""
+Baixa as legendas (.vtt) de vídeos do YouTube com o yt-dlp e converte cada
+uma em texto corrido e em segmentos com tempo.
+
+Entrada: URLs/IDs na linha de comando, um arquivo com um por linha
+(``--arquivo``) e/ou uma aba de canal (``--canal .../streams``, ``--limite``).
+Os vídeos são processados em paralelo (``--workers``); ``--vtt`` só converte
+arquivos já baixados.
+
+Saída, por vídeo, em ``--saida``:
+  • ``<id>.<idioma>.vtt``            – legenda original
+  • ``<id>.<idioma>.txt``            – uma fala por linha
+  • ``<id>.<idioma>.segmentos.csv``  – ``inicio_s,fim_s,texto`` (segundos
+    desde o início do vídeo), para cruzar com o chat da live
+
+A conversão é uma passada só, em fluxo (memória constante mesmo com lives de
+várias horas), com as marcas ``<00:00:00.000>``, ``<c>``, ``<i>`` etc. removidas
+por uma única regex pré-compilada. A legenda automática do YouTube é
+"rolante": cada bloco repete a linha anterior antes da nova e há blocos de
+10 ms só com a repetição. Cada bloco emite apenas as linhas que não são
+continuação do que já saiu (o maior prefixo do bloco igual ao fim do texto
+emitido é descartado), então cada fala aparece uma vez, com o tempo do bloco
+em que surgiu.
+
+``benchmark_transcricao.py`` mede a conversão em legendas sintéticas longas.
+
+Uso:
+    python transcricao_video.py [URL ...] [--arquivo lista.txt]
+        [--canal URL_DA_ABA --limite 50] [--vtt arq.vtt ...]
+        [--saida legendas] [--idiomas pt] [--workers 4]
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import html
+import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterable, Iterator, List, Tuple
+
+CAMINHO_BASE = Path(__file__).resolve().parent
+PASTA_SAIDA = CAMINHO_BASE / "legendas"
+URL_PADRAO = "https://youtu.be/dK1ZOCCbEDI?si=cn5LRVhjVyEpwR2A"
+IDIOMAS = ["pt"]
+WORKERS = 4
+JANELA_SOBREPOSICAO = 3  # linhas emitidas comparadas com o início de cada bloco
+
+RE_TEMPO = re.compile(
+    r"(?:(\d+):)?(\d{2}):(\d{2})[.,](\d{3})\s+-->\s+(?:(\d+):)?(\d{2}):(\d{2})[.,](\d{3})"
+)
+RE_MARCAS = re.compile(r"<[^>]*>")  # <00:00:01.000>, <c>, </c>, <i>, <v Nome>…
+RE_ID_VIDEO = re.compile(r"(?:v=|youtu\.be/|/live/|/shorts/|/embed/)([A-Za-z0-9_-]{11})")
+
+Segmento = Tuple[float, float, str]
+
+
+# 1 ─ CONVERSÃO VTT
+def _segundos(h, m, s, ms) -> float:
+    return int(h or 0) * 3600 + int(m) * 60 + int(s) + int(ms) / 1000
+
+
+def _limpar(linha: str) -> str:
+    if "<" in linha:
+        linha = RE_MARCAS.sub("", linha)
+    if "&" in linha:
+        linha = html.unescape(linha)
+    return linha.strip()
+
+
+def segmentos_vtt(linhas: Iterable[str]) -> Iterator[Segmento]:
     """
-    Converte um arquivo .vtt em texto simples, removendo:
-      • cabeçalho WEBVTT/Kind/Language
-      • linhas de time-code
-      • tags <00:00:00.000><c>…</c> e afins
-      • duplicatas consecutivas
-    Retorna o caminho do .txt gerado.
+    Percorre as linhas de um .vtt e gera ``(inicio_s, fim_s, texto)`` para
+    cada linha de fala nova, sem as repetições da legenda rolante.
     """
-    txt_path = os.path.splitext(vtt_path)[0] + '.txt'
-    last = ''
-    out_lines = []
+    emitidas: deque = deque(maxlen=JANELA_SOBREPOSICAO)
+    tempo = ""
+    bloco: List[str] = []
+    em_bloco = False
 
-    with open(vtt_path, encoding='utf-8') as f:
-        for raw in f:
-            line = raw.rstrip('\n')
+    def novas() -> Iterator[Segmento]:
+        # maior k tal que o bloco começa com as k últimas linhas emitidas
+        k = min(len(bloco), len(emitidas))
+        while k and any(emitidas[i - k] != bloco[i] for i in range(k)):
+            k -= 1
+        if k == len(bloco):  # só repetição (ex.: blocos de 10 ms)
+            return
+        m = RE_TEMPO.search(tempo)  # o tempo só é lido quando há fala nova
+        if not m:
+            return
+        g = m.groups()
+        inicio, fim = _segundos(*g[:4]), _segundos(*g[4:])
+        for texto in bloco[k:]:
+            emitidas.append(texto)
+            yield inicio, fim, texto
 
-            # ignora cabeçalhos e linhas vazias
-            if line.startswith(('WEBVTT', 'Kind:', 'Language:')) or not line:
-                continue
-            # ignora time-codes
-            if '-->' in line:
+    for bruta in linhas:
+        linha = bruta.rstrip("\r\n")
+        if em_bloco:
+            if linha:
+                texto = _limpar(linha)
+                if texto:
+                    bloco.append(texto)
                 continue
+            yield from novas()
+            em_bloco = False
+        elif "-->" in linha:
+            tempo = linha
+            bloco = []
+            em_bloco = True
+        # cabeçalho (WEBVTT, Kind:, Language:), NOTE/STYLE e identificadores
+        # de bloco ficam fora de um bloco e são ignorados
+    if em_bloco:
+        yield from novas()
+
+
+def converter_vtt(arq_vtt: Path) -> Tuple[Path, Path, int]:
+    """Grava ``.txt`` e ``.segmentos.csv`` ao lado do .vtt; devolve (txt, csv, n)."""
+    arq_vtt = Path(arq_vtt)
+    base = arq_vtt.with_suffix("")
+    arq_txt = base.with_suffix(base.suffix + ".txt")
+    arq_csv = base.with_suffix(base.suffix + ".segmentos.csv")
+    n = 0
+    with open(arq_vtt, encoding="utf-8") as f, \
+         open(arq_txt, "w", encoding="utf-8") as ftxt, \
+         open(arq_csv, "w", newline="", encoding="utf-8") as fcsv:
+        wr = csv.writer(fcsv)
+        wr.writerow(["inicio_s", "fim_s", "texto"])
+        for inicio, fim, texto in segmentos_vtt(f):
+            ftxt.write(texto + "\n")
+            wr.writerow([f"{inicio:.3f}", f"{fim:.3f}", texto])
+            n += 1
+    return arq_txt, arq_csv, n
+
+
+# 2 ─ DOWNLOAD
+def extrair_id(texto: str) -> str:
+    m = RE_ID_VIDEO.search(texto)
+    return m.group(1) if m else texto.strip()
+
+
+def listar_canal(url_canal: str, limite: int | None = None) -> List[str]:
+    """IDs dos vídeos de uma aba de canal/playlist (sem baixar nada)."""
+    from yt_dlp import YoutubeDL
+
+    opcoes = {"extract_flat": "in_playlist", "quiet": True, "skip_download": True}
+    if limite:
+        opcoes["playlistend"] = limite
+    with YoutubeDL(opcoes) as ydl:
+        info = ydl.extract_info(url_canal, download=False)
+
+    ids: List[str] = []
+    pendentes = [info]
+    while pendentes:  # a página do canal pode vir como playlist de abas
+        atual = pendentes.pop(0)
+        for entrada in atual.get("entries") or []:
+            if entrada.get("entries") is not None:
+                pendentes.append(entrada)
+            elif entrada.get("id"):
+                ids.append(entrada["id"])
+    return ids[:limite] if limite else ids
+
+
+def baixar_legendas(id_video: str, pasta: Path, idiomas: List[str]) -> List[Path]:
+    """Baixa só as legendas (manuais ou automáticas) do vídeo para ``pasta``."""
+    from yt_dlp import YoutubeDL
+
+    opcoes = {
+        "skip_download": True,
+        "writesubtitles": True,
+        "writeautomaticsub": True,
+        "subtitleslangs": idiomas,
+        "subtitlesformat": "vtt",
+        "outtmpl": str(pasta / "%(id)s.%(ext)s"),
+        "quiet": True,
+        "no_warnings": True,
+    }
+    with YoutubeDL(opcoes) as ydl:
+        ydl.download([f"https://www.youtube.com/watch?v={id_video}"])
+    return sorted(pasta.glob(f"{id_video}.*.vtt"))
+
+
+def processar(id_video: str, pasta: Path, idiomas: List[str]) -> int:
+    t0 = time.perf_counter()
+    vtts = baixar_legendas(id_video, pasta, idiomas)
+    if not vtts:
+        print(f"[{id_video}] sem legenda em {','.join(idiomas)}")
+        return 0
+    total = 0
+    for vtt in vtts:
+        _, arq_csv, n = converter_vtt(vtt)
+        total += n
+        print(f"[{id_video}] {n} segmentos → {arq_csv.name} ({time.perf_counter() - t0:.1f}s)")
+    return total
+
 
-            # remove marcas de posição/estilo
-            line = re.sub(r'<\d{2}:\d{2}:\d{2}\.\d{3}>', '', line)  # <00:00:00.000>
-            line = re.sub(r'</?c[^>]*>', '', line)                 # <c>…</c>
-            line = re.sub(r'</?i>', '', line)                      # itálico
-            line = html.unescape(line).strip()
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Legendas do YouTube → texto e segmentos com tempo.")
+    ap.add_argument("videos", nargs="*", help="URLs ou IDs de vídeos")
+    ap.add_argument("--arquivo", type=Path, help="arquivo com um ID/URL por linha")
+    ap.add_argument("--canal", help="URL de aba de canal ou playlist (ex.: .../streams)")
+    ap.add_argument("--limite", type=int, help="máximo de vídeos do --canal")
+    ap.add_argument("--vtt", type=Path, nargs="+", help="só converte estes .vtt")
+    ap.add_argument("--saida", type=Path, default=PASTA_SAIDA)
+    ap.add_argument("--idiomas", default=",".join(IDIOMAS), help="ex.: pt,pt-BR")
+    ap.add_argument("--workers", type=int, default=WORKERS, help="vídeos em paralelo")
+    args = ap.parse_args()
 
-            # evita linhas duplicadas em sequência
-            if line and line != last:
-                out_lines.append(line)
-                last = line
+    if args.vtt:
+        for vtt in args.vtt:
+            arq_txt, _, n = converter_vtt(vtt)
+            print(f"Legenda convertida: {arq_txt} ({n} segmentos)")
+        return
 
-    with open(txt_path, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(out_lines))
+    entradas = list(args.videos)
+    if args.arquivo:
+        entradas += [l for l in args.arquivo.read_text(encoding="utf-8").splitlines() if l.strip()]
+    ids = [extrair_id(e) for e in entradas]
+    if args.canal:
+        ids += listar_canal(args.canal, args.limite)
+    ids = list(dict.fromkeys(ids)) or [extrair_id(URL_PADRAO)]
+    args.saida.mkdir(parents=True, exist_ok=True)
+    idiomas = [i.strip() for i in args.idiomas.split(",") if i.strip()]
 
-    return txt_path
+    t0 = time.perf_counter()
+    total = 0
+    with ThreadPoolExecutor(args.workers) as pool:
+        futuros = {pool.submit(processar, vid, args.saida, idiomas): vid for vid in ids}
+        for fut in as_completed(futuros):
+            try:
+                total += fut.result()
+            except Exception as e:
+                print(f"[{futuros[fut]}] erro: {e}")
+    print(f"\n{len(ids)} vídeos, {total} segmentos em {time.perf_counter() - t0:.1f}s")
 
-for vtt in glob.glob('*.vtt'):
-    txt = vtt_to_txt(vtt)
-    print(f'Legenda convertida: {txt}')
 
+if __name__ == "__main__":
+    main()
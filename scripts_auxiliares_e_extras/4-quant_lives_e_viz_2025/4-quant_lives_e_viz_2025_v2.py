@@ -1,19 +1,53 @@
 # -*- coding: utf-8 -*-
-import os, csv, time, re
-from datetime import datetime
-from dotenv import load_dotenv
-from googleapiclient.discovery import build
-import pandas as pd
-import isodate
+"""
+Quantidade de lives e visualizações de 2025 por canal.
 
-# 1 ─ CONFIGURAÇÃO GERAL
-load_dotenv()
-API_KEY = os.getenv("YOUTUBE_API_KEY")
-if not API_KEY:
-    raise RuntimeError("Variável YOUTUBE_API_KEY não encontrada no .env")
+Para cada canal:
+  1. percorre a playlist de uploads (``UU…``, 1 u por página de 50) do mais
+     novo para o mais antigo e para de paginar assim que uma página inteira
+     fica antes do início do período (em vez de ``search().list``, 100 u por
+     página, que lista o canal inteiro);
+  2. busca os detalhes só dos vídeos do período, em lotes de 50 IDs
+     (``videos().list``, 1 u por lote);
+  3. guarda os detalhes em ``dados_calvoesfera/cache/<canal>.json``: rodar de
+     novo só consulta os vídeos novos (``--atualizar`` refaz as estatísticas)
+     e, se a execução cair, o que já foi baixado não se perde.
+
+Os canais são processados em paralelo (``--workers``) com o
+``YouTubeAPIManager`` do monitor (rotação de chaves e quota compartilhada).
+Ao fim de cada canal, mostra a quota gasta e o tempo.
+
+As chaves vêm de ``monitor_de_lives/scripts/youtube_api_config.py`` (copie
+``youtube_api_config_exemplo.py``), não mais de ``YOUTUBE_API_KEY`` no ``.env``.
+
+Uso:
+    python 4-quant_lives_e_viz_2025_v2.py [--inicio 2025-01-01] [--fim 2026-01-01]
+        [--workers 4] [--atualizar] [--detalhes]
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+
+import isodate
+import pandas as pd
 
-youtube = build("youtube", "v3", developerKey=API_KEY)
+# módulos compartilhados com o monitor de lives
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "monitor_de_lives" / "scripts"))
+from youtube_api_singleton import YouTubeAPIManager  # noqa: E402
 
+# 1 ─ CONFIGURAÇÃO GERAL
 CANAIS = {
     "luangameplay":      "UCddN6tViXZMEOfvO-rqfbNg",
     "fabiojunior":       "UC1WdbwLH7azQtv3BAnYt_vg",
@@ -25,118 +59,207 @@ CANAIS = {
 }
 
 PASTA_SAIDA = "dados_calvoesfera"
-os.makedirs(PASTA_SAIDA, exist_ok=True)
+PASTA_CACHE = os.path.join(PASTA_SAIDA, "cache")
+INICIO_PADRAO = "2025-01-01"
+FIM_PADRAO = "2026-01-01"       # exclusivo
+LOTE_VIDEOS = 50
+WORKERS = 4
+PARTES_VIDEO = "snippet,statistics,contentDetails,liveStreamingDetails"
 
 REGEX_NUM = re.compile(r"[^\d]")
 
+_trava_print = threading.Lock()
+
+
 def limpa_num(s):
     return int(REGEX_NUM.sub("", str(s)) or 0) if s else 0
 
+
+def data_iso(texto: str) -> datetime:
+    return datetime.fromisoformat(texto.replace("Z", "+00:00"))
+
+
 # 2 ─ FUNÇÕES AUXILIARES
 def eh_live_gravada(video):
     lsd = video.get("liveStreamingDetails", {})
     return bool(lsd.get("actualStartTime") or lsd.get("scheduledStartTime"))
 
+
 def duracao_em_segundos(iso):
     try:
         return int(isodate.parse_duration(iso).total_seconds())
     except Exception:
         return 0
 
+
+def registro_video(v: dict) -> dict:
+    """O que o relatório usa de cada vídeo (é isso que vai para o cache)."""
+    return {
+        "titulo": v["snippet"]["title"],
+        "data": v["snippet"]["publishedAt"],
+        "views": limpa_num(v.get("statistics", {}).get("viewCount")),
+        "duracao_s": duracao_em_segundos(v.get("contentDetails", {}).get("duration", "")),
+        "live": eh_live_gravada(v),
+    }
+
+
+class ColetaCanal:
+    """Inventário de um canal no período, com cache e contagem de quota."""
+
+    def __init__(self, api: YouTubeAPIManager, apelido: str, canal_id: str,
+                 inicio: datetime, fim: datetime) -> None:
+        self.api = api
+        self.apelido = apelido
+        self.canal_id = canal_id
+        self.inicio = inicio
+        self.fim = fim
+        self.unidades = 0
+        self.arq_cache = Path(PASTA_CACHE) / f"{apelido}.json"
+        self.cache = self._ler_cache()
+
+    def _ler_cache(self) -> dict:
+        try:
+            return json.loads(self.arq_cache.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {"videos": {}}
+
+    def _salvar_cache(self) -> None:
+        tmp = self.arq_cache.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.cache, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.arq_cache)
+
+    def _requisitar(self, metodo, **params) -> dict:
+        self.unidades += 1  # playlistItems/videos/channels.list: 1 u cada
+        return self.api.executar_requisicao(metodo, **params)
+
+    # 3.1 – IDs do período pela playlist de uploads (mais novos primeiro)
+    def ids_no_periodo(self) -> List[str]:
+        playlist = "UU" + self.canal_id[2:]
+        ids, token = [], None
+        while True:
+            resp = self._requisitar(
+                lambda c, **kw: c.playlistItems().list(**kw),
+                part="contentDetails", playlistId=playlist,
+                maxResults=LOTE_VIDEOS, pageToken=token,
+            )
+            datas = []
+            for item in resp.get("items", []):
+                det = item["contentDetails"]
+                quando = data_iso(det.get("videoPublishedAt") or "1970-01-01T00:00:00Z")
+                datas.append(quando)
+                if self.inicio <= quando < self.fim:
+                    ids.append(det["videoId"])
+            token = resp.get("nextPageToken")
+            # a ordem da playlist não é estrita (estreias, lives agendadas):
+            # só para quando a página inteira já é anterior ao período
+            if not token or (datas and max(datas) < self.inicio):
+                return ids
+
+    # 3.2 – detalhes em lotes de 50, só do que não está no cache
+    def detalhes(self, ids: List[str], atualizar: bool = False) -> List[Dict]:
+        videos = self.cache["videos"]
+        faltam = ids if atualizar else [i for i in ids if i not in videos]
+        for i in range(0, len(faltam), LOTE_VIDEOS):
+            vresp = self._requisitar(
+                lambda c, **kw: c.videos().list(**kw),
+                id=",".join(faltam[i:i + LOTE_VIDEOS]), part=PARTES_VIDEO,
+            )
+            for v in vresp.get("items", []):
+                videos[v["id"]] = registro_video(v)
+            self._salvar_cache()
+        return [dict(videos[i], id=i) for i in ids if i in videos]
+
+    # 3.3 – inscritos (sempre atual)
+    def inscritos(self) -> int:
+        subs = self._requisitar(
+            lambda c, **kw: c.channels().list(**kw), id=self.canal_id, part="statistics",
+        )
+        if subs.get("items"):
+            return limpa_num(subs["items"][0]["statistics"].get("subscriberCount"))
+        with _trava_print:
+            print(f"   [AVISO] Canal '{self.apelido}' não encontrado ou banido.")
+        return 0
+
+
 # 3 ─ COLETA E PROCESSAMENTO
-resumo_canais = []
-
-for apelido, canal_id in CANAIS.items():
-    print(f"Coletando: {apelido}")
-
-    # 3.1 – busca todos os IDs de vídeos do canal
-    search_params = dict(
-        channelId=canal_id,
-        part="id",
-        maxResults=50,
-        order="date",
-        type="video",
-    )
-    ids = []
-    resp = youtube.search().list(**search_params).execute()
-    while True:
-        ids.extend(item["id"]["videoId"] for item in resp.get("items", []))
-        if "nextPageToken" not in resp:
-            break
-        search_params["pageToken"] = resp["nextPageToken"]
-        resp = youtube.search().list(**search_params).execute()
-        time.sleep(1)
-
-    # 3.2 – coleta metadados em lotes
-    detalhes = []
-    live_views_2025 = 0
-    total_views_2025 = 0
-    lives_2025 = 0
-
-    for i in range(0, len(ids), 50):
-        lote = ",".join(ids[i:i+50])
-        vresp = youtube.videos().list(
-            id=lote,
-            part="snippet,statistics,contentDetails,liveStreamingDetails,recordingDetails",
-        ).execute()
-
-        for v in vresp.get("items", []):
-            snippet = v["snippet"]
-            data_pub = datetime.fromisoformat(snippet["publishedAt"].replace("Z", "+00:00"))
-            if data_pub.year != 2025:
-                continue
-
-            views = limpa_num(v.get("statistics", {}).get("viewCount"))
-            total_views_2025 += views
-
-            flag_live = eh_live_gravada(v)
-            if flag_live:
-                live_views_2025 += views
-                lives_2025 += 1
-
-            detalhes.append([
-                snippet["title"],
-                data_pub.isoformat(),
-                f"https://www.youtube.com/watch?v={v['id']}",
-                views,
-                duracao_em_segundos(v["contentDetails"].get("duration", "")),
-                "live" if flag_live else "upload",
-            ])
-        time.sleep(1)
-
-    # # 3.3 – salva CSV com TODOS os vídeos de 2025
-    # arq_csv = os.path.join(PASTA_SAIDA, f"detalhes_{apelido}_2025.csv")
-    # with open(arq_csv, "w", newline="", encoding="utf-8") as f:
-    #     wr = csv.writer(f)
-    #     wr.writerow(["Título", "Data", "URL", "Visualizações", "Duração (s)", "Foi Live?"])
-    #     wr.writerows(detalhes)
-    # print(f"   → {len(detalhes)} vídeos de 2025 salvos em {arq_csv}")
-
-    # 3.4 – info de inscritos para o resumo
-    subs = youtube.channels().list(id=canal_id, part="statistics").execute()
-    if subs.get("items") and len(subs["items"]) > 0:
-        inscritos = limpa_num(subs["items"][0]["statistics"].get("subscriberCount"))
-    else:
-        inscritos = 0  # ou None, se preferir
-        print(f"   [AVISO] Canal '{apelido}' não encontrado ou banido.")
-
-    resumo_canais.append({
+def coletar_canal(api: YouTubeAPIManager, apelido: str, canal_id: str, inicio: datetime,
+                  fim: datetime, atualizar: bool, salvar_detalhes: bool) -> dict:
+    t0 = time.perf_counter()
+    coleta = ColetaCanal(api, apelido, canal_id, inicio, fim)
+    ids = coleta.ids_no_periodo()
+    em_cache = sum(1 for i in ids if i in coleta.cache["videos"])
+    videos = coleta.detalhes(ids, atualizar)
+    inscritos = coleta.inscritos()
+
+    lives = [v for v in videos if v["live"]]
+    if salvar_detalhes:
+        arq_csv = os.path.join(PASTA_SAIDA, f"detalhes_{apelido}_{inicio.year}.csv")
+        with open(arq_csv, "w", newline="", encoding="utf-8") as f:
+            wr = csv.writer(f)
+            wr.writerow(["Título", "Data", "URL", "Visualizações", "Duração (s)", "Foi Live?"])
+            wr.writerows([v["titulo"], v["data"], f"https://www.youtube.com/watch?v={v['id']}",
+                          v["views"], v["duracao_s"], "live" if v["live"] else "upload"]
+                         for v in videos)
+
+    with _trava_print:
+        print(f"{apelido}: {len(videos)} vídeos no período ({em_cache} do cache), "
+              f"{len(lives)} lives | {coleta.unidades} u | {time.perf_counter() - t0:.1f}s")
+    return {
         "Canal": apelido,
         "Inscritos (atual)": inscritos,
-        "Lives 2025": lives_2025,
-        "Views Lives 2025": live_views_2025,
-        "Views Totais 2025": total_views_2025,
-    })
-
-# 4 ─ RELATÓRIO FINAL
-df = (pd.DataFrame(resumo_canais)
-        .sort_values("Views Totais 2025", ascending=False)
-        .reset_index(drop=True))
-
-# salva o resumo
-arq_resumo = os.path.join(PASTA_SAIDA, "resumo_canais_2025.csv")
-df.to_csv(arq_resumo, index=False, encoding="utf-8")
-print(f"\nResumo salvo em {arq_resumo}")
-
-# (opcional) exibir no prompt
-print(df.to_string(index=False))
+        f"Lives {inicio.year}": len(lives),
+        f"Views Lives {inicio.year}": sum(v["views"] for v in lives),
+        f"Views Totais {inicio.year}": sum(v["views"] for v in videos),
+        "_unidades": coleta.unidades,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Lives e visualizações por canal num período.")
+    ap.add_argument("--inicio", default=INICIO_PADRAO, help="AAAA-MM-DD (inclusivo)")
+    ap.add_argument("--fim", default=FIM_PADRAO, help="AAAA-MM-DD (exclusivo)")
+    ap.add_argument("--workers", type=int, default=WORKERS, help="canais em paralelo")
+    ap.add_argument("--atualizar", action="store_true",
+                    help="refaz as estatísticas dos vídeos já em cache")
+    ap.add_argument("--detalhes", action="store_true",
+                    help="salva também um CSV com os vídeos de cada canal")
+    args = ap.parse_args()
+
+    inicio = datetime.fromisoformat(args.inicio).replace(tzinfo=timezone.utc)
+    fim = datetime.fromisoformat(args.fim).replace(tzinfo=timezone.utc)
+    os.makedirs(PASTA_CACHE, exist_ok=True)
+    api = YouTubeAPIManager.obter_instancia()
+
+    t0 = time.perf_counter()
+    resumo_canais = []
+    with ThreadPoolExecutor(args.workers) as pool:
+        futuros = {
+            pool.submit(coletar_canal, api, apelido, canal_id, inicio, fim,
+                        args.atualizar, args.detalhes): apelido
+            for apelido, canal_id in CANAIS.items()
+        }
+        for fut in as_completed(futuros):
+            try:
+                resumo_canais.append(fut.result())
+            except Exception as e:
+                print(f"   [ERRO] {futuros[fut]}: {e}")
+
+    unidades = sum(r.pop("_unidades") for r in resumo_canais)
+    print(f"\nTotal: {unidades} u de quota em {time.perf_counter() - t0:.1f}s")
+
+    # 4 ─ RELATÓRIO FINAL
+    df = (pd.DataFrame(resumo_canais)
+            .sort_values(f"Views Totais {inicio.year}", ascending=False)
+            .reset_index(drop=True))
+
+    # salva o resumo
+    arq_resumo = os.path.join(PASTA_SAIDA, f"resumo_canais_{inicio.year}.csv")
+    df.to_csv(arq_resumo, index=False, encoding="utf-8")
+    print(f"\nResumo salvo em {arq_resumo}")
+
+    # (opcional) exibir no prompt
+    print(df.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Gera um dataset unificado sintético e mede o tempo de ``gerar_descricao_dataset``.
+
+O dataset imita a saída do ``unificar_chats_com_metadados.py``
+(``dataset_unificado.csv`` + ``dimensao_lives.csv``, ou o diretório Parquet
+com ``--formato parquet``), com horários ISO 8601 em UTC misturando ``Z`` e
+``+00:00`` e frações de segundo, como nos dados reais, e ``timestamp_us`` (a
+não ser com ``--sem-timestamp-us``). É gerado em blocos, então
+cabe em memória mesmo com dezenas de milhões de linhas.
+
+Em seguida mede o motor atual (uma passada em blocos) e, se ``--legado``, o
+método antigo (``read_csv`` completo + ``format='mixed'`` + dois groupbys),
+conferindo que as duas tabelas são iguais.
+
+Uso:
+    python benchmark_descricao_dataset.py [--linhas 50000000] [--lives 2000]
+        [--canais 40] [--formato csv|parquet] [--saida PASTA] [--legado]
+        [--sem-timestamp-us]
+"""
+
+import argparse
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+import gerar_descricao_dataset as descricao
+
+TAM_BLOCO = 2_000_000
+INICIO = pd.Timestamp("2025-06-14T21:00:00", tz="UTC")
+DURACAO_LIVE_S = 4 * 3600
+
+
+def gerar_fixture(pasta, linhas, n_lives, n_canais, formato, com_us=True, semente=42):
+    """Escreve o dataset sintético em ``pasta`` e devolve o caminho dele."""
+    rng = np.random.default_rng(semente)
+    ids = np.array([f"VID{v:08d}" for v in range(n_lives)])
+    inicio_live = INICIO + pd.to_timedelta(rng.integers(0, 60 * 86400, n_lives), unit="s")
+
+    os.makedirs(pasta, exist_ok=True)
+    pd.DataFrame({
+        "id_video": ids,
+        "canal": [f"canal_{v % n_canais:03d}" for v in range(n_lives)],
+        "data_inicio_live": inicio_live.strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }).to_csv(os.path.join(pasta, "dimensao_lives.csv"), index=False)
+
+    destino = os.path.join(pasta, "dataset_unificado" + (".csv" if formato == "csv" else ""))
+    if os.path.isdir(destino):
+        shutil.rmtree(destino)
+    elif os.path.exists(destino):
+        os.remove(destino)
+    if formato == "parquet":
+        os.makedirs(destino)
+    for n, i in enumerate(range(0, linhas, TAM_BLOCO)):
+        m = min(TAM_BLOCO, linhas - i)
+        live = rng.integers(0, n_lives, m)
+        ts = (inicio_live.values.astype("datetime64[ms]")[live]
+              + rng.integers(0, DURACAO_LIVE_S * 1000, m).astype("timedelta64[ms]"))
+        sufixo = np.where(rng.random(m) < 0.5, "Z", "+00:00")
+        bloco = pd.DataFrame({
+            "id_video": ids[live],
+            "timestamp": np.char.add(np.datetime_as_string(ts, unit="ms"), sufixo),
+            "autor": np.char.add("autor_", rng.integers(0, 200_000, m).astype(str)),
+            "mensagem": "kkkkkk",
+            "id_mensagem": np.char.add("M", np.arange(i, i + m).astype(str)),
+        })
+        if com_us:
+            bloco["timestamp_us"] = ts.astype("datetime64[us]").astype("int64")
+        if formato == "parquet":
+            bloco.to_parquet(os.path.join(destino, f"parte-{n:05d}.parquet"), index=False)
+        else:
+            bloco.to_csv(destino, mode="a", header=(i == 0), index=False)
+    return destino
+
+
+def tabela_legado(caminho_dataset, caminho_dimensao):
+    """Versão anterior do relatório (carrega o CSV inteiro)."""
+    df = pd.read_csv(caminho_dataset)
+    dim = pd.read_csv(caminho_dimensao, usecols=['id_video', 'canal'])
+    df = df.merge(dim, on='id_video', how='left')
+    df['timestamp'] = pd.to_datetime(df['timestamp'], format='mixed', utc=True)
+    lives_por_canal = df.groupby('canal')['id_video'].nunique().reset_index(name='Live Count')
+    return pd.DataFrame({
+        'Canal': lives_por_canal['canal'],
+        'Live Count': lives_por_canal['Live Count'],
+        'Total Mensagens': df.groupby('canal').size().reindex(lives_por_canal['canal']).values,
+    })
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--linhas", type=int, default=50_000_000)
+    ap.add_argument("--lives", type=int, default=2_000)
+    ap.add_argument("--canais", type=int, default=40)
+    ap.add_argument("--formato", choices=("csv", "parquet"), default="csv")
+    ap.add_argument("--saida", default="fixture_dataset")
+    ap.add_argument("--legado", action="store_true", help="mede também o método antigo")
+    ap.add_argument("--sem-timestamp-us", action="store_true",
+                    help="dataset sem a coluna timestamp_us (unificações antigas)")
+    args = ap.parse_args()
+
+    dimensao = os.path.join(args.saida, "dimensao_lives.csv")
+    t0 = time.perf_counter()
+    dataset = gerar_fixture(args.saida, args.linhas, args.lives, args.canais, args.formato,
+                            com_us=not args.sem_timestamp_us)
+    print(f"- Fixture: {args.linhas} linhas em {dataset} ({time.perf_counter() - t0:.1f}s)")
+
+    t0 = time.perf_counter()
+    tabela, inicio, fim, total = descricao.tabela_do_dataset(dataset, dimensao)
+    print(f"- Motor em blocos: {time.perf_counter() - t0:.1f}s "
+          f"({total} mensagens, {len(tabela)} canais, {inicio:%d/%m/%Y %H:%M} a {fim:%d/%m/%Y %H:%M})")
+
+    if args.legado and args.formato == "csv":
+        t0 = time.perf_counter()
+        antiga = tabela_legado(dataset, dimensao)
+        print(f"- Método antigo:   {time.perf_counter() - t0:.1f}s")
+        iguais = antiga.reset_index(drop=True).astype(str).equals(
+            tabela.reset_index(drop=True).astype(str))
+        print(f"- Tabelas iguais: {'sim' if iguais else 'NÃO'}")
+
+
+if __name__ == "__main__":
+    main()
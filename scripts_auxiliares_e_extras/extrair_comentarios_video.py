@@ -1,78 +1,211 @@
 # -*- coding: utf-8 -*-
 """
-Extrai **todos** os comentários (top-level + respostas) de um vídeo do YouTube
-e grava em CSV.
+Extrai **todos** os comentários (top-level + respostas) de vídeos do YouTube
+e grava um CSV por vídeo.
+
+- Em fluxo: cada página de ``commentThreads`` vai para o CSV assim que chega,
+  então a memória não cresce com o número de comentários.
+- Respostas completas: ``commentThreads`` traz no máximo 5 respostas por
+  comentário; quando ``totalReplyCount`` é maior, a conversa inteira é
+  baixada com ``comments().list(parentId=...)`` num pool de threads próprio
+  (com no máximo ``MAX_CONVERSAS_PENDENTES`` conversas na fila). Uma conversa
+  que falha (ex.: comentário pai apagado, 404) é avisada com o ID do pai e
+  não invalida o vídeo; só erros nas páginas de ``commentThreads`` invalidam.
+- Vários vídeos: IDs/URLs na linha de comando e/ou num arquivo (``--arquivo``),
+  processados por ``--workers`` threads.
+- Chaves: usa o ``YouTubeAPIManager`` do monitor (rotação de chaves e
+  controle de quota compartilhados), configurado em ``youtube_api_config.py``.
 
 Pré-requisitos
 --------------
-pip install google-api-python-client python-dotenv
+pip install google-api-python-client httplib2
++ monitor_de_lives/scripts/youtube_api_config.py com as chaves
 
-Crie um arquivo .env na mesma pasta com:
-YOUTUBE_API_KEY=SUAS_CHAVE_AQUI
+Uso
+---
+python extrair_comentarios_video.py CNCMa4MizY0 [URL ...] [--arquivo ids.txt]
+    [--saida pasta] [--workers 4] [--workers-respostas 8]
 """
 
-from googleapiclient.discovery import build
-from dotenv import load_dotenv
-from pathlib import Path
+from __future__ import annotations
+
+import argparse
 import csv
-import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+from googleapiclient.errors import HttpError
+
+# módulos compartilhados com o monitor de lives
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "monitor_de_lives" / "scripts"))
+from youtube_api_singleton import YouTubeAPIManager  # noqa: E402
 
 # Configuração
 CAMINHO_BASE = Path(__file__).resolve().parent
-load_dotenv(CAMINHO_BASE / ".env") # lê .env na pasta do script
-
-CHAVE_API   = os.getenv("YOUTUBE_API_KEY")
-ID_VIDEO    = "CNCMa4MizY0" # trocar pelo ID desejado
-ARQ_SAIDA   = CAMINHO_BASE / "comentarios.csv"
-TAM_PAGINA  = 100 # máximo permitido pela API
-
-# Funções
-def extrair_comentarios(id_video: str, chave_api: str, arq_saida: Path) -> None:
-    """Baixa comentários (inclui replies) e salva no CSV indicado."""
-    youtube = build("youtube", "v3", developerKey=chave_api, cache_discovery=False)
-    comentarios: list[list[str]] = []
-
-    requisicao = youtube.commentThreads().list(
-        part="snippet,replies", # inclui respostas aos proprios comentarios
-        videoId=id_video,
-        maxResults=TAM_PAGINA,
-        textFormat="plainText"
-    )
-
-    while requisicao:
-        resposta = requisicao.execute()
-
-        for item in resposta.get("items", []):
-            # ── comentário de nível superior ──
-            topo = item["snippet"]["topLevelComment"]["snippet"]
-            comentarios.append([
-                topo["authorDisplayName"],
-                topo["publishedAt"],
-                topo["textDisplay"]
-            ])
-
-            # ── replies (se houver) ──
-            for reply in item.get("replies", {}).get("comments", []):
-                r = reply["snippet"]
-                comentarios.append([
-                    r["authorDisplayName"],
-                    r["publishedAt"],
-                    r["textDisplay"]
-                ])
-
-        requisicao = youtube.commentThreads().list_next(requisicao, resposta)
-
-    # grava em CSV
-    with arq_saida.open("w", newline="", encoding="utf-8") as f:
-        escritor = csv.writer(f)
-        escritor.writerow(["autor", "data_publicacao", "comentario"])
-        escritor.writerows(comentarios)
-
-    print(f"{len(comentarios)} comentários salvos em {arq_saida}")
+PASTA_SAIDA = CAMINHO_BASE / "comentarios"
+TAM_PAGINA = 100               # máximo permitido pela API
+WORKERS_VIDEOS = 4
+WORKERS_RESPOSTAS = 8
+MAX_CONVERSAS_PENDENTES = 64   # por vídeo: limita a fila (e a memória) de respostas a buscar
+
+CAMPOS = ["id_video", "id_comentario", "id_pai", "autor", "data_publicacao",
+          "comentario", "curtidas"]
+
+RE_ID_VIDEO = re.compile(r"(?:v=|youtu\.be/|/live/|/shorts/|/embed/)([A-Za-z0-9_-]{11})")
+
+
+def extrair_id(texto: str) -> str:
+    m = RE_ID_VIDEO.search(texto)
+    return m.group(1) if m else texto.strip()
+
+
+def linha(snippet: Dict, id_video: str, id_comentario: str, id_pai: str = "") -> List:
+    return [
+        id_video,
+        id_comentario,
+        id_pai,
+        snippet.get("authorDisplayName", ""),
+        snippet.get("publishedAt", ""),
+        snippet.get("textDisplay", ""),
+        snippet.get("likeCount", 0),
+    ]
+
+
+def paginas(api: YouTubeAPIManager, metodo, **params) -> Iterator[Dict]:
+    """Percorre as páginas de um ``list`` da API, uma requisição por vez."""
+    token = None
+    while True:
+        resp = api.executar_requisicao(metodo, pageToken=token, **params)
+        yield resp
+        token = resp.get("nextPageToken")
+        if not token:
+            return
+
+
+class SaidaCSV:
+    """CSV compartilhado pelas threads de um vídeo (escrita protegida por trava)."""
+
+    def __init__(self, arq: Path) -> None:
+        self._fp = arq.open("w", newline="", encoding="utf-8")
+        self._csv = csv.writer(self._fp)
+        self._csv.writerow(CAMPOS)
+        self._trava = threading.Lock()
+        self.linhas = 0
+
+    def gravar(self, linhas: List[List]) -> None:
+        if not linhas:
+            return
+        with self._trava:
+            self._csv.writerows(linhas)
+            self._fp.flush()
+            self.linhas += len(linhas)
+
+    def fechar(self) -> None:
+        self._fp.close()
+
+
+def baixar_respostas(api: YouTubeAPIManager, id_video: str, id_pai: str,
+                     saida: SaidaCSV) -> None:
+    """Todas as respostas de um comentário, página a página."""
+    for resp in paginas(api, lambda c, **kw: c.comments().list(**kw),
+                        part="snippet", parentId=id_pai,
+                        maxResults=TAM_PAGINA, textFormat="plainText"):
+        saida.gravar([linha(r["snippet"], id_video, r["id"], id_pai)
+                      for r in resp.get("items", [])])
+
+
+def extrair_comentarios(id_video: str, arq_saida: Path, pool_respostas: ThreadPoolExecutor,
+                        api: YouTubeAPIManager | None = None) -> int:
+    """Baixa comentários (inclui todas as respostas) e salva no CSV indicado."""
+    api = api or YouTubeAPIManager.obter_instancia()
+    saida = SaidaCSV(arq_saida)
+    vagas = threading.BoundedSemaphore(MAX_CONVERSAS_PENDENTES)
+
+    def concluida(id_pai: str, fut) -> None:
+        vagas.release()
+        if fut.exception():
+            print(f"[{id_video}] respostas de {id_pai} não baixadas: {fut.exception()}")
+
+    try:
+        for resp in paginas(api, lambda c, **kw: c.commentThreads().list(**kw),
+                            part="snippet,replies", videoId=id_video,
+                            maxResults=TAM_PAGINA, textFormat="plainText"):
+            lote = []
+            for item in resp.get("items", []):
+                # ── comentário de nível superior ──
+                topo = item["snippet"]["topLevelComment"]
+                lote.append(linha(topo["snippet"], id_video, topo["id"]))
+
+                # ── replies: as embutidas bastam se vieram todas ──
+                embutidas = item.get("replies", {}).get("comments", [])
+                if item["snippet"].get("totalReplyCount", 0) <= len(embutidas):
+                    lote.extend(linha(r["snippet"], id_video, r["id"], topo["id"])
+                                for r in embutidas)
+                    continue
+                vagas.acquire()  # espera se já há conversas demais na fila
+                pool_respostas.submit(
+                    baixar_respostas, api, id_video, topo["id"], saida
+                ).add_done_callback(partial(concluida, topo["id"]))
+            saida.gravar(lote)
+    finally:
+        # espera as conversas em andamento (todas as vagas de volta) antes de fechar
+        for _ in range(MAX_CONVERSAS_PENDENTES):
+            vagas.acquire()
+        saida.fechar()
+    return saida.linhas
+
+
+def processar(id_video: str, pasta: Path, pool_respostas: ThreadPoolExecutor) -> int | None:
+    t0 = time.perf_counter()
+    arq = pasta / f"comentarios_{id_video}.csv"
+    try:
+        n = extrair_comentarios(id_video, arq, pool_respostas)
+    except HttpError as e:
+        motivo = "comentários desativados" if b"commentsDisabled" in e.content else e
+        print(f"[{id_video}] ignorado: {motivo}")
+        return None
+    print(f"[{id_video}] {n} comentários salvos em {arq} ({time.perf_counter() - t0:.1f}s)")
+    return n
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Extrai os comentários de vídeos do YouTube.")
+    ap.add_argument("videos", nargs="*", help="IDs ou URLs de vídeos")
+    ap.add_argument("--arquivo", type=Path, help="arquivo com um ID/URL por linha")
+    ap.add_argument("--saida", type=Path, default=PASTA_SAIDA)
+    ap.add_argument("--workers", type=int, default=WORKERS_VIDEOS, help="vídeos em paralelo")
+    ap.add_argument("--workers-respostas", type=int, default=WORKERS_RESPOSTAS,
+                    help="threads para baixar conversas longas")
+    args = ap.parse_args()
+
+    entradas = list(args.videos)
+    if args.arquivo:
+        entradas += [l for l in args.arquivo.read_text(encoding="utf-8").splitlines() if l.strip()]
+    ids = list(dict.fromkeys(extrair_id(e) for e in entradas))
+    if not ids:
+        ap.error("informe ao menos um vídeo")
+    args.saida.mkdir(parents=True, exist_ok=True)
+
+    t0 = time.perf_counter()
+    total = 0
+    with ThreadPoolExecutor(args.workers_respostas, thread_name_prefix="respostas") as respostas, \
+         ThreadPoolExecutor(args.workers, thread_name_prefix="videos") as videos:
+        futuros = {videos.submit(processar, vid, args.saida, respostas): vid for vid in ids}
+        for fut in as_completed(futuros):
+            try:
+                total += fut.result() or 0
+            except Exception as e:
+                print(f"[{futuros[fut]}] erro: {e}")
+
+    print(f"\n{len(ids)} vídeos, {total} comentários em {time.perf_counter() - t0:.1f}s")
 
 
 # Execução
 if __name__ == "__main__":
-    if not CHAVE_API:
-        raise RuntimeError("Defina YOUTUBE_API_KEY no arquivo .env.")
-    extrair_comentarios(ID_VIDEO, CHAVE_API, ARQ_SAIDA)
\ No newline at end of file
+    main()
@@ -1,41 +1,209 @@
+"""
+Descrição do dataset: lives e mensagens por canal, período e totais.
+
+Por padrão lê o ``dataset_unificado.csv`` (ou o diretório Parquet
+``dataset_unificado/``) e ``dimensao_lives.csv``, numa única passada em
+blocos e só com as colunas ``canal``/``id_video``/``timestamp``: a memória
+não depende do número de linhas. Se o dataset tem ``timestamp_us`` (gerado
+pelo unificador atual), ele é usado direto, sem interpretar texto. Senão, com
+pyarrow instalado, a leitura do CSV e a conversão ISO 8601 dos horários são
+vetorizadas em C++; sem ele, usa ``pd.read_csv`` em blocos com
+``format="ISO8601"``. Com
+``--resumos PASTA``, usa só os ``resumo.json`` que a captura mantém em cada
+pasta de live (ver ``monitor_de_lives/scripts/resumo_live.py``), sem ler as
+mensagens — inclui também autores únicos por canal.
+
+Uso:
+    python gerar_descricao_dataset.py [--dataset dataset_unificado.csv]
+    python gerar_descricao_dataset.py --resumos /caminho/para/dados [...]
+"""
+
+import argparse
+import glob
+import json
+import os
+
 import pandas as pd
 import pytz
 
-# Carrega o dataset
-df = pd.read_csv("dataset_unificado.csv")
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # sem pyarrow: pandas em blocos
+    pa = pa_csv = None
 
-# Converte timestamp para datetime usando formato misto
-df['timestamp'] = pd.to_datetime(df['timestamp'], format='mixed', utc=True)
 tz_local = pytz.timezone('America/Sao_Paulo')
-df['timestamp_local'] = df['timestamp'].dt.tz_convert(tz_local)
+TAM_BLOCO = 1_000_000
+COLUNAS = ["canal", "id_video", "timestamp"]  # as únicas lidas do dataset
+
+
+def _colunas_presentes(colunas, existentes):
+    """Das colunas pedidas, as que existem; ``timestamp_us`` substitui ``timestamp``."""
+    if "timestamp_us" in existentes:
+        colunas = [c for c in colunas if c != "timestamp"] + ["timestamp_us"]
+    return [c for c in colunas if c in existentes]
+
+
+def _abrir_lotes(caminho, colunas):
+    """
+    Lê só ``colunas`` do dataset, em lotes (tabelas pyarrow ou DataFrames).
+    Aceita o CSV unificado ou um diretório/arquivo Parquet (partições
+    ``canal=…`` viram coluna).
+    """
+    if os.path.isdir(caminho) or caminho.endswith(".parquet"):
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(caminho, format="parquet", partitioning="hive")
+        colunas = _colunas_presentes(colunas, dataset.schema.names)
+        for lote in dataset.to_batches(columns=colunas, batch_size=TAM_BLOCO):
+            yield pa.Table.from_batches([lote])
+        return
+
+    with open(caminho, encoding="utf-8") as f:
+        cabecalho = f.readline().strip().split(",")
+    colunas = _colunas_presentes(colunas, cabecalho)
+    if pa is not None:
+        leitor = pa_csv.open_csv(
+            caminho,
+            read_options=pa_csv.ReadOptions(block_size=64 << 20),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=colunas,
+                column_types={c: pa.int64() if c == "timestamp_us" else pa.string()
+                              for c in colunas},
+            ),
+        )
+        for lote in leitor:
+            yield pa.Table.from_batches([lote])
+    else:
+        yield from pd.read_csv(caminho, usecols=colunas, dtype=str, chunksize=TAM_BLOCO)
+
 
-# Calcula o número total de mensagens
-total_mensagens = len(df)
+def _agregar_lote(lote):
+    """Mensagens, primeiro e último timestamp por live num lote."""
+    if pa is not None and isinstance(lote, pa.Table):
+        # caminho rápido: cast ISO 8601 → timestamp e agregação em C++ (pyarrow)
+        chaves = [c for c in ("canal", "id_video") if c in lote.column_names]
+        if "timestamp_us" in lote.column_names:
+            ts = lote.column("timestamp_us").cast(pa.int64()).cast(pa.timestamp("us", tz="UTC"))
+            lote = lote.drop_columns(["timestamp_us"])
+        else:
+            ts = lote.column("timestamp")
+            try:
+                ts = ts.cast(pa.timestamp("us", tz="UTC"))
+            except pa.ArrowInvalid:
+                ts = pa.array(pd.to_datetime(ts.to_pandas(), format="ISO8601", utc=True,
+                                             errors="coerce"))
+            lote = lote.drop_columns(["timestamp"])
+        lote = lote.append_column("timestamp", ts)
+        parcial = lote.group_by(chaves).aggregate(
+            [("id_video", "count"), ("timestamp", "min"), ("timestamp", "max")]
+        ).to_pandas()
+        return parcial.rename(columns={"id_video_count": "n", "timestamp_min": "inicio",
+                                       "timestamp_max": "fim"})
 
-# Número de lives por canal (contagem única de id_video por canal)
-lives_por_canal = df.groupby('canal')['id_video'].nunique().reset_index(name='Live Count')
+    chaves = [c for c in ("canal", "id_video") if c in lote.columns]
+    if "timestamp_us" in lote.columns:
+        ts = pd.to_datetime(pd.to_numeric(lote.pop("timestamp_us")), unit="us", utc=True)
+    else:
+        ts = pd.to_datetime(lote["timestamp"], format="ISO8601", utc=True, errors="coerce")
+    return lote.assign(timestamp=ts).groupby(chaves, dropna=False)["timestamp"] \
+        .agg(n="size", inicio="min", fim="max").reset_index()
 
-# Período de coleta (data mínima e máxima)
-periodo_inicio = df['timestamp_local'].min().strftime('%d/%m/%Y %H:%M')
-periodo_fim = df['timestamp_local'].max().strftime('%d/%m/%Y %H:%M')
 
-# Cria uma tabela com informações agregadas
-tabela = pd.DataFrame({
-    'Canal': lives_por_canal['canal'],
-    'Live Count': lives_por_canal['Live Count'],
-    'Total Mensagens': df.groupby('canal').size().reindex(lives_por_canal['canal']).values,
-})
+def agregar_por_live(caminho_dataset):
+    """Uma passada pelo dataset: (canal,) id_video, n, inicio, fim por live."""
+    parciais = [_agregar_lote(l) for l in _abrir_lotes(caminho_dataset, COLUNAS)]
+    if not parciais:
+        return pd.DataFrame(columns=["id_video", "n", "inicio", "fim"])
+    tudo = pd.concat(parciais, ignore_index=True)
+    chaves = [c for c in ("canal", "id_video") if c in tudo.columns]
+    return tudo.groupby(chaves, dropna=False).agg(
+        n=("n", "sum"), inicio=("inicio", "min"), fim=("fim", "max")
+    ).reset_index()
 
-# Exibe a tabela
-print("Tabela de Informações por Canal:")
-print(tabela)
 
-# Descrição do Dataset
-descricao = f"""
+def tabela_do_dataset(caminho_dataset, caminho_dimensao):
+    """(tabela por canal, início, fim, total de mensagens) a partir do dataset unificado."""
+    por_live = agregar_por_live(caminho_dataset)
+
+    # O canal fica na dimensão das lives (gerada pelo unificador); junta por id_video
+    if 'canal' not in por_live.columns:
+        dim = pd.read_csv(caminho_dimensao, usecols=['id_video', 'canal'], dtype=str)
+        por_live = por_live.merge(dim.drop_duplicates('id_video'), on='id_video', how='left')
+
+    por_canal = por_live.groupby('canal').agg(
+        lives=('id_video', 'nunique'), mensagens=('n', 'sum')
+    ).reset_index()
+    tabela = pd.DataFrame({
+        'Canal': por_canal['canal'],
+        'Live Count': por_canal['lives'],
+        'Total Mensagens': por_canal['mensagens'],
+    })
+    inicio = por_live['inicio'].min().tz_convert(tz_local)
+    fim = por_live['fim'].max().tz_convert(tz_local)
+    return tabela, inicio, fim, int(por_live['n'].sum())
+
+
+def tabela_dos_resumos(pastas_dados):
+    """Mesma tabela, somando os ``resumo.json`` das lives (sem ler mensagens)."""
+    por_canal = {}
+    primeiras, ultimas = [], []
+    for pasta in pastas_dados:
+        for arq in glob.glob(os.path.join(pasta, "*", "resumo.json")):
+            with open(arq, encoding="utf-8") as f:
+                r = json.load(f)
+            if not r.get("total"):
+                continue
+            c = por_canal.setdefault(r.get("canal") or "", {"lives": set(), "msgs": 0, "autores": set()})
+            c["lives"].add(r["id_video"])
+            c["msgs"] += r["total"]
+            c["autores"].update(r.get("autores", {}))
+            primeiras.append(r["primeira"])
+            ultimas.append(r["ultima"])
+
+    canais = sorted(por_canal)
+    tabela = pd.DataFrame({
+        'Canal': canais,
+        'Live Count': [len(por_canal[c]["lives"]) for c in canais],
+        'Total Mensagens': [por_canal[c]["msgs"] for c in canais],
+        'Autores Únicos': [len(por_canal[c]["autores"]) for c in canais],
+    })
+    inicio = pd.to_datetime(primeiras, format='mixed', utc=True).min().tz_convert(tz_local)
+    fim = pd.to_datetime(ultimas, format='mixed', utc=True).max().tz_convert(tz_local)
+    return tabela, inicio, fim, int(tabela['Total Mensagens'].sum())
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Gera a descrição do dataset.")
+    ap.add_argument("--dataset", default="dataset_unificado.csv")
+    ap.add_argument("--dimensao", default="dimensao_lives.csv")
+    ap.add_argument("--resumos", nargs="+", metavar="PASTA",
+                    help="pastas de dados com os resumo.json de cada live")
+    args = ap.parse_args()
+
+    if args.resumos:
+        tabela, inicio, fim, total_mensagens = tabela_dos_resumos(args.resumos)
+    else:
+        tabela, inicio, fim, total_mensagens = tabela_do_dataset(args.dataset, args.dimensao)
+
+    # Período de coleta (data mínima e máxima)
+    periodo_inicio = inicio.strftime('%d/%m/%Y %H:%M')
+    periodo_fim = fim.strftime('%d/%m/%Y %H:%M')
+
+    # Exibe a tabela
+    print("Tabela de Informações por Canal:")
+    print(tabela)
+
+    # Descrição do Dataset
+    descricao = f"""
 Dataset Description:
-- Canais analisados: {len(lives_por_canal)}
+- Canais analisados: {len(tabela)}
 - Período: {periodo_inicio} a {periodo_fim}
 - Total de mensagens: {total_mensagens}
-- Total de lives: {lives_por_canal['Live Count'].sum()}
+- Total de lives: {tabela['Live Count'].sum()}
 """
-print(descricao)
\ No newline at end of file
+    print(descricao)
+
+
+if __name__ == "__main__":
+    main()
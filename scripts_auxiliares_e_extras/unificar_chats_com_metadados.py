@@ -1,4 +1,37 @@
+"""
+Unifica os chats de todas as lives coletadas num único dataset.
+
+- Lê só o ``metadados.csv`` de cada pasta para decidir se a live entra no
+  intervalo (``data_inicio_live``); pastas fora do intervalo nem têm o chat
+  aberto.
+- Processa as pastas em paralelo (um processo por pasta), lendo o
+  ``chat.csv`` em blocos de ``TAM_BLOCO`` linhas e gravando cada live numa
+  parte própria: a memória usada não depende do tamanho do dataset.
+- O horário vem de ``timestamp_us`` quando existe (coletas novas ou
+  convertidas com ``converter_timestamps.py``); só as linhas sem ele têm o
+  texto ISO interpretado. No dataset unificado, toda linha tem
+  ``timestamp_us``.
+- Os metadados ficam uma única vez em ``dimensao_lives.csv`` (uma linha por
+  live), ligados às mensagens pela coluna ``id_video``, em vez de repetidos
+  em cada mensagem.
+
+Saída (em ``--saida``, padrão: diretório atual):
+    dataset_unificado.csv  (ou dataset_unificado/ com partes .parquet)
+    dimensao_lives.csv
+
+Uso:
+    python unificar_chats_com_metadados.py [--dados PASTA] [--formato csv|parquet]
+        [--inicio 2025-06-14T00:00:00+00:00] [--fim 2025-08-14T23:59:59+00:00]
+        [--processos N]
+"""
+
+import argparse
+import csv
 import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import pandas as pd
 
 # Intervalo desejado
@@ -6,58 +39,164 @@ DATA_INICIO = pd.to_datetime("2025-06-14T00:00:00+00:00")
 DATA_FIM = pd.to_datetime("2025-08-14T23:59:59+00:00")
 
 CAMINHO_DADOS = "/home/israel/Documentos/GitHub/dados"
-todos_dados = []
+TAM_BLOCO = 200_000  # linhas de chat por bloco lido
+EPOCA = pd.Timestamp(0, tz="UTC")
+CAMPOS_CHAT = ["id_video", "timestamp", "autor", "mensagem", "id_mensagem", "timestamp_us"]
 
-for nome_pasta in os.listdir(CAMINHO_DADOS):
-    caminho_pasta = os.path.join(CAMINHO_DADOS, nome_pasta)
-    if not os.path.isdir(caminho_pasta):
-        continue
 
-    caminho_chat = os.path.join(caminho_pasta, "chat.csv")
-    caminho_meta = os.path.join(caminho_pasta, "metadados.csv")
+def ler_metadados(caminho_meta):
+    """Devolve o dicionário da única linha de ``metadados.csv`` (ou None)."""
+    with open(caminho_meta, newline="", encoding="utf-8") as f:
+        linhas = list(csv.DictReader(f))
+    return linhas[0] if len(linhas) == 1 else None
 
-    if not (os.path.isfile(caminho_chat) and os.path.isfile(caminho_meta)):
-        print(f"Arquivos ausentes em: {nome_pasta}")
-        continue
 
-    try:
-        df_chat = pd.read_csv(caminho_chat)
-        df_meta = pd.read_csv(caminho_meta)
+def selecionar_lives(caminho_dados, inicio, fim):
+    """Filtra as pastas pelo início da live, sem abrir os arquivos de chat."""
+    selecionadas = []
+    for nome_pasta in sorted(os.listdir(caminho_dados)):
+        caminho_pasta = os.path.join(caminho_dados, nome_pasta)
+        if not os.path.isdir(caminho_pasta):
+            continue
 
-        # Verifica se o início da live está dentro do intervalo
-        if "data_inicio_live" in df_meta.columns:
-            inicio_live = pd.to_datetime(df_meta.iloc[0]["data_inicio_live"], utc=True)
-            if not (DATA_INICIO <= inicio_live <= DATA_FIM):
-                continue
-        else:
+        caminho_chat = os.path.join(caminho_pasta, "chat.csv")
+        caminho_meta = os.path.join(caminho_pasta, "metadados.csv")
+        if not (os.path.isfile(caminho_chat) and os.path.isfile(caminho_meta)):
+            print(f"Arquivos ausentes em: {nome_pasta}")
+            continue
+
+        try:
+            meta = ler_metadados(caminho_meta)
+        except Exception as e:
+            print(f"Erro ao ler metadados de {nome_pasta}: {e}")
+            continue
+        if meta is None:
+            print(f"Metadados com número de linhas inesperado em {nome_pasta}, pulando...")
+            continue
+        if not meta.get("data_inicio_live"):
             print(f"Campo 'data_inicio_live' ausente em {nome_pasta}, pulando...")
             continue
 
-        # Filtra as mensagens pelo intervalo de datas
-        if "timestamp" in df_chat.columns:
-            df_chat["timestamp"] = pd.to_datetime(df_chat["timestamp"], utc=True)
-            df_chat = df_chat[
-                (df_chat["timestamp"] >= DATA_INICIO) &
-                (df_chat["timestamp"] <= DATA_FIM)
-            ]
+        inicio_live = pd.to_datetime(meta["data_inicio_live"], utc=True)
+        if inicio <= inicio_live <= fim:
+            selecionadas.append((nome_pasta, caminho_chat, meta))
+    return selecionadas
+
+
+def processar_live(nome_pasta, caminho_chat, id_video, inicio, fim, pasta_partes, formato):
+    """
+    Lê o chat em blocos, filtra pelo intervalo e grava a parte desta live.
+    Devolve (nome_pasta, caminho_da_parte ou None, total de mensagens).
+    """
+    destino = os.path.join(pasta_partes, f"{id_video}.{formato}")
+    total = 0
+    escritor_pq = None
 
-        if len(df_meta) != 1:
-            print(f"Metadados com {len(df_meta)} linhas em {nome_pasta}, pulando...")
+    leitor = pd.read_csv(caminho_chat, chunksize=TAM_BLOCO, dtype=str, keep_default_na=False)
+    for bloco in leitor:
+        bloco = bloco.reindex(columns=CAMPOS_CHAT, fill_value="")
+        bloco["id_video"] = bloco["id_video"].where(bloco["id_video"] != "", id_video)
+
+        # timestamp_us (coletas novas ou convertidas) dispensa o parsing do texto
+        us = pd.to_numeric(bloco["timestamp_us"], errors="coerce")
+        ts = pd.to_datetime(us, unit="us", utc=True)
+        if us.isna().any():
+            ts = ts.fillna(pd.to_datetime(bloco["timestamp"], utc=True, format="ISO8601",
+                                          errors="coerce"))
+        dentro = (ts >= inicio) & (ts <= fim)
+        bloco, ts = bloco[dentro], ts[dentro]
+        if bloco.empty:
             continue
+        # no dataset unificado toda linha sai com timestamp_us (inteiro)
+        bloco = bloco.assign(timestamp_us=(ts - EPOCA) // pd.Timedelta(microseconds=1))
+
+        if formato == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            tabela = pa.Table.from_pandas(bloco, preserve_index=False)
+            if escritor_pq is None:
+                escritor_pq = pq.ParquetWriter(destino, tabela.schema, compression="zstd",
+                                               use_dictionary=["id_video", "autor"])
+            escritor_pq.write_table(tabela)
+        else:
+            bloco.to_csv(destino, mode="a", index=False, header=(total == 0))
+        total += len(bloco)
+
+    if escritor_pq is not None:
+        escritor_pq.close()
+    return nome_pasta, (destino if total else None), total
+
+
+def concatenar_csv(partes, caminho_saida):
+    """Junta as partes CSV num único arquivo, copiando em fluxo (sem pandas)."""
+    with open(caminho_saida, "w", newline="", encoding="utf-8") as saida:
+        saida.write(",".join(CAMPOS_CHAT) + "\n")
+        for parte in partes:
+            with open(parte, encoding="utf-8") as f:
+                f.readline()  # cabeçalho da parte
+                shutil.copyfileobj(f, saida, 1 << 20)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Unifica chats e metadados das lives.")
+    ap.add_argument("--dados", default=CAMINHO_DADOS)
+    ap.add_argument("--saida", default=os.getcwd())
+    ap.add_argument("--formato", choices=("csv", "parquet"), default="csv")
+    ap.add_argument("--inicio", default=str(DATA_INICIO))
+    ap.add_argument("--fim", default=str(DATA_FIM))
+    ap.add_argument("--processos", type=int, default=os.cpu_count())
+    args = ap.parse_args()
+
+    inicio = pd.to_datetime(args.inicio, utc=True)
+    fim = pd.to_datetime(args.fim, utc=True)
+
+    lives = selecionar_lives(args.dados, inicio, fim)
+    print(f"- Lives no intervalo: {len(lives)}")
+
+    # Dimensão: uma linha por live
+    caminho_dim = os.path.join(args.saida, "dimensao_lives.csv")
+    campos_meta = list(dict.fromkeys(c for _, _, meta in lives for c in meta))
+    with open(caminho_dim, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=campos_meta)
+        w.writeheader()
+        w.writerows(meta for _, _, meta in lives)
+
+    # Fatos: uma parte por live, processadas em paralelo
+    pasta_partes = tempfile.mkdtemp(prefix="partes_", dir=args.saida)
+    partes, total_msgs = {}, 0
+    with ProcessPoolExecutor(max_workers=args.processos) as pool:
+        futuros = [
+            pool.submit(processar_live, nome, chat, meta["id_video"], inicio, fim,
+                        pasta_partes, args.formato)
+            for nome, chat, meta in lives
+        ]
+        for fut in as_completed(futuros):
+            try:
+                nome, parte, n = fut.result()
+            except Exception as e:
+                print(f"Erro ao processar uma live: {e}")
+                continue
+            if parte:
+                partes[nome] = parte
+                total_msgs += n
 
-        for col in df_meta.columns:
-            if col.lower() != "descricao":
-                df_chat[col] = df_meta.iloc[0][col]
+    ordenadas = [partes[nome] for nome, _, _ in lives if nome in partes]
+    if args.formato == "parquet":
+        caminho_saida = os.path.join(args.saida, "dataset_unificado")
+        if os.path.isdir(caminho_saida):
+            shutil.rmtree(caminho_saida)
+        os.replace(pasta_partes, caminho_saida)
+    else:
+        caminho_saida = os.path.join(args.saida, "dataset_unificado.csv")
+        concatenar_csv(ordenadas, caminho_saida)
+        shutil.rmtree(pasta_partes)
 
-        if not df_chat.empty:
-            todos_dados.append(df_chat)
-    except Exception as e:
-        print(f"Erro ao processar {nome_pasta}: {e}")
+    print(f"- Arquivo gerado com sucesso: {caminho_saida}")
+    print(f"- Dimensão das lives: {caminho_dim}")
+    print(f"- Total de mensagens: {total_msgs}")
+    print(f"- Total de transmissões: {len(ordenadas)}")
 
-df_final = pd.concat(todos_dados, ignore_index=True)
-caminho_saida = os.path.join(os.getcwd(), "dataset_unificado.csv")
-df_final.to_csv(caminho_saida, index=False)
 
-print(f"- Arquivo gerado com sucesso: {caminho_saida}")
-print(f"- Total de mensagens: {len(df_final)}")
-print(f"- Total de transmissões: {len(todos_dados)}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
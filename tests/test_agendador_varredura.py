@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+
+"""``fator_ritmo`` < 1 não leva o intervalo de varredura abaixo do mínimo."""
+
+from __future__ import annotations
+
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "monitor_de_lives" / "scripts"))
+
+from agendador_varredura import AgendadorVarredura  # noqa: E402
+
+
+def test_fator_nao_passa_do_intervalo_min():
+    agora = datetime(2025, 7, 1, 21, tzinfo=timezone.utc)
+    ag = AgendadorVarredura(orcamento_diario=10**6)  # orçamento folgado: intervalo no mínimo
+    ag.aprender({"canal": [agora]}, ["canal"], agora)
+    assert ag.intervalo("canal", agora) == ag.intervalo_min
+    ag.registrar_varredura("canal", agora, fator=0.5)
+    assert ag.segundos_ate_proxima(["canal"], agora) == ag.intervalo_min
+
+
+def test_fator_nao_passa_do_intervalo_max():
+    agora = datetime(2025, 7, 1, 21, tzinfo=timezone.utc)
+    ag = AgendadorVarredura(orcamento_diario=1)  # orçamento mínimo: intervalo no teto
+    ag.aprender({}, ["canal"], agora)
+    assert ag.intervalo("canal", agora) == ag.intervalo_max
+    ag.registrar_varredura("canal", agora, fator=4.0)
+    assert ag.segundos_ate_proxima(["canal"], agora) == ag.intervalo_max
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+"""``coletar_replay`` de ponta a ponta, com yt-dlp/chat-downloader simulados."""
+
+from __future__ import annotations
+
+import csv
+import json
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ / "coletor_de_lives_gravadas"))
+
+import coletar_chat_replay as replay  # noqa: E402
+
+ID_VIDEO = "abcdefghijk"
+META = {
+    "id_video": ID_VIDEO,
+    "titulo": "live de teste",
+    "descricao": "",
+    "canal": "Canal Teste",
+    "id_canal": "UC0000000000000000000000",
+    "data_publicacao": "2025-07-01T00:00:00Z",
+    "data_inicio_live": "2025-07-01T21:00:00Z",
+    "espectadores_atuais": "",
+    "likes": 1,
+    "visualizacoes": 2,
+    "comentarios": 3,
+}
+
+
+class CacheFalso:
+    def obter(self, id_video):
+        return dict(META)
+
+
+class ChatFalso:
+    def get_chat(self, url, start_time=None):
+        for i in range(3):
+            yield {
+                "message_id": f"m{i}",
+                "timestamp": 1751403600_000000 + i * 1_000_000,
+                "time_in_seconds": float(i),
+                "author": {"name": f"autor{i}"},
+                "message": f"oi {i}",
+            }
+
+
+def test_coletar_replay_grava_metadados_e_chat(tmp_path, monkeypatch):
+    monkeypatch.setattr(replay, "DIRETORIO_BASE", str(tmp_path))
+    monkeypatch.setattr(replay, "cache_metadados", lambda: CacheFalso())
+    monkeypatch.setattr(replay, "ChatDownloader", ChatFalso)
+
+    resumo = replay.coletar_replay(ID_VIDEO)
+
+    pasta = Path(resumo["pasta"])
+    assert resumo["total"] == 3
+    with (pasta / "metadados.csv").open(newline="", encoding="utf-8") as f:
+        linhas = list(csv.DictReader(f))
+    assert linhas[0]["id_canal"] == META["id_canal"]
+    assert list(linhas[0])[:5] == ["id_video", "titulo", "descricao", "canal", "id_canal"]
+    with (pasta / "chat.csv").open(newline="", encoding="utf-8") as f:
+        assert [l["mensagem"] for l in csv.DictReader(f)] == ["oi 0", "oi 1", "oi 2"]
+    assert json.loads((pasta / replay.ARQ_CHECKPOINT).read_text())["concluido"] is True
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+"""Canais no SQLite: chave pelo channelId e migração de bancos antigos."""
+
+from __future__ import annotations
+
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "monitor_de_lives" / "scripts"))
+
+from escritor_sqlite import conectar, registrar_live  # noqa: E402
+
+
+def test_canal_renomeado_mantem_id(tmp_path):
+    con = conectar(tmp_path / "chat.sqlite3")
+    registrar_live(con, {"id_video": "v1", "canal": "Nome Antigo", "id_canal": "UCabc"})
+    registrar_live(con, {"id_video": "v2", "canal": "Nome Novo", "id_canal": "UCabc"})
+    registrar_live(con, {"id_video": "v3", "canal": "Sem ID"})  # metadados antigos
+    assert list(con.execute("SELECT id_canal, nome FROM canais ORDER BY id_canal")) == [
+        ("Sem ID", "Sem ID"), ("UCabc", "Nome Novo")]
+    assert list(con.execute("SELECT id_video, id_canal FROM lives ORDER BY id_video")) == [
+        ("v1", "UCabc"), ("v2", "UCabc"), ("v3", "Sem ID")]
+
+
+def test_migra_id_canal_numerico(tmp_path):
+    arq = tmp_path / "chat.sqlite3"
+    con = sqlite3.connect(arq)
+    con.executescript("""
+        CREATE TABLE canais (id_canal INTEGER PRIMARY KEY, nome TEXT NOT NULL UNIQUE);
+        CREATE TABLE lives (id_video TEXT PRIMARY KEY, id_canal INTEGER, titulo TEXT,
+            descricao TEXT, data_publicacao TEXT, data_inicio_live TEXT,
+            espectadores_atuais TEXT, likes INTEGER, visualizacoes INTEGER, comentarios INTEGER);
+        INSERT INTO canais(nome) VALUES ('Canal A');
+        INSERT INTO lives(id_video, id_canal, titulo) VALUES ('v1', 1, 'live');
+    """)
+    con.close()
+
+    con = conectar(arq)
+    assert list(con.execute("SELECT id_canal, nome FROM canais")) == [("Canal A", "Canal A")]
+    assert list(con.execute("SELECT id_video, id_canal, titulo FROM lives")) == [
+        ("v1", "Canal A", "live")]
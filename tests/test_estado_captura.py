@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+"""O token salvo em ``estado_captura.json`` só avança com o escritor em dia."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "monitor_de_lives" / "scripts"))
+
+from estado_captura import EstadoCaptura  # noqa: E402
+
+
+def _linhas(i):
+    return [{"id_mensagem": f"m{i}"}]
+
+
+def test_token_salvo_espera_confirmacao(tmp_path):
+    estado = EstadoCaptura(tmp_path, "vid", "chat")
+    estado.registrar({"nextPageToken": "t1"}, _linhas(1), 1, confirmado=True)
+    # linhas no buffer do Parquet: a coleta segue, o disco fica em t1
+    estado.registrar({"nextPageToken": "t2"}, _linhas(2), 2, confirmado=False)
+    estado.registrar({"nextPageToken": "t3"}, _linhas(3), 3, confirmado=False)
+    assert estado.proximo_token == "t3"
+    assert EstadoCaptura(tmp_path, "vid", "chat").proximo_token == "t1"
+
+    estado.registrar({"nextPageToken": "t4"}, _linhas(4), 4, confirmado=True)
+    assert EstadoCaptura(tmp_path, "vid", "chat").proximo_token == "t4"
+
+
+def test_confirmar_ao_fechar(tmp_path):
+    estado = EstadoCaptura(tmp_path, "vid", "chat")
+    estado.registrar({"nextPageToken": "t1"}, _linhas(1), 1, confirmado=False)
+    estado.confirmar()
+    retomado = EstadoCaptura(tmp_path, "vid", "chat")
+    assert retomado.proximo_token == "t1" and retomado.retomado
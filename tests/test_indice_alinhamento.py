@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+"""Índice de alinhamento: leitura incremental e ``chat.csv`` reescrito."""
+
+from __future__ import annotations
+
+import csv
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "monitor_de_lives" / "scripts"))
+
+from indice_alinhamento_chat_transcricao import IndiceAlinhamento  # noqa: E402
+
+ID_VIDEO = "abcdefghijk"
+INICIO_US = 1751403600 * 1_000_000  # 2025-07-01T21:00:00Z
+
+
+def _gravar_chat(arq: Path, segundos) -> None:
+    tmp = arq.with_name("chat.tmp")
+    with tmp.open("w", newline="", encoding="utf-8") as fp:
+        wr = csv.writer(fp)
+        wr.writerow(["id_mensagem", "timestamp_us"])
+        wr.writerows([f"m{i}", INICIO_US + s * 1_000_000] for i, s in enumerate(segundos))
+    os.replace(tmp, arq)
+
+
+def _preparar(tmp_path: Path) -> Path:
+    pasta = tmp_path / "dados" / f"canal__2025-07-01__21-00-00__{ID_VIDEO}"
+    pasta.mkdir(parents=True)
+    with (pasta / "metadados.csv").open("w", newline="", encoding="utf-8") as fp:
+        wr = csv.writer(fp)
+        wr.writerow(["id_video", "canal", "data_inicio_live"])
+        wr.writerow([ID_VIDEO, "canal", "2025-07-01T21:00:00Z"])
+    return pasta / "chat.csv"
+
+
+def test_incremental_e_reescrita(tmp_path):
+    arq = _preparar(tmp_path)
+    _gravar_chat(arq, [0, 1, 1])
+    indice = IndiceAlinhamento(tmp_path / "indice")
+    dados, transc = tmp_path / "dados", tmp_path / "nada"
+    assert indice.atualizar(dados, transc)["mensagens_novas"] == 3
+
+    with arq.open("a", newline="", encoding="utf-8") as fp:  # captura em andamento
+        csv.writer(fp).writerow(["m3", INICIO_US + 2 * 1_000_000])
+    assert indice.atualizar(dados, transc)["mensagens_novas"] == 1
+    assert list(indice.live(ID_VIDEO).chat) == [1, 2, 1]
+
+    # reescrita com os.replace (converter_timestamps): menos linhas, outro conteúdo
+    _gravar_chat(arq, [5, 5])
+    assert indice.atualizar(dados, transc)["mensagens_novas"] == 2
+    assert indice.manifesto[ID_VIDEO]["mensagens"] == 2
+    assert list(IndiceAlinhamento(tmp_path / "indice").live(ID_VIDEO).chat) == [0] * 5 + [2]
+
+    # nada mudou: nada relido
+    assert indice.atualizar(dados, transc)["mensagens_novas"] == 0
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+"""Contadores de capturas encerradas continuam no ``/metrics`` do monitor."""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "monitor_de_lives" / "scripts"))
+
+import metricas  # noqa: E402
+
+
+def _captura(pasta: Path, nome: str, reqs: int) -> Path:
+    reg = metricas.Registro()
+    reg.contador("reqs_total", "Requisições", ("endpoint",)).inc(reqs, endpoint="videos.list")
+    reg.histograma("lat_segundos", "Latência", baldes=(1,)).observar(0.5)
+    reg.medidor("atraso_segundos", "Atraso").definir(3)
+    arq = pasta / f"captura_{nome}.json"
+    reg.salvar(arq)
+    return arq
+
+
+def _series(pasta: Path) -> dict:
+    total = metricas.juntar(metricas.ler_instantaneos(pasta, expira_s=60))
+    return {nome: dict(m["amostras"]) for nome, m in total.items()}
+
+
+def test_expirado_entra_no_total_retido(tmp_path):
+    _captura(tmp_path, "a", 2)
+    antiga = _captura(tmp_path, "b", 5)
+    velho = time.time() - 120
+    os.utime(antiga, (velho, velho))
+
+    series = _series(tmp_path)
+    chave = (("endpoint", "videos.list"),)
+    assert series["reqs_total"][chave] == 7
+    assert series["lat_segundos"][()]["n"] == 2
+    assert series["atraso_segundos"][()] == 3  # só o medidor da captura ativa
+    assert not antiga.exists()
+
+    # a segunda leitura não soma de novo nem perde o retido
+    assert _series(tmp_path)["reqs_total"][chave] == 7
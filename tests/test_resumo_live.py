@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+"""``resumo.json`` gravado junto com a confirmação do escritor."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "monitor_de_lives" / "scripts"))
+
+from escritor_chat import criar_escritor  # noqa: E402
+from resumo_live import ARQ_RESUMO, ler_resumo  # noqa: E402
+
+META = {"id_video": "abcdefghijk", "canal": "Canal", "titulo": "live",
+        "data_inicio_live": "2025-07-01T21:00:00Z"}
+
+
+def _lote(ini, n):
+    return [{"id_video": META["id_video"], "id_mensagem": f"m{i}", "autor": f"a{i % 2}",
+             "timestamp": f"2025-07-01T21:{i:02d}:00+00:00", "mensagem": "oi"}
+            for i in range(ini, ini + n)]
+
+
+@pytest.mark.parametrize("formato", ["csv", "sqlite"])
+def test_resumo_salvo_a_cada_lote_confirmado(tmp_path, formato):
+    pasta = tmp_path / "live"
+    pasta.mkdir()
+    escritor = criar_escritor(formato, pasta, META)
+    assert escritor.gravar(_lote(0, 3) + _lote(1, 2)) == 3  # repetidas no lote e no banco
+    assert escritor.gravar(_lote(2, 3)) == 2
+    # sem fechar (queda): o resumo em disco já conta o que foi gravado
+    assert ler_resumo(pasta / ARQ_RESUMO)["total"] == escritor.total == 5
+    escritor.fechar()
+
+
+def test_parquet_so_salva_o_confirmado(tmp_path):
+    pytest.importorskip("pyarrow")
+    pasta = tmp_path / "live"
+    pasta.mkdir()
+    escritor = criar_escritor("parquet", pasta, META)
+    escritor.escritor.rotacao_s = 3600
+    escritor.gravar(_lote(0, 3))
+    assert escritor.pendentes == 3
+    assert not (pasta / ARQ_RESUMO).exists()  # nada confirmado ainda
+    escritor.fechar()
+    assert ler_resumo(pasta / ARQ_RESUMO)["total"] == 3